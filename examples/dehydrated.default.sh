@@ -7,6 +7,9 @@ set -u
 set -o pipefail
 
 export PROVIDER_UPDATE_DELAY=${PROVIDER_UPDATE_DELAY:-"30"}
+# If set, wait until the authoritative nameservers serve each challenge (for at most
+# this number of seconds) instead of sleeping PROVIDER_UPDATE_DELAY seconds.
+export PROVIDER_PROPAGATION_TIMEOUT=${PROVIDER_PROPAGATION_TIMEOUT:-""}
 export PROVIDER=${PROVIDER:-"cloudflare"}
 
 function deploy_challenge {
@@ -16,7 +19,10 @@ function deploy_challenge {
 
         echo "deploy_challenge called: ${DOMAIN}, ${TOKEN_FILENAME}, ${TOKEN_VALUE}"
 
-        if [ "${PROVIDER}" != "hetzner" ]; then
+        if [ "${PROVIDER}" != "hetzner" ] && [ -n "${PROVIDER_PROPAGATION_TIMEOUT}" ]; then
+            lexicon $PROVIDER create ${DOMAIN} TXT --name="_acme-challenge.${DOMAIN}." \
+            --content="${TOKEN_VALUE}" --propagation-timeout="${PROVIDER_PROPAGATION_TIMEOUT}"
+        elif [ "${PROVIDER}" != "hetzner" ]; then
             lexicon $PROVIDER create ${DOMAIN} TXT --name="_acme-challenge.${DOMAIN}." \
             --content="${TOKEN_VALUE}"
         else
@@ -29,7 +35,7 @@ function deploy_challenge {
         fi
     done
 
-    if [ "${PROVIDER}" != "hetzner" ]; then
+    if [ "${PROVIDER}" != "hetzner" ] && [ -z "${PROVIDER_PROPAGATION_TIMEOUT}" ]; then
         local DELAY_COUNTDOWN=$PROVIDER_UPDATE_DELAY
         while [ $DELAY_COUNTDOWN -gt 0 ]; do
             echo -ne "${DELAY_COUNTDOWN}\033[0K\r"
@@ -0,0 +1,316 @@
+"""
+Batch execution of Lexicon operations.
+
+A batch is a stream of operations, each one being a dict that follows the format of a
+lexicon.yml configuration file: generic parameters (provider_name, action, domain, type, name,
+content, ttl, identifier, delegated...) at the top level, and parameters specific to a provider
+scoped under the provider name. For instance, in JSON:
+    {"provider_name": "cloudflare", "action": "create", "domain": "example.com",
+     "type": "TXT", "name": "_acme-challenge", "content": "challenge",
+     "cloudflare": {"auth_username": "user@example.com", "auth_token": "SECRET"}}
+
+Operations may target any number of providers and domains. A provider is instantiated and
+authenticated only once per (provider, zone, credentials) triple, the credentials being the auth_*
+parameters of the operation, then reused by every subsequent operation targeting the same triple.
+If the authentication fails, the operation fails, and the next operation on the same triple tries
+to authenticate again.
+
+Successive create, update and delete operations on a same zone, that only differ by their record
+parameters (type, name, content, identifier), are applied together with Provider.apply_changes:
+providers able to send several changes in one API call apply them in as few calls as possible.
+
+With ConcurrentBatchClient, operations on distinct zones are executed in parallel, while
+operations on a same zone are still executed sequentially, in the order they were given.
+"""
+from __future__ import absolute_import
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer
+import hashlib
+import json
+import logging
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from lexicon.client import Client, resolve_domain
+from lexicon.config import ConfigResolver, DictConfigSource, non_interactive_config_resolver
+from lexicon.ratelimit import TokenBucket
+
+
+LOGGER = logging.getLogger(__name__)
+
+# Actions of the operations that may be applied together with Provider.apply_changes.
+_CHANGE_ACTIONS = ('create', 'update', 'delete')
+# Parameters of an operation that describe its change, other parameters must be equal
+# for operations to be applied together.
+_CHANGE_PARAMETERS = ('action', 'type', 'name', 'content', 'identifier')
+
+
+class OperationConfigSource(DictConfigSource):  # pylint: disable=too-few-public-methods
+    """ConfigSource that resolves configuration against the operation currently executed."""
+    # The current operation changes, so values must not be memoized by the ConfigResolver.
+    cacheable = False
+
+    def __init__(self):
+        super(OperationConfigSource, self).__init__({})
+
+    def load(self, operation):
+        """Make the given operation the current one."""
+        self._parameters = operation
+
+
+class BatchClient(object):  # pylint: disable=useless-object-inheritance
+    """
+    Execute a stream of operations, reusing authenticated providers across operations.
+
+    :param config: ConfigResolver used as a fallback for any parameter not defined by an
+    operation itself. By default, a non-interactive ConfigResolver is used.
+    :param rate_limits: dict of the maximum number of operations per second for a given provider
+    name, eg. {'cloudflare': 4}. Providers not in this dict are not rate limited.
+    """
+    def __init__(self, config=None, rate_limits=None):
+        self.config = config if config else non_interactive_config_resolver()
+        self._clients = {}
+        self._buckets = {provider_name: TokenBucket(rate)
+                         for provider_name, rate in (rate_limits or {}).items()}
+
+    def execute(self, operations):
+        """
+        Execute the given iterable of operations. This is a generator that yields one result
+        per operation, in the same order. A failing operation does not interrupt the batch:
+        its result holds the error instead of the output. The results of operations applied
+        together are yielded once all of them are applied.
+        """
+        return self._execute_indexed(enumerate(operations))
+
+    def execute_operation(self, operation, index=None):
+        """
+        Execute one operation, and return its result as a dict. The time spent to execute the
+        operation is given in seconds in the 'elapsed' key, not including any rate limiting delay.
+        """
+        result = {'index': index}
+        if isinstance(operation, dict) and operation.get('provider_name') in self._buckets:
+            self._buckets[operation['provider_name']].acquire()
+
+        start = default_timer()
+        try:
+            if isinstance(operation, Exception):
+                raise operation
+            if not isinstance(operation, dict):
+                raise ValueError('Operation must be a JSON object')
+            result.update({key: operation.get(key)
+                           for key in ('provider_name', 'action', 'domain', 'type', 'name')})
+
+            for key in ('provider_name', 'action', 'domain', 'type'):
+                if not operation.get(key):
+                    raise AttributeError(key)
+
+            client, source = self._get_client(operation)
+            source.load(operation)
+            result['output'] = client.execute_action(operation['action'])
+            result['success'] = True
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.debug('Operation %s failed.', index, exc_info=True)
+            result['success'] = False
+            result['error'] = '{0}: {1}'.format(type(error).__name__, error)
+
+        result['elapsed'] = default_timer() - start
+        return result
+
+    def execute_changes(self, operations, indexes=None):
+        """
+        Apply together the given create, update and delete operations, that must target the same
+        zone and only differ by their record parameters, and return their results as a list of
+        dicts. The 'elapsed' key of each result is the time spent to apply all the operations.
+        """
+        indexes = indexes or [None] * len(operations)
+        results = []
+        for index, operation in zip(indexes, operations):
+            results.append(dict({'index': index}, **{
+                key: operation.get(key)
+                for key in ('provider_name', 'action', 'domain', 'type', 'name')}))
+            if operation.get('provider_name') in self._buckets:
+                self._buckets[operation['provider_name']].acquire()
+
+        start = default_timer()
+        try:
+            client, source = self._get_client(operations[0])
+            source.load(operations[0])
+            outputs = client.apply_changes([
+                {key: operation.get(key) for key in _CHANGE_PARAMETERS}
+                for operation in operations])
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.debug('Operations %s failed.', indexes, exc_info=True)
+            outputs = [{'success': False, 'error': '{0}: {1}'.format(type(error).__name__, error)}
+                       for _ in operations]
+
+        elapsed = default_timer() - start
+        for result, output in zip(results, outputs):
+            result.update(output)
+            result['elapsed'] = elapsed
+        return results
+
+    def forget(self, operation):
+        """
+        Drop the provider used for the zone of the given operation, if any: the provider will be
+        instantiated and authenticated again by the next operation on this zone.
+        """
+        try:
+            self._clients.pop(_zone_key(operation), None)
+        except Exception:  # pylint: disable=broad-except
+            # Invalid operation, no provider can be associated to it.
+            pass
+
+    def _execute_indexed(self, operations):
+        """
+        Generate the results of the given (index, operation) pairs, applying together the
+        successive operations that can be (see _changes_key).
+        """
+        pending, pending_key = [], None
+        for index, operation in operations:
+            key = _changes_key(operation)
+            if pending and (key is None or key != pending_key):
+                for result in self._execute_pending(pending):
+                    yield result
+                pending = []
+            if key is None:
+                yield self.execute_operation(operation, index)
+            else:
+                pending.append((index, operation))
+                pending_key = key
+        for result in self._execute_pending(pending):
+            yield result
+
+    def _execute_pending(self, pending):
+        if len(pending) == 1:
+            return [self.execute_operation(pending[0][1], pending[0][0])]
+        return self.execute_changes([operation for _, operation in pending],
+                                    [index for index, _ in pending]) if pending else []
+
+    def _get_client(self, operation):
+        key = _zone_key(operation)
+        entry = self._clients.get(key)
+
+        if not entry:
+            source = OperationConfigSource()
+            source.load(operation)
+            config = ConfigResolver().with_config_source(source).with_config_source(self.config)
+            client = Client(config)
+            # Only an authenticated provider is kept: a failure, maybe transient, is not cached.
+            client.provider.authenticate()
+            entry = (client, source)
+            self._clients[key] = entry
+
+        return entry
+
+
+class ConcurrentBatchClient(BatchClient):
+    """
+    Execute a stream of operations, using a pool of threads to process distinct zones in parallel.
+    Results are yielded as soon as operations complete, so their order may differ from the order
+    of the operations: the 'index' key of each result gives the position of its operation.
+    All operations are read before the execution starts, in order to group them by zone.
+
+    :param workers: maximum number of zones processed in parallel
+    :param concurrency: dict of the maximum number of zones processed in parallel for a given
+    provider name, eg. {'route53': 2}. Providers not in this dict are only bounded by workers.
+    """
+    def __init__(self, config=None, rate_limits=None, workers=4, concurrency=None):
+        super(ConcurrentBatchClient, self).__init__(config, rate_limits)
+        self.workers = workers
+        self.concurrency = concurrency or {}
+
+    def execute(self, operations):
+        # Operations are grouped by zone, then groups are queued by provider.
+        groups = OrderedDict()
+        for index, operation in enumerate(operations):
+            try:
+                key = _zone_key(operation)
+            except Exception:  # pylint: disable=broad-except
+                # Invalid operation, that will fail on its own.
+                key = (None, index)
+            groups.setdefault(key, []).append((index, operation))
+        pending = OrderedDict()
+        for key, group in groups.items():
+            pending.setdefault(key[0], deque()).append(group)
+
+        results = queue.Queue()
+        # Lock is reentrant, as a callback is invoked immediately if its future is already done.
+        lock = threading.RLock()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        def _submit(provider_name):
+            if not pending.get(provider_name):
+                return
+            group = pending[provider_name].popleft()
+            future = executor.submit(self._execute_group, group, results.put)
+            future.add_done_callback(lambda _: _on_done(provider_name))
+
+        def _on_done(provider_name):
+            # A slot is released for this provider: its next zone can be processed.
+            with lock:
+                _submit(provider_name)
+
+        with lock:
+            for provider_name in list(pending):
+                for _ in range(self.concurrency.get(provider_name) or self.workers):
+                    _submit(provider_name)
+
+        try:
+            for _ in range(sum(len(group) for group in groups.values())):
+                yield results.get()
+        finally:
+            with lock:
+                pending.clear()
+            executor.shutdown(wait=True)
+
+    def _execute_group(self, group, callback):
+        for result in self._execute_indexed(group):
+            callback(result)
+
+
+def _zone_key(operation):
+    return (operation['provider_name'],
+            resolve_domain(operation['domain'], operation.get('delegated')),
+            _auth_fingerprint(operation))
+
+
+def _auth_fingerprint(operation):
+    """Return a hash of the auth_* parameters given by the operation for its provider."""
+    options = operation.get(operation['provider_name'])
+    credentials = sorted((key, str(value)) for key, value in options.items()
+                         if key.startswith('auth')) if isinstance(options, dict) else []
+    return hashlib.sha256(json.dumps(credentials).encode('utf-8')).hexdigest()
+
+
+def _changes_key(operation):
+    """
+    Return the key shared by the operations that can be applied together with the given one,
+    or None if it must be executed on its own.
+    """
+    if not isinstance(operation, dict) or operation.get('action') not in _CHANGE_ACTIONS:
+        return None
+    try:
+        zone_key = _zone_key(operation)
+    except Exception:  # pylint: disable=broad-except
+        # Invalid operation, that will fail on its own.
+        return None
+    if not operation.get('type'):
+        return None
+    return (zone_key, json.dumps({key: value for key, value in operation.items()
+                                  if key not in _CHANGE_PARAMETERS}, sort_keys=True, default=str))
+
+
+def read_operations(stream):
+    """Generate the operations from given stream in JSON Lines format, skipping blank lines."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                # Yield the error itself, to be reported as a failed operation.
+                yield error
@@ -0,0 +1,124 @@
+"""
+On-disk cache of Lexicon, used to persist data across Lexicon invocations.
+
+Cache files are JSON documents stored in the directory given by the LEXICON_CACHE_DIR
+environment variable, or by default in the 'lexicon' subdirectory of the user cache
+directory ($XDG_CACHE_HOME or ~/.cache). The cache is a best-effort mechanism: any error
+while reading or writing a cache file is logged and ignored.
+"""
+from __future__ import absolute_import
+from contextlib import contextmanager
+import json
+import logging
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # pylint: disable=invalid-name
+
+
+LOGGER = logging.getLogger(__name__)
+
+_LOCKS = {}
+_LOCKS_LOCK = threading.Lock()
+
+
+def get_cache_dir():
+    """Return the directory holding the Lexicon cache files."""
+    cache_dir = os.environ.get('LEXICON_CACHE_DIR')
+    if not cache_dir:
+        cache_dir = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+            'lexicon')
+    return cache_dir
+
+
+def load(name):
+    """Return the data stored in the cache file of the given name, or None if not available."""
+    path = os.path.join(get_cache_dir(), name)
+    try:
+        with open(path, 'r') as stream:
+            return json.load(stream)
+    except (IOError, OSError, ValueError) as error:
+        if os.path.exists(path):
+            LOGGER.debug('Cache file %s could not be read: %s', path, error)
+        return None
+
+
+def save(name, data):
+    """
+    Store the given JSON serializable data in the cache file of the given name.
+    File is written atomically, so a concurrent reader never sees a partial content.
+    Return True if the data could be stored, False otherwise.
+    """
+    cache_dir = get_cache_dir()
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        handle, temp_path = tempfile.mkstemp(dir=cache_dir, prefix='.{0}.'.format(name))
+        try:
+            with os.fdopen(handle, 'w') as stream:
+                json.dump(data, stream)
+            replace(temp_path, os.path.join(cache_dir, name))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except (IOError, OSError, TypeError, ValueError) as error:
+        LOGGER.debug('Cache file %s could not be written: %s', name, error)
+        return False
+
+    return True
+
+
+def delete(name):
+    """Remove the cache file of the given name, if it exists."""
+    path = os.path.join(get_cache_dir(), name)
+    try:
+        os.remove(path)
+    except (IOError, OSError) as error:
+        if os.path.exists(path):
+            LOGGER.debug('Cache file %s could not be removed: %s', path, error)
+
+
+@contextmanager
+def lock(name):
+    """
+    Hold an exclusive lock for the given name, shared by the threads of this process and by
+    every other Lexicon process using the same cache directory, typically to read then write
+    a cache file without losing concurrent updates. Across processes, the lock relies on fcntl:
+    on platforms without it (Windows), it is only effective within the current process.
+    """
+    with _LOCKS_LOCK:
+        thread_lock = _LOCKS.setdefault(name, threading.Lock())
+
+    with thread_lock:
+        stream = None
+        cache_dir = get_cache_dir()
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir, 0o700)
+            stream = open(os.path.join(cache_dir, '.{0}.lock'.format(name)), 'a')
+            if fcntl:
+                fcntl.flock(stream.fileno(), fcntl.LOCK_EX)
+        except (IOError, OSError) as error:
+            LOGGER.debug('Cache lock %s could not be acquired: %s', name, error)
+        try:
+            yield
+        finally:
+            if stream:
+                # Closing the file releases the lock.
+                stream.close()
+
+
+def replace(source, destination):
+    """Atomically replace the destination file by the source file."""
+    if hasattr(os, 'replace'):
+        os.replace(source, destination)  # pylint: disable=no-member
+    else:
+        # Python 2 on Windows cannot rename over an existing file.
+        if os.name == 'nt' and os.path.exists(destination):
+            os.remove(destination)
+        os.rename(source, destination)
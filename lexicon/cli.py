@@ -6,6 +6,8 @@ import logging
 import os
 import sys
 
+from lexicon import server
+from lexicon.batch import BatchClient, ConcurrentBatchClient, read_operations
 from lexicon.client import Client
 from lexicon.config import ConfigResolver
 from lexicon.parser import generate_cli_main_parser
@@ -95,6 +97,25 @@ def handle_output(results, output_type, action):
                          'be printed with --output=JSON parameter.')
 
 
+def execute_batch(batch_client, file_path):
+    """
+    Execute the operations read in JSON Lines format from given file path (- for stdin),
+    and print one JSON result per operation. Return True if all operations succeeded.
+    """
+    stream = sys.stdin if file_path == '-' else open(file_path, 'r')
+    success = True
+    try:
+        for result in batch_client.execute(read_operations(stream)):
+            success = success and result['success']
+            print(json.dumps(result, default=str))
+            sys.stdout.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    return success
+
+
 def main():
     """Main function of Lexicon."""
     # Dynamically determine all the providers available and gather command line arguments.
@@ -110,6 +131,38 @@ def main():
     #   * from the environment variables
     #   * from lexicon configuration files found in given --config-dir (default is current dir)
     config = ConfigResolver()
+
+    if parsed_args.provider_name == 'batch':
+        config.with_env().with_config_dir(parsed_args.config_dir)
+        if parsed_args.workers > 1:
+            batch_client = ConcurrentBatchClient(config, parsed_args.rate_limit,
+                                                 parsed_args.workers, parsed_args.concurrency)
+        else:
+            batch_client = BatchClient(config, parsed_args.rate_limit)
+        if not execute_batch(batch_client, parsed_args.file):
+            sys.exit(1)
+        return
+
+    if parsed_args.provider_name == 'serve':
+        config.with_env().with_config_dir(parsed_args.config_dir)
+        server.LexiconServer(parsed_args.address or server.default_address(), config,
+                             server.context_fingerprint(parsed_args.config_dir),
+                             os.environ.get(server.TOKEN_ENVIRONMENT_VARIABLE)).serve_forever()
+        return
+
+    address = server.find_server(parsed_args.server_address)
+    if address:
+        try:
+            result = server.execute(address, server.operation_from_args(parsed_args),
+                                    context=server.context_fingerprint(parsed_args.config_dir))
+        except server.ServerUnavailable as error:
+            logger.debug('%s, executing the operation locally.', error)
+        else:
+            if not result['success']:
+                raise server.ServerError(result['error'])
+            handle_output(result['output'], parsed_args.output, parsed_args.action)
+            return
+
     config.with_args(parsed_args).with_env().with_config_dir(parsed_args.config_dir)
 
     client = Client(config)
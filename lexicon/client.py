@@ -18,6 +18,35 @@ class ProviderNotAvailableError(Exception):
     """
 
 
+class PropagationTimeoutError(Exception):
+    """
+    Custom exception to raise when a created or updated record is still not served
+    by every authoritative nameserver of its zone once the propagation timeout is reached
+    """
+
+
+def resolve_domain(domain, delegated=None):
+    """
+    Return the DNS zone to work on for the given domain: subdomains are stripped,
+    unless they are part of the given delegated domain.
+    """
+    domain_parts = tldextract.extract(domain)
+    zone = '{0}.{1}'.format(domain_parts.domain, domain_parts.suffix)
+
+    if delegated:
+        # handle delegated domain
+        delegated = delegated.rstrip('.')
+        if delegated != zone:
+            # convert to relative name
+            if delegated.endswith(zone):
+                delegated = delegated[:-len(zone)]
+                delegated = delegated.rstrip('.')
+            # update domain
+            zone = '{0}.{1}'.format(delegated, zone)
+
+    return zone
+
+
 class Client(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
     """This is the Lexicon client, that will execute all the logic."""
 
@@ -35,25 +64,8 @@ class Client(object):  # pylint: disable=useless-object-inheritance,too-few-publ
         # Validate configuration
         self._validate_config()
 
-        runtime_config = {}
-
-        # Process domain, strip subdomain
-        domain_parts = tldextract.extract(
-            self.config.resolve('lexicon:domain'))
-        runtime_config['domain'] = '{0}.{1}'.format(
-            domain_parts.domain, domain_parts.suffix)
-
-        if self.config.resolve('lexicon:delegated'):
-            # handle delegated domain
-            delegated = self.config.resolve('lexicon:delegated').rstrip('.')
-            if delegated != runtime_config.get('domain'):
-                # convert to relative name
-                if delegated.endswith(runtime_config.get('domain')):
-                    delegated = delegated[:-len(runtime_config.get('domain'))]
-                    delegated = delegated.rstrip('.')
-                # update domain
-                runtime_config['domain'] = '{0}.{1}'.format(
-                    delegated, runtime_config.get('domain'))
+        runtime_config = {'domain': resolve_domain(self.config.resolve('lexicon:domain'),
+                                                   self.config.resolve('lexicon:delegated'))}
 
         self.action = self.config.resolve('lexicon:action')
         self.provider_name = (self.config.resolve('lexicon:provider_name')
@@ -69,40 +81,75 @@ class Client(object):  # pylint: disable=useless-object-inheritance,too-few-publ
     def execute(self):
         """Execute provided configuration in class constructor to the DNS records"""
         self.provider.authenticate()
+        return self.execute_action(self.action)
+
+    def execute_action(self, action):
+        """
+        Execute the given action on the DNS records, using the record parameters currently
+        resolved by the configuration. Provider must have been authenticated beforehand.
+        """
         identifier = self.config.resolve('lexicon:identifier')
         record_type = self.config.resolve('lexicon:type')
         name = self.config.resolve('lexicon:name')
         content = self.config.resolve('lexicon:content')
 
-        if self.action == 'create':
-            return self.provider.create_record(record_type, name, content)
+        if action == 'create':
+            result = self.provider.create_record(record_type, name, content)
+            self._wait_for_propagation(record_type, name, content)
+            return result
 
-        if self.action == 'list':
+        if action == 'list':
             return self.provider.list_records(record_type, name, content)
 
-        if self.action == 'update':
-            return self.provider.update_record(identifier, record_type, name, content)
+        if action == 'update':
+            result = self.provider.update_record(identifier, record_type, name, content)
+            self._wait_for_propagation(record_type, name, content)
+            return result
 
-        if self.action == 'delete':
+        if action == 'delete':
             return self.provider.delete_record(identifier, record_type, name, content)
 
-        raise ValueError('Invalid action statement: {0}'.format(self.action))
+        raise ValueError('Invalid action statement: {0}'.format(action))
+
+    def apply_changes(self, changes):
+        """
+        Apply several changes to the DNS records (see Provider.apply_changes), and return one
+        result per change. Created and updated records must then be propagated if asked, a
+        change is reported as failed otherwise. Provider must have been authenticated beforehand.
+        """
+        results = self.provider.apply_changes(changes)
+        for change, result in zip(changes, results):
+            if not result['success'] or change.get('action') not in ('create', 'update'):
+                continue
+            try:
+                self._wait_for_propagation(change.get('type'), change.get('name'),
+                                           change.get('content'))
+            except PropagationTimeoutError as error:
+                result.pop('output', None)
+                result.update({'success': False,
+                               'error': '{0}: {1}'.format(type(error).__name__, error)})
+        return results
+
+    def _wait_for_propagation(self, record_type, name, content):
+        # Propagation is checked only if asked, and if the record is fully known.
+        if (self.config.resolve('lexicon:propagation_timeout') and name and content
+                and not self.provider.wait_for_propagation(record_type, name, content)):
+            raise PropagationTimeoutError(
+                'Record {0} {1} is not propagated after {2} seconds.'.format(
+                    record_type, name, self.config.resolve('lexicon:propagation_timeout')))
 
     def _validate_config(self):
         provider_name = self.config.resolve('lexicon:provider_name')
         if not self.config.resolve('lexicon:provider_name'):
             raise AttributeError('provider_name')
 
-        try:
-            available = discovery.find_providers()[self.config.resolve('lexicon:provider_name')]
-        except KeyError:
+        if provider_name not in discovery.list_providers():
             raise ProviderNotAvailableError('This provider ({0}) is not supported by Lexicon.'
                                             .format(provider_name))
-        else:
-            if not available:
-                raise ProviderNotAvailableError(
-                    'This provider ({0}) has required dependencies that are missing. '
-                    'Please install lexicon[{0}] first.'.format(provider_name))
+        if not discovery.is_provider_available(provider_name):
+            raise ProviderNotAvailableError(
+                'This provider ({0}) has required dependencies that are missing. '
+                'Please install lexicon[{0}] first.'.format(provider_name))
 
         if not self.config.resolve('lexicon:action'):
             raise AttributeError('action')
@@ -12,6 +12,8 @@ import yaml
 
 LOGGER = logging.getLogger(__name__)
 
+_LEGACY_AUTH_PATTERN = re.compile(r'(.*)_AUTH_(.*)')
+
 
 class ConfigResolver(object):  # pylint: disable=useless-object-inheritance
     """
@@ -42,11 +44,16 @@ class ConfigResolver(object):  # pylint: disable=useless-object-inheritance
 
     Each parameter will be resolved against each source, and value from the higher priority source
     is returned. If a parameter could not be resolve by any source, then None will be returned.
+
+    Values given by cacheable sources (see ConfigSource.cacheable) are memoized per parameter
+    key, so only the other sources are queried again when the same parameter is resolved later.
+    Memoized values are dropped each time a source is added.
     """
 
     def __init__(self):
         super(ConfigResolver, self).__init__()
         self._config_sources = []
+        self._plans = {}
 
     def resolve(self, config_key):
         """
@@ -61,13 +68,34 @@ class ConfigResolver(object):  # pylint: disable=useless-object-inheritance
         is returned. None will be returned if the given config parameter key could not be resolved
         from any source.
         """
-        for config_source in self._config_sources:
-            value = config_source.resolve(config_key)
+        plan = self._plans.get(config_key)
+        if plan is None:
+            plan = self._compile(config_key)
+
+        for cached, item in plan:
+            value = item if cached else item.resolve(config_key)
             if value:
                 return value
 
         return None
 
+    def _compile(self, config_key):
+        # The plan of a key is the list of the steps to resolve it, in the priority order: the
+        # sources that must be queried each time, then the first value given by a cacheable
+        # source, if any, as sources of lower priority would never be reached.
+        plan = []
+        for config_source in self._config_sources:
+            if not getattr(config_source, 'cacheable', False):
+                plan.append((False, config_source))
+                continue
+            value = config_source.resolve(config_key)
+            if value:
+                plan.append((True, value))
+                break
+
+        self._plans[config_key] = plan
+        return plan
+
     def add_config_source(self, config_source, position=None):
         """
         Add a config source to the current ConfigResolver instance.
@@ -75,6 +103,7 @@ class ConfigResolver(object):  # pylint: disable=useless-object-inheritance
         """
         rank = position if position is not None else len(self._config_sources)
         self._config_sources.insert(rank, config_source)
+        self._plans = {}
 
     def with_config_source(self, config_source):
         """
@@ -199,7 +228,11 @@ class ConfigSource(object):  # pylint: disable=useless-object-inheritance,too-fe
     """
     Base class to implement a configuration source for a ConfigResolver.
     The relevant method to override is resolve(self, config_parameter).
+
+    A source whose values never change once it is built should set cacheable to True: the values
+    it gives are then memoized by the ConfigResolver. Otherwise the source is queried each time.
     """
+    cacheable = False
 
     def resolve(self, config_key):
         """
@@ -216,29 +249,26 @@ class ConfigSource(object):  # pylint: disable=useless-object-inheritance,too-fe
 
 class EnvironmentConfigSource(ConfigSource):  # pylint: disable=too-few-public-methods
     """ConfigSource that resolve configuration against existing environment variables."""
+    cacheable = True
 
     def __init__(self):
         super(EnvironmentConfigSource, self).__init__()
         self._parameters = {}
+        self._variables = {}
         for (key, value) in os.environ.items():
             if key.startswith('LEXICON_'):
                 self._parameters[key] = value
 
     def resolve(self, config_key):
-        # First try, with a direct conversion of the config_parameter:
-        #   * lexicon:provider:auth_my_config => LEXICON_PROVIDER_AUTH_MY_CONFIG
-        #   * lexicon:provider:my_other_config => LEXICON_PROVIDER_AUTH_MY_OTHER_CONFIG
-        #   * lexicon:my_global_config => LEXICON_MY_GLOBAL_CONFIG
-        environment_variable = re.sub(':', '_', config_key).upper()
+        variables = self._variables.get(config_key)
+        if variables is None:
+            variables = self._variables[config_key] = _environment_variables(config_key)
+        environment_variable, environment_variable_legacy = variables
+
         value = self._parameters.get(environment_variable, None)
         if value:
             return value
 
-        # Second try, with the legacy naming convention for specific provider config:
-        #   * lexicon:provider:auth_my_config => LEXICON_PROVIDER_MY_CONFIG
-        # Users get a warning about this deprecated usage.
-        environment_variable_legacy = re.sub(r'(.*)_AUTH_(.*)', r'\1_\2',
-                                             environment_variable).upper()
         value = self._parameters.get(environment_variable_legacy, None)
         if value:
             LOGGER.warning(('Warning: Use of environment variable %s is deprecated. '
@@ -250,8 +280,24 @@ class EnvironmentConfigSource(ConfigSource):  # pylint: disable=too-few-public-m
         return None
 
 
+def _environment_variables(config_key):
+    # First try, with a direct conversion of the config_parameter:
+    #   * lexicon:provider:auth_my_config => LEXICON_PROVIDER_AUTH_MY_CONFIG
+    #   * lexicon:provider:my_other_config => LEXICON_PROVIDER_AUTH_MY_OTHER_CONFIG
+    #   * lexicon:my_global_config => LEXICON_MY_GLOBAL_CONFIG
+    environment_variable = config_key.replace(':', '_').upper()
+
+    # Second try, with the legacy naming convention for specific provider config:
+    #   * lexicon:provider:auth_my_config => LEXICON_PROVIDER_MY_CONFIG
+    # Users get a warning about this deprecated usage.
+    environment_variable_legacy = _LEGACY_AUTH_PATTERN.sub(r'\1_\2', environment_variable)
+
+    return environment_variable, environment_variable_legacy
+
+
 class ArgsConfigSource(ConfigSource):  # pylint: disable=too-few-public-methods
     """ConfigSource that resolve configuration against an argparse namespace."""
+    cacheable = True
 
     def __init__(self, namespace):
         super(ArgsConfigSource, self).__init__()
@@ -261,20 +307,19 @@ class ArgsConfigSource(ConfigSource):  # pylint: disable=too-few-public-methods
         # We assume here that the namespace provided has already done its job,
         # by validating that all given parameters are relevant for Lexicon or the current provider.
         # So we ignore the namespaces 'lexicon:' and 'lexicon:provider' in given config key.
-        splitted_config_key = config_key.split(':')
-
-        return self._parameters.get(splitted_config_key[-1], None)
+        return self._parameters.get(_split_key(config_key)[-1], None)
 
 
 class DictConfigSource(ConfigSource):  # pylint: disable=too-few-public-methods
     """ConfigSource that resolve configuration against a dict object."""
+    cacheable = True
 
     def __init__(self, dict_object):
         super(DictConfigSource, self).__init__()
         self._parameters = dict_object
 
     def resolve(self, config_key):
-        splitted_config_key = config_key.split(':')
+        splitted_config_key = _split_key(config_key)
         # Note that we ignore 'lexicon:' in the iteration,
         # as the dict object is already scoped to lexicon.
         cursor = self._parameters
@@ -330,6 +375,16 @@ class LegacyDictConfigSource(DictConfigSource):  # pylint: disable=too-few-publi
         super(LegacyDictConfigSource, self).__init__(refactor_dict_object)
 
 
+_SPLITTED_KEYS = {}
+
+
+def _split_key(config_key):
+    splitted_config_key = _SPLITTED_KEYS.get(config_key)
+    if splitted_config_key is None:
+        splitted_config_key = _SPLITTED_KEYS[config_key] = tuple(config_key.split(':'))
+    return splitted_config_key
+
+
 def non_interactive_config_resolver():
     """
     Create a typical config resolver in a non-interactive context (eg. lexicon used as a library).
@@ -1,4 +1,7 @@
 """General pytest configuration for lexicon tests."""
+import os
+import tempfile
+
 import pytest
 
 from lexicon import discovery
@@ -10,6 +13,13 @@ def pytest_addoption(parser):
                      help='Skip tests on providers with optional dependencies')
 
 
+def pytest_configure(config):  # pylint: disable=unused-argument
+    """Standard pytest hook invoked after command line options have been parsed"""
+    # Isolate the on-disk cache of Lexicon from the user one during tests.
+    if not os.environ.get('LEXICON_CACHE_DIR'):
+        os.environ['LEXICON_CACHE_DIR'] = tempfile.mkdtemp(prefix='lexicon-cache-')
+
+
 def pytest_runtest_setup(item):
     """Standard pytest hook invoked before each test execution"""
     try:
@@ -2,19 +2,47 @@
 This module takes care of finding information about the runtime of Lexicon:
 * what are the providers installed, and available
 * what is the version of Lexicon
+* what are the arguments and nameservers of each provider, through the providers manifest
+
+The providers manifest describes every provider without requiring to import it. It is
+generated by importing all providers once, then cached on disk (see lexicon.cache) until
+the providers package is modified, or packages are installed or removed (a provider lacking
+an optional dependency is missing from the manifest until this dependency is installed).
 """
+import argparse
+import hashlib
+import importlib
+import logging
+import os
 import pkgutil
+import re
+import sys
+
+from lexicon import cache, providers
+
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'providers_manifest.json'
+AVAILABILITY_FILE = 'providers_availability.json'
+
+_MANIFEST = {}
 
-import pkg_resources
+_ARGUMENT_TYPES = {'int': int, 'float': float, 'str': str}
 
-from lexicon import providers
+
+def list_providers():
+    """List all providers registered in Lexicon, without importing them"""
+    return sorted({modname for (_, modname, _)
+                   in pkgutil.iter_modules(providers.__path__)
+                   if modname != 'base'})
 
 
 def find_providers():
     """Find all providers registered in Lexicon, and their availability"""
-    providers_list = sorted({modname for (_, modname, _)
-                             in pkgutil.iter_modules(providers.__path__)
-                             if modname != 'base'})
+    import pkg_resources
+
+    providers_list = list_providers()
 
     try:
         distribution = pkg_resources.get_distribution('dns-lexicon')
@@ -25,15 +53,168 @@ def find_providers():
                 for provider in providers_list}
 
 
+def is_provider_available(provider):
+    """
+    Check if the given provider has all its optional requirements installed. A successful check
+    is cached on disk, so the costly requirements resolution is done only once for a provider.
+    """
+    fingerprint = _providers_fingerprint()
+    availability = cache.load(AVAILABILITY_FILE) or {}
+    if availability.get('fingerprint') != fingerprint:
+        availability = {'fingerprint': fingerprint, 'providers': []}
+
+    if provider in availability['providers']:
+        return True
+
+    import pkg_resources
+
+    try:
+        distribution = pkg_resources.get_distribution('dns-lexicon')
+    except pkg_resources.DistributionNotFound:
+        available = True
+    else:
+        available = _resolve_requirements(provider, distribution)
+
+    if available:
+        availability['providers'].append(provider)
+        cache.save(AVAILABILITY_FILE, availability)
+
+    return available
+
+
 def lexicon_version():
     """Retrieve current Lexicon version"""
+    import pkg_resources
+
     try:
         return pkg_resources.get_distribution('dns-lexicon').version
     except pkg_resources.DistributionNotFound:
         return 'unknown'
 
 
+def get_manifest():
+    """
+    Return the providers manifest, loaded from the on-disk cache if it is up-to-date,
+    otherwise generated and then stored in the cache. The manifest is a dict, mapping
+    each provider name (except 'auto') to a dict with the following keys:
+        * arguments: list of the specifications of the provider command line arguments
+        * nameserver_domains: list of the nameserver domains of the provider, compiled
+          regexps being represented by a dict {'regex': pattern}
+    """
+    fingerprint = _providers_fingerprint()
+    if _MANIFEST.get('fingerprint') != fingerprint:
+        manifest = cache.load(MANIFEST_FILE)
+        if not manifest or manifest.get('fingerprint') != fingerprint:
+            manifest = {'fingerprint': fingerprint, 'providers': generate_manifest()}
+            cache.save(MANIFEST_FILE, manifest)
+        _MANIFEST.clear()
+        _MANIFEST.update(manifest)
+
+    return _MANIFEST['providers']
+
+
+def generate_manifest():
+    """Import every provider, and return the providers manifest describing them"""
+    manifest = {}
+    for provider in list_providers():
+        if provider == 'auto':
+            continue
+
+        try:
+            provider_module = importlib.import_module('lexicon.providers.' + provider)
+        except ImportError:
+            LOGGER.warning('Warning, the provider %s cannot be loaded due '
+                           'to missing optional dependencies.', provider)
+            continue
+
+        parser = argparse.ArgumentParser(add_help=False)
+        provider_module.provider_parser(parser)
+
+        manifest[provider] = {
+            'arguments': [_describe_argument(action)
+                          for action in parser._actions],  # pylint: disable=protected-access
+            'nameserver_domains': [{'regex': ns_domain.pattern}
+                                   if hasattr(ns_domain, 'pattern') else ns_domain
+                                   for ns_domain in provider_module.NAMESERVER_DOMAINS],
+        }
+
+    return manifest
+
+
+def add_manifest_arguments(parser, arguments, option_prefix='', dest_prefix=''):
+    """
+    Add to the given parser the arguments described in a provider manifest.
+    Options and destinations can be prefixed, eg. to scope them to a provider.
+    """
+    for argument in arguments:
+        kwargs = {key: argument[key] for key in ('dest', 'help', 'default')}
+        kwargs['dest'] = dest_prefix + kwargs['dest']
+        if argument['action'] in ('store_true', 'store_false'):
+            kwargs['action'] = argument['action']
+        else:
+            kwargs.update({key: argument[key] for key in ('required', 'metavar', 'choices', 'nargs')
+                           if argument[key] is not None})
+            if argument['type']:
+                kwargs['type'] = _ARGUMENT_TYPES[argument['type']]
+
+        parser.add_argument(*[re.sub(r'^--(.*)$', r'--{0}\1'.format(option_prefix), option)
+                              for option in argument['option_strings']], **kwargs)
+
+
+def nameserver_domains_matcher(ns_domains):
+    """Rebuild the nameserver domains from the manifest, compiling the regexps"""
+    return [re.compile(ns_domain['regex']) if isinstance(ns_domain, dict) else ns_domain
+            for ns_domain in ns_domains]
+
+
+def _describe_argument(action):
+    if isinstance(action, argparse._StoreTrueAction):  # pylint: disable=protected-access
+        kind = 'store_true'
+    elif isinstance(action, argparse._StoreFalseAction):  # pylint: disable=protected-access
+        kind = 'store_false'
+    else:
+        kind = 'store'
+
+    return {
+        'option_strings': action.option_strings,
+        'dest': action.dest,
+        'action': kind,
+        'help': action.help,
+        'default': action.default,
+        'required': action.required or None,
+        'metavar': action.metavar,
+        'choices': list(action.choices) if action.choices else None,
+        'nargs': action.nargs,
+        'type': action.type.__name__ if action.type in _ARGUMENT_TYPES.values() else None,
+    }
+
+
+def _providers_fingerprint():
+    """
+    Fingerprint of the providers package, that changes if any provider module is modified, and
+    of the import paths, that changes if a package is installed in or removed from one of them
+    """
+    digest = hashlib.sha1()
+    for path in providers.__path__:
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith('.py'):
+                stat = os.stat(os.path.join(path, filename))
+                digest.update('{0}:{1}:{2};'.format(
+                    filename, stat.st_mtime, stat.st_size).encode('utf-8'))
+    # The current directory is skipped, as it changes for reasons unrelated to packages.
+    for path in sys.path:
+        if path:
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            digest.update('{0}:{1};'.format(path, mtime).encode('utf-8'))
+    return digest.hexdigest()
+
+
 def _resolve_requirements(provider, distribution):
+    import pkg_resources
+
     try:
         requirements = distribution.requires([provider])
     except pkg_resources.UnknownExtra:
@@ -0,0 +1,49 @@
+"""
+Pagination engine, for providers whose API returns records page by page.
+
+Each function of this module is a generator yielding the payload of each page, fetching a page
+only when the previous ones have been consumed. Two styles of pagination are supported:
+    * cursor: each page gives the cursor (a token, or the URL) of the next one,
+    * page number: pages are numbered, and the first page gives the number of pages.
+With numbered pages, once the number of pages is known, the next pages can be prefetched
+concurrently, a window of pages at a time.
+"""
+from __future__ import absolute_import
+
+
+def iter_cursor_pages(fetch, next_cursor):
+    """
+    Generate the payloads of pages chained by a cursor.
+
+    :param fetch: callable fetching the page of a given cursor, None being the first page
+    :param next_cursor: callable returning from a page payload the cursor of the next page,
+    or None if this is the last page
+    """
+    cursor = None
+    while True:
+        payload = fetch(cursor)
+        yield payload
+        cursor = next_cursor(payload)
+        if cursor is None:
+            return
+
+
+def iter_numbered_pages(fetch, page_count, first_page=1, map_pages=None, window=1):
+    """
+    Generate the payloads of numbered pages.
+
+    :param fetch: callable fetching the page of a given number
+    :param page_count: callable returning from the first page payload the number of pages
+    :param first_page: number of the first page
+    :param map_pages: callable with the signature of the map builtin, used to fetch pages
+    (eg. Provider._parallel_map to fetch them concurrently)
+    :param window: maximum number of pages fetched at once with map_pages
+    """
+    payload = fetch(first_page)
+    yield payload
+
+    pages = list(range(first_page + 1, first_page + (page_count(payload) or 1)))
+    map_pages = map_pages or map
+    for start in range(0, len(pages), max(window, 1)):
+        for payload in map_pages(fetch, pages[start:start + max(window, 1)]):
+            yield payload
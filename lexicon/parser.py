@@ -6,6 +6,51 @@ import os
 from lexicon import discovery
 
 
+class ProviderParser(argparse.ArgumentParser):
+    """
+    Parser of a provider command. To keep the command line interface fast, the provider module
+    is imported to add its specific arguments only when this parser is effectively used.
+    """
+    def __init__(self, provider=None, **kwargs):
+        super(ProviderParser, self).__init__(**kwargs)
+        self.provider = provider
+        self._provider_loaded = not provider
+
+    def load_provider(self):
+        """Add the arguments specific to the provider of this parser, if not done already"""
+        if self._provider_loaded:
+            return
+        self._provider_loaded = True
+
+        provider_module = importlib.import_module('lexicon.providers.' + self.provider)
+        provider_module.provider_parser(self)
+
+        if not discovery.is_provider_available(self.provider):
+            self.epilog = ('WARNING: some required dependencies for this provider are not '
+                           'installed. Please install lexicon[{0}] first before using it.'
+                           .format(self.provider))
+
+    def parse_known_args(self, args=None, namespace=None):
+        self.load_provider()
+        return super(ProviderParser, self).parse_known_args(args, namespace)
+
+    def format_help(self):
+        self.load_provider()
+        return super(ProviderParser, self).format_help()
+
+
+class VersionAction(argparse.Action):  # pylint: disable=too-few-public-methods
+    """Print the version of Lexicon, that is resolved only when this action is invoked"""
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS,
+                 help=None):  # pylint: disable=redefined-builtin
+        super(VersionAction, self).__init__(option_strings=option_strings, dest=dest,
+                                            default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print('{0} {1}'.format(parser.prog, discovery.lexicon_version()))
+        parser.exit()
+
+
 def generate_base_provider_parser():
     """Function that generates the base provider to be used by all dns providers."""
     parser = argparse.ArgumentParser(add_help=False)
@@ -23,6 +68,10 @@ def generate_base_provider_parser():
     parser.add_argument('--priority', help='specify the record priority')
     parser.add_argument(
         '--identifier', help='specify the record for update or delete actions')
+    parser.add_argument('--propagation-timeout', type=int,
+                        help='after create or update actions, wait until every authoritative '
+                             'nameserver of the zone serves the record, for at most the given '
+                             'number of seconds (requires dnspython)')
     parser.add_argument('--log_level', help='specify the log level', default='ERROR',
                         choices=['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET'])
     parser.add_argument('--output',
@@ -33,35 +82,94 @@ def generate_base_provider_parser():
     return parser
 
 
+def generate_batch_parser(subparsers):
+    """Function that generates the parser of the batch command, executing a stream of operations"""
+    parser = subparsers.add_parser(
+        'batch', help='execute a stream of operations given in JSON Lines format',
+        description='Execute a stream of operations, one JSON object per line, '
+                    'and print one JSON result per operation.')
+    parser.add_argument('--file', default='-',
+                        help='specify the file containing the operations '
+                             '(default: -, the standard input)')
+    parser.add_argument('--log_level', help='specify the log level', default='ERROR',
+                        choices=['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET'])
+    parser.add_argument('--workers', type=int, default=1,
+                        help='specify the number of zones processed in parallel (default: 1)')
+    parser.add_argument('--concurrency', type=_provider_mapping(int), default={},
+                        metavar='[PROVIDER]:[ZONES], ...',
+                        help='comma separated list of elements in the form of '
+                             '[PROVIDER]:[ZONES] to limit the number of zones processed '
+                             'in parallel for a particular provider')
+    parser.add_argument('--rate-limit', type=_provider_mapping(float), default={},
+                        metavar='[PROVIDER]:[RATE], ...',
+                        help='comma separated list of elements in the form of '
+                             '[PROVIDER]:[RATE] to limit the number of operations per second '
+                             'for a particular provider')
+    return parser
+
+
+def generate_serve_parser(subparsers):
+    """Function that generates the parser of the serve command, running a Lexicon server"""
+    parser = subparsers.add_parser(
+        'serve', help='run a Lexicon server executing operations received over a local HTTP API',
+        description='Run a Lexicon server, that keeps providers authenticated between '
+                    'operations. The Lexicon CLI sends its operations to this server when '
+                    'it is listening on the default address, or on the address given by '
+                    '--server (or the LEXICON_SERVER environment variable). Listening on a '
+                    'TCP address requires a token in the LEXICON_SERVER_TOKEN environment '
+                    'variable.')
+    parser.add_argument('--address',
+                        help='specify the path of the Unix socket, or the host:port to listen '
+                             'on (default: server.sock in the Lexicon cache directory)')
+    parser.add_argument('--log_level', help='specify the log level', default='INFO',
+                        choices=['CRITICAL', 'ERROR', 'WARNING', 'INFO', 'DEBUG', 'NOTSET'])
+    return parser
+
+
+def _provider_mapping(value_type):
+    """Argparse type converting a '[PROVIDER]:[VALUE], ...' string into a dict"""
+    def _convert(string):
+        mapping = {}
+        for element in string.split(','):
+            try:
+                provider, value = element.split(':')
+                mapping[provider.strip()] = value_type(value)
+            except ValueError:
+                raise argparse.ArgumentTypeError(
+                    'invalid element {0}, expected [PROVIDER]:[VALUE]'.format(element))
+        return mapping
+    return _convert
+
+
 def generate_cli_main_parser():
     """Using all providers available, generate a parser that will be used by Lexicon CLI"""
     parser = argparse.ArgumentParser(
         description='Create, Update, Delete, List DNS entries')
 
     parser.add_argument('--version', help='show the current version of lexicon',
-                        action='version', version='%(prog)s {0}'
-                        .format(discovery.lexicon_version()))
+                        action=VersionAction)
     parser.add_argument('--delegated', help='specify the delegated domain')
     parser.add_argument('--config-dir', default=os.getcwd(),
                         help='specify the directory where to search lexicon.yml and '
                              'lexicon_[provider].yml configuration files '
                              '(default: current directory).')
+    parser.add_argument('--server', dest='server_address',
+                        default=os.environ.get('LEXICON_SERVER'),
+                        help='specify the address of the Lexicon server to send the operation '
+                             'to (default: the server listening on the default address, if any)')
     subparsers = parser.add_subparsers(
-        dest='provider_name', help='specify the DNS provider to use')
+        dest='provider_name', help='specify the DNS provider to use',
+        parser_class=ProviderParser)
     subparsers.required = True
 
-    for provider, available in discovery.find_providers().items():
-        provider_module = importlib.import_module(
-            'lexicon.providers.' + provider)
-        provider_parser = getattr(provider_module, 'provider_parser')
-
-        subparser = subparsers.add_parser(provider, help='{0} provider'.format(provider),
-                                          parents=[generate_base_provider_parser()])
-        provider_parser(subparser)
+    base_provider_parser = generate_base_provider_parser()
+    for provider in discovery.list_providers():
+        subparsers.add_parser(provider, help='{0} provider'.format(provider),
+                              parents=[base_provider_parser], provider=provider)
 
-        if not available:
-            subparser.epilog = ('WARNING: some required dependencies for this provider are not '
-                                'installed. Please install lexicon[{0}] first before using it.'
-                                .format(provider))
+    # The batch and serve commands are exposed alongside the providers: they are then
+    # available with provider_name == 'batch' or 'serve' in the parsed arguments.
+    generate_batch_parser(subparsers)
+    generate_serve_parser(subparsers)
 
     return parser
@@ -0,0 +1,165 @@
+"""
+This module holds the HTTP connection pools shared by all Lexicon providers.
+
+Each Provider owns its own requests.Session (so cookies and default headers never leak
+from one provider to another), but every session is mounted on a transport adapter
+that is shared process-wide for a given pool configuration. As a consequence, TCP/TLS
+connections opened by one Provider instance are kept alive and reused by any other
+Provider instance that targets the same host in the same process.
+"""
+from __future__ import absolute_import
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from lexicon import ratelimit
+
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_RETRIES = 0
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_FORCELIST = (500, 502, 503, 504)
+
+_ADAPTERS = {}
+_ADAPTERS_LOCK = threading.Lock()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout to every request sent through it,
+    unless the caller explicitly provides one.
+    """
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+        super(PooledHTTPAdapter, self).__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super(PooledHTTPAdapter, self).send(request, **kwargs)
+
+
+class RateLimitedSession(requests.Session):
+    """
+    requests.Session sending every request through the given ratelimit.RateLimiter: each
+    request waits for the quotas of the API, and a request rejected with a 429 status is sent
+    again, up to `retries` times, once the delay asked by the API has elapsed.
+    """
+    def __init__(self, rate_limiter, retries=ratelimit.DEFAULT_RETRIES):
+        super(RateLimitedSession, self).__init__()
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            response = super(RateLimitedSession, self).send(request, **kwargs)
+            delay = self.rate_limiter.observe(response, attempt)
+            if delay is None or attempt >= self.retries:
+                return response
+            LOGGER.warning('Request to %s rejected by rate limiting, retrying in %.1f seconds.',
+                           request.url, delay)
+            response.close()
+            attempt += 1
+
+
+# pylint: disable=too-many-arguments
+def get_adapter(pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                timeout=None, max_retries=DEFAULT_MAX_RETRIES,
+                backoff_factor=DEFAULT_BACKOFF_FACTOR, status_forcelist=RETRY_STATUS_FORCELIST,
+                allowed_methods=None):
+    """
+    Return the process-wide adapter for the given pool configuration, creating it if needed.
+    Retries are applied on connection errors and on transient 5xx responses (or the given
+    status_forcelist) for idempotent methods (or the given allowed_methods). When retries are
+    exhausted, the last response is returned to the caller.
+    """
+    status_forcelist = tuple(sorted(status_forcelist))
+    allowed_methods = tuple(sorted(allowed_methods)) if allowed_methods else None
+    key = (pool_connections, pool_maxsize, timeout, max_retries, backoff_factor,
+           status_forcelist, allowed_methods)
+    with _ADAPTERS_LOCK:
+        adapter = _ADAPTERS.get(key)
+        if not adapter:
+            LOGGER.debug('Creating HTTP pool: connections=%s, maxsize=%s, timeout=%s, '
+                         'retries=%s', pool_connections, pool_maxsize, timeout, max_retries)
+            retry = _retry(max_retries, backoff_factor, status_forcelist, allowed_methods)
+            adapter = PooledHTTPAdapter(timeout=timeout, pool_connections=pool_connections,
+                                        pool_maxsize=pool_maxsize, max_retries=retry)
+            _ADAPTERS[key] = adapter
+
+    return adapter
+# pylint: enable=too-many-arguments
+
+
+def _retry(max_retries, backoff_factor, status_forcelist, allowed_methods):
+    kwargs = {'total': max_retries, 'backoff_factor': backoff_factor,
+              'status_forcelist': status_forcelist, 'raise_on_status': False}
+    if not allowed_methods:
+        return Retry(**kwargs)
+    try:
+        return Retry(allowed_methods=frozenset(allowed_methods), **kwargs)
+    except TypeError:
+        # urllib3 < 1.26 names this parameter method_whitelist
+        kwargs['method_whitelist'] = frozenset(allowed_methods)
+        return Retry(**kwargs)
+
+
+def build_session(config, **overrides):
+    """
+    Build a new requests.Session mounted on the shared adapter matching the pool options
+    found in the given ConfigResolver:
+        * lexicon:http_pool_connections: number of distinct hosts kept in the pool
+        * lexicon:http_pool_maxsize: number of connections kept alive per host
+        * lexicon:http_timeout: default timeout in seconds for each request
+        * lexicon:http_max_retries: retries on connection errors and transient 5xx
+        * lexicon:http_backoff_factor: backoff factor between two retries
+    Any of these options can be forced by the caller with the matching keyword argument
+    (eg. max_retries=10), taking precedence over the configuration. The statuses and the
+    methods that are retried can also be given with the status_forcelist and allowed_methods
+    keyword arguments, for APIs answering with other transient statuses (eg. 409).
+    If a ratelimit.RateLimiter is given with the rate_limiter keyword argument, the session is
+    a RateLimitedSession using it, retrying up to lexicon:rate_limit_retries times the requests
+    rejected with a 429 status.
+    """
+    def _option(name, default, cast):
+        value = overrides.get(name)
+        if value is None:
+            value = config.resolve('lexicon:http_{0}'.format(name))
+        return cast(value) if value is not None else default
+
+    adapter = get_adapter(
+        pool_connections=_option('pool_connections', DEFAULT_POOL_CONNECTIONS, int),
+        pool_maxsize=_option('pool_maxsize', DEFAULT_POOL_MAXSIZE, int),
+        timeout=_option('timeout', None, float),
+        max_retries=_option('max_retries', DEFAULT_MAX_RETRIES, int),
+        backoff_factor=_option('backoff_factor', DEFAULT_BACKOFF_FACTOR, float),
+        status_forcelist=overrides.get('status_forcelist') or RETRY_STATUS_FORCELIST,
+        allowed_methods=overrides.get('allowed_methods'))
+
+    rate_limiter = overrides.get('rate_limiter')
+    if rate_limiter:
+        retries = config.resolve('lexicon:rate_limit_retries')
+        session = RateLimitedSession(rate_limiter, int(retries) if retries is not None
+                                     else ratelimit.DEFAULT_RETRIES)
+    else:
+        session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    return session
+
+
+def clear():
+    """Close and forget every shared adapter, releasing all pooled connections."""
+    with _ADAPTERS_LOCK:
+        for adapter in _ADAPTERS.values():
+            adapter.close()
+        _ADAPTERS.clear()
@@ -0,0 +1,153 @@
+"""
+Check the propagation of DNS records on the authoritative nameservers of their zone.
+
+Instead of waiting a fixed delay after a record is created or updated, a PropagationChecker
+queries in parallel every authoritative nameserver of the zone, and returns as soon as all of
+them serve the expected record. Between two rounds of queries, the delay grows exponentially
+up to a maximum, until a global timeout is reached. This module requires dnspython.
+"""
+from __future__ import absolute_import
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import socket
+import time
+from timeit import default_timer
+
+# Due to optional requirement
+try:
+    import dns.exception
+    import dns.flags
+    import dns.message
+    import dns.query
+    import dns.rdatatype
+    import dns.resolver
+    HAS_DNSPYTHON = True
+except ImportError:
+    HAS_DNSPYTHON = False
+
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 300
+DEFAULT_INITIAL_DELAY = 1
+DEFAULT_MAX_DELAY = 30
+DEFAULT_QUERY_TIMEOUT = 2
+
+
+class PropagationChecker(object):  # pylint: disable=useless-object-inheritance
+    """
+    Wait for records to be served by a set of nameservers.
+
+    :param timeout: maximum time in seconds to wait for a record propagation
+    :param initial_delay: delay in seconds between the first two rounds of queries
+    :param max_delay: maximum delay in seconds between two rounds of queries
+    :param query_timeout: timeout in seconds of one DNS query
+    """
+    # Port of the nameservers, mostly overridden to query a local DNS server in tests.
+    port = 53
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, initial_delay=DEFAULT_INITIAL_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, query_timeout=DEFAULT_QUERY_TIMEOUT):
+        if not HAS_DNSPYTHON:
+            raise ImportError('Checking the propagation of records requires dnspython, '
+                              'which is missing. Please install dnspython first.')
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.query_timeout = query_timeout
+
+    def find_nameservers(self, domain):
+        """
+        Return the IP addresses of the authoritative nameservers of the given zone,
+        resolved with the system resolver. The list is empty if none could be found.
+        """
+        resolver = dns.resolver.Resolver()
+        resolver.lifetime = self.query_timeout
+        # dnspython >= 2.0 deprecates query() in favor of resolve()
+        resolve = getattr(resolver, 'resolve', None) or resolver.query
+
+        nameservers = []
+        try:
+            ns_names = [rdata.target.to_text() for rdata in resolve(domain, 'NS')]
+        except dns.exception.DNSException as error:
+            LOGGER.warning('Nameservers of %s could not be resolved: %s', domain, error)
+            return nameservers
+
+        for ns_name in ns_names:
+            for rdtype in ('A', 'AAAA'):
+                try:
+                    answer = resolve(ns_name, rdtype)
+                except dns.exception.DNSException:
+                    continue
+                nameservers.extend(rdata.to_text() for rdata in answer
+                                   if rdata.to_text() not in nameservers)
+
+        LOGGER.debug('Nameservers of %s: %s', domain, ' '.join(nameservers))
+        return nameservers
+
+    def is_served(self, nameserver, name, rtype, content):
+        """Check if the given nameserver currently serves the given record."""
+        rdtype = dns.rdatatype.from_text(rtype)
+        query = dns.message.make_query(_absolute(name), rdtype)
+        try:
+            response = dns.query.udp(query, nameserver, timeout=self.query_timeout,
+                                     port=self.port)
+            if response.flags & dns.flags.TC:
+                response = dns.query.tcp(query, nameserver, timeout=self.query_timeout,
+                                         port=self.port)
+        except (dns.exception.DNSException, socket.error) as error:
+            LOGGER.debug('Query of %s %s on %s failed: %s', rtype, name, nameserver, error)
+            return False
+
+        return any(_matches(rdata, content)
+                   for rrset in response.answer if rrset.rdtype == rdtype
+                   for rdata in rrset)
+
+    def wait(self, name, rtype, content, nameservers):
+        """
+        Wait until every given nameserver serves the given record. Return True once done,
+        or False if the timeout is reached before.
+        """
+        pending = list(nameservers)
+        if not pending:
+            LOGGER.warning('No nameserver to check the propagation of %s %s.', rtype, name)
+            return False
+
+        deadline = default_timer() + self.timeout
+        delay = self.initial_delay
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            while True:
+                served = list(executor.map(
+                    lambda nameserver: self.is_served(nameserver, name, rtype, content),
+                    pending))
+                pending = [nameserver for nameserver, is_served in zip(pending, served)
+                           if not is_served]
+                if not pending:
+                    LOGGER.info('Record %s %s is propagated.', rtype, name)
+                    return True
+
+                remaining = deadline - default_timer()
+                if remaining <= 0:
+                    LOGGER.warning('Record %s %s is still not propagated on %s.',
+                                   rtype, name, ', '.join(pending))
+                    return False
+
+                LOGGER.info('Record %s %s is not propagated on %s yet, next check in %ss.',
+                            rtype, name, ', '.join(pending), min(delay, remaining))
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, self.max_delay)
+
+
+def _absolute(name):
+    return name if name.endswith('.') else name + '.'
+
+
+def _matches(rdata, content):
+    """Check if the given record data matches the given content, as given to Lexicon."""
+    candidates = {rdata.to_text()}
+    if hasattr(rdata, 'strings'):
+        # TXT records: content is not quoted, and may have been split in several strings.
+        candidates.add(''.join(string.decode('utf-8') if isinstance(string, bytes) else string
+                               for string in rdata.strings))
+    content = content.strip()
+    return content in candidates or _absolute(content) in candidates
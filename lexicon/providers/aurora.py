@@ -7,7 +7,6 @@ import hmac
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -145,13 +144,13 @@ class Provider(BaseProvider):
         authorization_header = self._generate_auth_header(
             action, url, timestamp)
 
-        request = requests.request(action, self.api_endpoint + url, params=query_params,
-                                   data=json.dumps(data),
-                                   headers={
-                                       'X-AuroraDNS-Date': timestamp,
-                                       'Authorization': authorization_header,
-                                       'Content-Type': 'application/json'
-                                   })
+        request = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                            data=json.dumps(data),
+                                            headers={
+                                                'X-AuroraDNS-Date': timestamp,
+                                                'Authorization': authorization_header,
+                                                'Content-Type': 'application/json'
+                                            })
 
         # If the response is a HTTP 409 statusCode, the record already exists: return true.
         if request.status_code == 409:
@@ -1,15 +1,13 @@
 """Module provider for auto"""
 from __future__ import absolute_import
-import argparse
 import importlib
 import logging
-import pkgutil
 import re
 import subprocess
 
 import six
 import tldextract
-from lexicon import providers
+from lexicon import discovery
 from lexicon.config import (
     ArgsConfigSource,
     ConfigResolver,
@@ -20,21 +18,8 @@ from lexicon.config import (
 LOGGER = logging.getLogger(__name__)
 
 
-def _get_available_providers():
-    available_providers = {}
-    for _, modname, _ in pkgutil.iter_modules(providers.__path__):
-        if modname not in ('base', 'auto'):
-            try:
-                available_providers[modname] = importlib.import_module(
-                    'lexicon.providers.' + modname)
-            except ImportError:
-                LOGGER.warning('Warning, the provider %s cannot be loaded due '
-                               'to missing optional dependencies.', modname)
-
-    return available_providers
-
-
-AVAILABLE_PROVIDERS = _get_available_providers()
+def _load_provider_module(provider_name):
+    return importlib.import_module('lexicon.providers.' + provider_name)
 
 
 def _get_ns_records_domains_for_domain(domain):
@@ -69,13 +54,16 @@ def _relevant_provider_for_domain(domain):
     nameserver_domains = _get_ns_records_domains_for_domain(domain)
     relevant_providers = []
 
-    for provider_name, provider_module in AVAILABLE_PROVIDERS.items():
-        ns_domains = provider_module.NAMESERVER_DOMAINS
+    # Nameservers domains are taken from the providers manifest,
+    # to avoid to import every provider module.
+    for provider_name, provider_manifest in sorted(discovery.get_manifest().items()):
+        ns_domains = discovery.nameserver_domains_matcher(
+            provider_manifest['nameserver_domains'])
 
         # Test plain domain string comparison
         if {ns_domain for ns_domain in ns_domains
                 if isinstance(ns_domain, six.string_types)} & nameserver_domains:
-            relevant_providers.append((provider_name, provider_module))
+            relevant_providers.append(provider_name)
             continue
 
         # Test domains regexp matching
@@ -83,7 +71,7 @@ def _relevant_provider_for_domain(domain):
             if hasattr(ns_domain, 'match') \
                     and [nameserver_domain for nameserver_domain
                          in nameserver_domains if ns_domain.match(nameserver_domain)]:
-                relevant_providers.append((provider_name, provider_module))
+                relevant_providers.append(provider_name)
                 continue
 
     if not relevant_providers:
@@ -96,7 +84,7 @@ def _relevant_provider_for_domain(domain):
                        'This may indicate a misconfiguration in one or more provider.',
                        domain, relevant_providers)
 
-    return relevant_providers[0]
+    return relevant_providers[0], _load_provider_module(relevant_providers[0])
 
 
 def provider_parser(subparser):
@@ -114,17 +102,12 @@ def provider_parser(subparser):
                                 "[DOMAIN]:[PROVIDER] to authoritatively map a "
                                 "particular domain to a particular provider")
 
-    # Explore and load the arguments available for every provider into the 'auto' provider.
-    for provider_name, provider_module in AVAILABLE_PROVIDERS.items():
-        parser = argparse.ArgumentParser(add_help=False)
-        provider_module.provider_parser(parser)
-
-        for action in parser._actions:  # pylint: disable=protected-access
-            action.option_strings = [re.sub(
-                r'^--(.*)$', r'--{0}-\1'.format(provider_name), option)
-                                     for option in action.option_strings]
-            action.dest = 'auto_{0}_{1}'.format(provider_name, action.dest)
-            subparser._add_action(action)  # pylint: disable=protected-access
+    # Load the arguments available for every provider into the 'auto' provider.
+    # They are taken from the providers manifest, to avoid to import every provider module.
+    for provider_name, provider_manifest in sorted(discovery.get_manifest().items()):
+        discovery.add_manifest_arguments(subparser, provider_manifest['arguments'],
+                                         option_prefix='{0}-'.format(provider_name),
+                                         dest_prefix='auto_{0}_'.format(provider_name))
 
 # Take care of the fact that this provider extends object, not BaseProvider !
 # Indeed we want to delegate every parameter/method call to the delegate provider
@@ -170,12 +153,10 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
 
         override_provider = mapping_override_processed.get(self.domain)
         if override_provider:
-            provider = [
-                element for element in AVAILABLE_PROVIDERS.items()
-                if element[0] == override_provider][0]
+            provider_name = override_provider
+            provider_module = _load_provider_module(provider_name)
             LOGGER.info('Provider authoritatively mapped for domain %s: %s.',
-                        self.domain, provider.__name__)
-            (provider_name, provider_module) = provider
+                        self.domain, provider_name)
         else:
             (provider_name, provider_module) = _relevant_provider_for_domain(self.domain)
             LOGGER.info('Provider discovered for domain %s: %s.',
@@ -1,10 +1,21 @@
 """Base provider module for all Lexicon providers"""
 from __future__ import absolute_import
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import time
 import warnings
 
+from lexicon import pagination, pool, propagation, ratelimit, snapshot, websession
 from lexicon.config import ConfigResolver, legacy_config_resolver
 
 
+LOGGER = logging.getLogger(__name__)
+
+
 class Provider(object):  # pylint: disable=useless-object-inheritance
     """
     This is the base class for all lexicon Providers.
@@ -34,6 +45,11 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
     :param config: is a ConfigResolver object that contains all the options
     for this provider, merged from CLI and Env variables.
     """
+    # Quotas documented by the provider API, as (requests, seconds) tuples
+    # (see lexicon.ratelimit.RateLimiter). They can be overridden with the
+    # rate_limit_quotas provider option.
+    rate_limits = ()
+
     def __init__(self, config):
         if not isinstance(config, ConfigResolver):
             # If config is a plain dict, we are in a legacy situation.
@@ -56,6 +72,19 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
             'lexicon:provider_name') or self.config.resolve('lexicon:provider')
         self.domain = self.config.resolve('lexicon:domain')
         self.domain_id = None
+        self._http_session = None
+
+    @property
+    def http_session(self):
+        """
+        The requests.Session used by this provider to talk to its API. Underlying connections
+        are kept alive and pooled process-wide, see lexicon.pool for the available options.
+        Requests are rate limited, see _rate_limiter.
+        """
+        if getattr(self, '_http_session', None) is None:
+            self._http_session = pool.build_session(self.config,
+                                                    rate_limiter=self._rate_limiter())
+        return self._http_session
 
     # Provider API
     def authenticate(self):
@@ -77,7 +106,10 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
                           DeprecationWarning)
             rtype = kwargs.get('type')
 
-        return self._create_record(rtype, name, content)
+        try:
+            return self._create_record(rtype, name, content)
+        finally:
+            self._invalidate_zone_snapshot()
 
     def list_records(self, rtype=None, name=None, content=None, **kwargs):
         """
@@ -93,6 +125,14 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
 
         return self._list_records(rtype=rtype, name=name, content=content)
 
+    def iter_records(self, rtype=None, name=None, content=None):
+        """
+        Generate the records, filtered like with list_records. Providers whose API paginates the
+        records fetch a page only once the records of the previous pages have been consumed, so
+        the whole zone is never held in memory.
+        """
+        return self._iter_records(rtype=rtype, name=name, content=content)
+
     def update_record(self, identifier, rtype=None, name=None, content=None, **kwargs):
         """
         Update a record. Identifier must be specified.
@@ -102,7 +142,10 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
                           DeprecationWarning)
             rtype = kwargs.get('type')
 
-        return self._update_record(identifier, rtype=rtype, name=name, content=content)
+        try:
+            return self._update_record(identifier, rtype=rtype, name=name, content=content)
+        finally:
+            self._invalidate_zone_snapshot()
 
     def delete_record(self, identifier=None, rtype=None, name=None, content=None, **kwargs):
         """
@@ -115,7 +158,36 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
                           DeprecationWarning)
             rtype = kwargs.get('type')
 
-        return self._delete_record(identifier=identifier, rtype=rtype, name=name, content=content)
+        try:
+            return self._delete_record(identifier=identifier, rtype=rtype,
+                                       name=name, content=content)
+        finally:
+            self._invalidate_zone_snapshot()
+
+    def apply_changes(self, changes):
+        """
+        Apply several changes to the zone, and return one result per change, in the same order.
+        A change is a dict with an 'action' key (create, update or delete) and the parameters of
+        the corresponding method as other keys (type, name, content, identifier). A result is a
+        dict with a 'success' key, and either the 'output' of the change or its 'error' message.
+        Providers able to send several changes in one API call apply them in as few calls as
+        possible, others apply them one by one.
+        """
+        try:
+            return self._apply_changes(changes)
+        finally:
+            self._invalidate_zone_snapshot()
+
+    def wait_for_propagation(self, rtype, name, content):
+        """
+        Wait until every authoritative nameserver of the zone serves the given record.
+        Return True once done, or False if not done after lexicon:propagation_timeout seconds.
+        Nameservers are queried in parallel, with an exponential delay between two rounds of
+        queries, up to lexicon:propagation_max_delay seconds. Requires dnspython.
+        """
+        checker = self._propagation_checker()
+        return checker.wait(self._fqdn_name(name), rtype, content,
+                            checker.find_nameservers(self.domain))
 
     # Internal abstract implementations
     def _authenticate(self):
@@ -130,9 +202,41 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
     def _update_record(self, identifier, rtype=None, name=None, content=None):
         raise NotImplementedError("Providers must implement this!")
 
+    def _iter_records(self, rtype=None, name=None, content=None):
+        # Providers paginating their records override this method, and usually implement
+        # _list_records as list(self._iter_records(rtype, name, content)).
+        return iter(self._list_records(rtype=rtype, name=name, content=content))
+
     def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
         raise NotImplementedError("Providers must implement this!")
 
+    def _apply_changes(self, changes):
+        results = []
+        for change in changes:
+            try:
+                results.append({'success': True, 'output': self._apply_change(change)})
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+            finally:
+                # Next changes of the batch must not read a snapshot missing this change.
+                self._invalidate_zone_snapshot()
+        return results
+
+    def _apply_change(self, change):
+        action = change.get('action')
+        if action == 'create':
+            return self._create_record(change.get('type'), change.get('name'),
+                                       change.get('content'))
+        if action == 'update':
+            return self._update_record(change.get('identifier'), change.get('type'),
+                                       change.get('name'), change.get('content'))
+        if action == 'delete':
+            return self._delete_record(change.get('identifier'), change.get('type'),
+                                       change.get('name'), change.get('content'))
+        raise ValueError('Invalid action statement: {0}'.format(action))
+
     # Helpers
     def _request(self, action='GET', url='/', data=None, query_params=None):
         raise NotImplementedError("Providers must implement this!")
@@ -150,6 +254,203 @@ class Provider(object):  # pylint: disable=useless-object-inheritance
     def _delete(self, url='/', query_params=None):
         return self._request('DELETE', url, query_params=query_params)
 
+    def _parallel_map(self, function, iterable):
+        """
+        Apply function to every item of iterable using a bounded pool of threads, typically to
+        issue independent API requests concurrently over the provider http_session. Results are
+        returned in the order of the items. The pool has as many threads as connections kept
+        alive per host in the HTTP pool (lexicon:http_pool_maxsize), so items are processed
+        sequentially if this pool holds only one connection.
+        """
+        items = list(iterable)
+        max_workers = self._parallel_workers()
+        if len(items) < 2 or max_workers < 2:
+            return [function(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+            return list(executor.map(function, items))
+
+    def _parallel_workers(self):
+        return int(self._get_lexicon_option('http_pool_maxsize') or pool.DEFAULT_POOL_MAXSIZE)
+
+    def _iter_numbered_pages(self, fetch, page_count, first_page=1):
+        """
+        Generate the payloads of numbered pages (see lexicon.pagination), the next pages being
+        prefetched concurrently by windows of as many pages as _parallel_map has threads.
+        """
+        return pagination.iter_numbered_pages(fetch, page_count, first_page,
+                                              map_pages=self._parallel_map,
+                                              window=self._parallel_workers())
+
+    def _propagation_checker(self):
+        return propagation.PropagationChecker(
+            timeout=float(self._get_lexicon_option('propagation_timeout')
+                          or propagation.DEFAULT_TIMEOUT),
+            max_delay=float(self._get_lexicon_option('propagation_max_delay')
+                            or propagation.DEFAULT_MAX_DELAY))
+
+    def _zone_snapshot(self, fetch, serial=None):
+        """
+        Return the content of the zone downloaded by fetch(), or a copy of a previous download if
+        the zone snapshot cache is enabled (lexicon:zone_cache set to 'memory' or 'disk'). The
+        content must be JSON serializable. A snapshot is reused as is for lexicon:zone_cache_ttl
+        seconds, then it is revalidated with serial, if given: a callable returning a token that
+        changes each time the zone is modified (eg. the SOA serial), cheaper to get than the zone
+        itself. Snapshots are invalidated by any create, update or delete operation of this
+        provider, but must not be used to build the whole content of a zone sent back to the API,
+        as changes made outside of Lexicon would be lost.
+        """
+        storage, ttl = self._zone_cache_settings()
+        if not storage:
+            return fetch()
+
+        key = self._zone_snapshot_key()
+        previous = snapshot.load(key, storage)
+        if previous and previous.is_fresh(ttl):
+            return previous.data
+
+        validator = serial() if serial else None
+        if previous and serial and validator == previous.validator:
+            LOGGER.debug('Zone snapshot of %s revalidated.', self.domain)
+            previous.timestamp = time.time()
+            snapshot.save(key, previous, storage)
+            return previous.data
+
+        current = fetch()
+        snapshot.save(key, snapshot.ZoneSnapshot(current, validator), storage)
+        return current
+
+    def _invalidate_zone_snapshot(self):
+        """Drop the snapshot of the zone, to be called once the zone has been modified."""
+        storage, _ = self._zone_cache_settings()
+        if storage:
+            snapshot.invalidate(self._zone_snapshot_key(), storage)
+
+    def _zone_snapshot_key(self):
+        """
+        Identify the zone in the zone snapshot cache, as seen by the account of this provider.
+        Providers that can reach several independent servers for the same domain should add the
+        server to this key.
+        """
+        return (self.provider_name, self.domain, self._auth_fingerprint())
+
+    def _auth_fingerprint(self):
+        """Return a hash of the values of the auth_* options of this provider."""
+        parser = argparse.ArgumentParser(add_help=False)
+        provider_parser = getattr(sys.modules[type(self).__module__], 'provider_parser', None)
+        if provider_parser:
+            provider_parser(parser)
+        credentials = sorted((option, str(self._get_provider_option(option)))
+                             for option in vars(parser.parse_args([]))
+                             if option.startswith('auth'))
+        return hashlib.sha256(json.dumps(credentials).encode('utf-8')).hexdigest()
+
+    def _zone_cache_settings(self):
+        storage = self._get_lexicon_option('zone_cache')
+        if not storage:
+            return None, None
+        if storage not in snapshot.STORAGES:
+            raise ValueError('Invalid zone cache storage {0}, must be one of: {1}.'
+                             .format(storage, ', '.join(snapshot.STORAGES)))
+        ttl = self._get_lexicon_option('zone_cache_ttl')
+        return storage, float(ttl) if ttl is not None else snapshot.DEFAULT_TTL
+
+    def _restore_web_session(self, session, probe):
+        """
+        Restore into the given requests.Session the cookies of the web session stored for the
+        account of this provider, if the web session cache is enabled (lexicon:session_cache set
+        to 'memory' or 'disk'), and return the data stored with it. probe(data) must check with
+        a cheap authenticated request that the web interface still accepts the session.
+        Return None if there is no usable web session: the provider must then log in, and store
+        the new web session with _store_web_session. session is None for an API not relying on
+        cookies, see _restore_web_session_data.
+        """
+        storage, _ = self._web_session_cache_settings()
+        if not storage:
+            return None
+
+        key, secret = self._web_session_key(), self._web_session_secret()
+        previous = websession.load(key, secret, storage)
+        if not previous:
+            return None
+
+        if session is not None:
+            websession.load_cookies(session.cookies, previous.cookies)
+        if not probe(previous.data):
+            LOGGER.debug('Web session of %s rejected, login required.', self.provider_name)
+            if session is not None:
+                session.cookies.clear()
+            websession.invalidate(key, storage)
+            return None
+
+        LOGGER.debug('Web session of %s restored.', self.provider_name)
+        return previous.data
+
+    def _store_web_session(self, session, data=None):
+        """
+        Store the cookies of the given authenticated requests.Session with the given data (eg.
+        domain ids), for lexicon:session_cache_ttl seconds, if the web session cache is enabled.
+        """
+        storage, ttl = self._web_session_cache_settings()
+        if storage:
+            cookies = websession.dump_cookies(session.cookies) if session is not None else []
+            websession.save(self._web_session_key(), self._web_session_secret(),
+                            websession.WebSession(cookies, data, time.time() + ttl), storage)
+
+    def _restore_web_session_data(self, probe):
+        """
+        Return the data stored for the account of this provider with _store_web_session_data, or
+        None if there is none or if probe(data) rejects it. This is _restore_web_session for an
+        API not relying on cookies (eg. a SOAP API giving a session id at each login).
+        """
+        return self._restore_web_session(None, probe)
+
+    def _store_web_session_data(self, data):
+        """
+        Store the given data (eg. the domains of the account) in the web session cache, for an API
+        not relying on cookies.
+        """
+        self._store_web_session(None, data)
+
+    def _web_session_key(self):
+        """
+        Identify the account of this provider in the web session cache. Providers that can log
+        into several web interfaces with the same username should add the interface to this key.
+        """
+        return (self.provider_name, self._get_provider_option('auth_username') or '')
+
+    def _web_session_secret(self):
+        return '{0}:{1}'.format(self._get_provider_option('auth_username') or '',
+                                self._get_provider_option('auth_password') or '')
+
+    def _web_session_cache_settings(self):
+        storage = self._get_lexicon_option('session_cache')
+        if not storage:
+            return None, None
+        if storage not in websession.STORAGES:
+            raise ValueError('Invalid web session cache storage {0}, must be one of: {1}.'
+                             .format(storage, ', '.join(websession.STORAGES)))
+        ttl = self._get_lexicon_option('session_cache_ttl')
+        return storage, float(ttl) if ttl is not None else websession.DEFAULT_TTL
+
+    def _rate_limiter(self):
+        """
+        Return the rate limiter of the requests sent to the API of this provider, shared by every
+        instance of this provider using the same account. It enforces the quotas given by the
+        rate_limit_quotas provider option (eg. '60/60,1000/86400' for 60 requests per minute and
+        1000 per day, or 'none'), or else the rate_limits of the provider, and honors the 429
+        responses and rate limiting headers of the API. Its state is kept in memory, or shared by
+        every Lexicon process if lexicon:rate_limit_storage is 'disk'. A request that would wait
+        more than lexicon:rate_limit_max_wait seconds raises ratelimit.RateLimitExceeded instead.
+        """
+        quotas = self._get_provider_option('rate_limit_quotas')
+        max_wait = self._get_lexicon_option('rate_limit_max_wait')
+        return ratelimit.get_rate_limiter(
+            '{0}_{1}'.format(self.provider_name, self._auth_fingerprint()[:16]),
+            ratelimit.parse_quotas(quotas) if quotas else self.rate_limits,
+            self._get_lexicon_option('rate_limit_storage') or ratelimit.DEFAULT_STORAGE,
+            float(max_wait) if max_wait is not None else ratelimit.DEFAULT_MAX_WAIT)
+
     def _fqdn_name(self, record_name):
         # strip trailing period from fqdn if present
         record_name = record_name.rstrip('.')
@@ -66,6 +66,11 @@ class Provider(BaseProvider):
     # type, name and content are used to filter records.
     # If possible filter during the query, otherwise filter after response is received.
     def _list_records(self, rtype=None, name=None, content=None):
+        records = list(self._iter_records(rtype, name, content))
+        LOGGER.debug('list_records: %s', records)
+        return records
+
+    def _iter_records(self, rtype=None, name=None, content=None):
         filter_obj = {'per_page': 100}
         if rtype:
             filter_obj['type'] = rtype
@@ -74,22 +79,20 @@ class Provider(BaseProvider):
         if content:
             filter_obj['content'] = content
 
-        payload = self._get(
-            '/zones/{0}/dns_records'.format(self.domain_id), filter_obj)
-
-        records = []
-        for record in payload['result']:
-            processed_record = {
-                'type': record['type'],
-                'name': record['name'],
-                'ttl': record['ttl'],
-                'content': record['content'],
-                'id': record['id']
-            }
-            records.append(processed_record)
-
-        LOGGER.debug('list_records: %s', records)
-        return records
+        def _fetch(page):
+            return self._get('/zones/{0}/dns_records'.format(self.domain_id),
+                             dict(filter_obj, page=page) if page > 1 else filter_obj)
+
+        for payload in self._iter_numbered_pages(
+                _fetch, lambda payload: payload.get('result_info', {}).get('total_pages')):
+            for record in payload['result']:
+                yield {
+                    'type': record['type'],
+                    'name': record['name'],
+                    'ttl': record['ttl'],
+                    'content': record['content'],
+                    'id': record['id']
+                }
 
     # Create or update a record.
     def _update_record(self, identifier, rtype=None, name=None, content=None):
@@ -135,13 +138,14 @@ class Provider(BaseProvider):
             data = {}
         if query_params is None:
             query_params = {}
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers={
-                                        'X-Auth-Email': self._get_provider_option('auth_username'),
-                                        'X-Auth-Key': self._get_provider_option('auth_token'),
-                                        'Content-Type': 'application/json'
-                                    })
+        response = self.http_session.request(
+            action, self.api_endpoint + url, params=query_params,
+            data=json.dumps(data),
+            headers={
+                'X-Auth-Email': self._get_provider_option('auth_username'),
+                'X-Auth-Key': self._get_provider_option('auth_token'),
+                'Content-Type': 'application/json'
+            })
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
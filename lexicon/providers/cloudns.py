@@ -2,7 +2,6 @@
 from __future__ import absolute_import
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -186,8 +185,8 @@ class Provider(BaseProvider):
             data.update(self._build_authentication_data())
 
         # Fire request against ClouDNS API and parse result as JSON
-        response = requests.request(action, self.api_endpoint +
-                                    url, params=query_params, data=data)
+        response = self.http_session.request(action, self.api_endpoint +
+                                             url, params=query_params, data=data)
         response.raise_for_status()
         payload = response.json()
 
@@ -181,8 +181,8 @@ class Provider(BaseProvider):
                     self._get_provider_option('auth_token')).encode('utf-8')).hexdigest(),
             'API-FORMAT': 'json'}
         default_auth = None
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=data, headers=default_headers, auth=default_auth)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=data, headers=default_headers, auth=default_auth)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
@@ -169,7 +169,7 @@ class Provider(BaseProvider):
             data = {}
         if query_params is None:
             query_params = {}
-        response = requests.request(
+        response = self.http_session.request(
             action, url, data=json.dumps(data), params=query_params, headers={
                 'X-Auth-Token': self.auth_token,
                 'Content-Type': 'application/json',
@@ -248,10 +248,10 @@ class Provider(BaseProvider):
         default_headers['x-cnsdns-requestDate'] = request_date
         default_headers['x-cnsdns-hmac'] = base64.b64encode(hashed.digest())
 
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers,
-                                    auth=default_auth)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers,
+                                             auth=default_auth)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
 
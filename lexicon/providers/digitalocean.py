@@ -3,7 +3,7 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
+from lexicon import pagination
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -51,20 +51,16 @@ class Provider(BaseProvider):
     # type, name and content are used to filter records.
     # If possible filter during the query, otherwise filter after response is received.
     def _list_records(self, rtype=None, name=None, content=None):
+        records = list(self._iter_records(rtype, name, content))
+        LOGGER.debug('list_records: %s', records)
+        return records
+
+    def _iter_records(self, rtype=None, name=None, content=None):
         url = '/domains/{0}/records'.format(self.domain_id)
-        records = []
-        payload = {}
-
-        next_url = url
-        while next_url is not None:
-            payload = self._get(next_url)
-            if 'links' in payload \
-                    and 'pages' in payload['links'] \
-                    and 'next' in payload['links']['pages']:
-                next_url = payload['links']['pages']['next']
-            else:
-                next_url = None
 
+        for payload in pagination.iter_cursor_pages(
+                lambda next_url: self._get(next_url or url),
+                lambda payload: payload.get('links', {}).get('pages', {}).get('next')):
             for record in payload['domain_records']:
                 processed_record = {
                     'type': record['type'],
@@ -73,19 +69,13 @@ class Provider(BaseProvider):
                     'content': record['data'],
                     'id': record['id']
                 }
-                records.append(processed_record)
-
-        if rtype:
-            records = [record for record in records if record['type'] == rtype]
-        if name:
-            records = [record for record in records if record['name']
-                       == self._full_name(name)]
-        if content:
-            records = [
-                record for record in records if record['content'].lower() == content.lower()]
-
-        LOGGER.debug('list_records: %s', records)
-        return records
+                if rtype and processed_record['type'] != rtype:
+                    continue
+                if name and processed_record['name'] != self._full_name(name):
+                    continue
+                if content and processed_record['content'].lower() != content.lower():
+                    continue
+                yield processed_record
 
     # Create or update a record.
     def _update_record(self, identifier, rtype=None, name=None, content=None):
@@ -139,9 +129,9 @@ class Provider(BaseProvider):
         if not url.startswith(self.api_endpoint):
             url = self.api_endpoint + url
 
-        response = requests.request(action, url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers)
+        response = self.http_session.request(action, url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         if action == 'DELETE':
@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -195,10 +194,10 @@ class Provider(BaseProvider):
         else:
             raise Exception('No valid authentication mechanism found')
 
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers,
-                                    auth=default_auth)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers,
+                                             auth=default_auth)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         if response.text and response.json()['data'] is None:
@@ -131,10 +131,10 @@ class Provider(BaseProvider):
         default_auth = (self._get_provider_option('auth_username'),
                         self._get_provider_option('auth_token'))
 
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers,
-                                    auth=default_auth)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers,
+                                             auth=default_auth)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
@@ -3,8 +3,6 @@ from __future__ import absolute_import
 
 import logging
 
-import requests
-
 from lexicon.providers.base import Provider as BaseProvider
 
 LOGGER = logging.getLogger(__name__)
@@ -144,10 +142,10 @@ class Provider(BaseProvider):
             query_params = {}
         default_headers = {}
         default_auth = None
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=data,
-                                    headers=default_headers,
-                                    auth=default_auth)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=data,
+                                             headers=default_headers,
+                                             auth=default_auth)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
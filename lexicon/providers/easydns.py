@@ -144,9 +144,9 @@ class Provider(BaseProvider):
             'Content-Type': 'application/json'
         }
 
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
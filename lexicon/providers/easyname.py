@@ -2,7 +2,7 @@
 from __future__ import absolute_import, print_function
 import logging
 
-from requests import Response, Session
+from requests import Response
 
 from lexicon.providers.base import Provider as BaseProvider
 
@@ -42,7 +42,7 @@ class Provider(BaseProvider):
 
     def __init__(self, config):
         super(Provider, self).__init__(config)
-        self.session = Session()
+        self.session = self.http_session
         self.domain_id = None
         self._records = None
 
@@ -60,11 +60,22 @@ class Provider(BaseProvider):
           AssertionError: When a request returns unexpected or unknown data.
           ValueError: When login data is wrong or the domain does not exist.
         """
-        csrf_token = self._get_csrf_token()
-        self._login(csrf_token)
-
-        domain_text_element = self._get_domain_text_of_authoritative_zone()
-        self.domain_id = self._get_domain_id(domain_text_element)
+        # Reuse the web session of a previous login if the web session cache is enabled
+        data = self._restore_web_session(self.session, self._is_logged_in)
+        if data is None:
+            csrf_token = self._get_csrf_token()
+            self._login(csrf_token)
+            data = {}
+
+        # Zones are stored by requested domain, as the zone may belong to a parent domain.
+        zones = data.setdefault('zones', {})
+        if self.domain not in zones:
+            requested_domain = self.domain
+            domain_text_element = self._get_domain_text_of_authoritative_zone()
+            zones[requested_domain] = [self.domain, self._get_domain_id(domain_text_element)]
+            self._store_web_session(self.session, data)
+
+        self.domain, self.domain_id = zones[self.domain]
         LOGGER.debug('Easyname domain ID: %s', self.domain_id)
 
         return True
@@ -382,6 +393,16 @@ class Provider(BaseProvider):
         assert login_response.url == self.URLS['overview'], \
             'Easyname login failed, bad EASYNAME_USER or EASYNAME_PASS.'
 
+    def _is_logged_in(self, data):  # pylint: disable=unused-argument
+        """
+        Check if the session is still logged in on easyname: the overview page
+        redirects to the login page otherwise.
+        """
+        overview_response = self.session.get(self.URLS['overview'])
+        self._log('Overview', overview_response)
+        return overview_response.status_code == 200 and \
+            overview_response.url == self.URLS['overview']
+
     def _get_domain_text_of_authoritative_zone(self):
         """Get the authoritative name zone."""
         # We are logged in, so get the domain list
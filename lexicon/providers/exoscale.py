@@ -2,7 +2,6 @@
 from __future__ import absolute_import
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -178,7 +177,7 @@ class Provider(BaseProvider):
              self._get_provider_option("auth_secret"))
         )
 
-        response = requests.request(
+        response = self.http_session.request(
             action,
             self.api_endpoint + url,
             params=query_params,
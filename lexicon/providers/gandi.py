@@ -16,7 +16,8 @@ zone changes are atomic. You cannot edit the currently active
 configuration. Any changes require editing either a new or inactive
 configuration. Once the changes are committed, then the domain is switched
 to using the new zone configuration. This module makes no attempt to
-cleanup previous zone configurations.
+cleanup previous zone configurations. Changes applied together through
+apply_changes share a single new zone configuration.
 
 Note that Gandi domains can share zone configurations. In other words,
 I can have domain-a.com and domain-b.com which share the same zone
@@ -235,6 +236,99 @@ class Provider(BaseProvider):
         LOGGER.debug('delete_record: %s', True)
         return True
 
+    # Apply several changes at once. With the RPC protocol, all changes share a single zone
+    # version. With the REST protocol, the records of the zone are fetched once, changes are
+    # applied locally on the rrsets, then each modified rrset is PUT (or DELETEd if it became
+    # empty) once, whatever the number of changes affecting it.
+    def _apply_changes(self, changes):
+        if self.protocol == 'rpc':
+            return self.rpc_helper.apply_changes(
+                changes, self._get_lexicon_option('ttl') or self.default_ttl)
+
+        original = {}
+        for rrset in self._get('/domains/{0}/records'.format(self.domain_id)):
+            original[(rrset['rrset_name'], rrset['rrset_type'])] = {
+                'values': [self._clean_TXT_record({'type': rrset['rrset_type'],
+                                                   'content': value})['content']
+                           for value in rrset['rrset_values']],
+                'ttl': rrset['rrset_ttl']}
+        rrsets = {key: {'values': list(rrset['values']), 'ttl': rrset['ttl']}
+                  for key, rrset in original.items()}
+
+        results = []
+        touched = []
+        for change in changes:
+            try:
+                keys = self._stage_change(rrsets, change)
+                results.append({'success': True, 'output': True})
+                touched.append(keys)
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+                touched.append([])
+
+        for key in sorted(rrsets):
+            rrset = rrsets[key]
+            if rrset == original.get(key) or (not rrset['values'] and key not in original):
+                continue
+            url = '/domains/{0}/records/{1}/{2}'.format(self.domain_id, key[0], key[1])
+            try:
+                if rrset['values']:
+                    self._put(url, {'rrset_values': rrset['values'], 'rrset_ttl': rrset['ttl']})
+                else:
+                    self._delete(url)
+            except requests.exceptions.HTTPError as error:
+                LOGGER.debug('Update of rrset %s failed.', url, exc_info=True)
+                for index, keys in enumerate(touched):
+                    if key in keys and results[index]['success']:
+                        results[index] = {'success': False, 'error': '{0}: {1}'.format(
+                            type(error).__name__, error)}
+
+        LOGGER.debug('apply_changes: %s', results)
+        return results
+
+    # Apply one change on the given rrsets, and return the keys of the rrsets it modified.
+    def _stage_change(self, rrsets, change):
+        action = change.get('action')
+        rtype, content = change.get('type'), change.get('content')
+        name = (self._relative_name(change['name']) or '@') if change.get('name') else None
+        if action == 'create':
+            if not rtype or not name or not content:
+                raise ValueError('Error, rtype, name and content are mandatory to create '
+                                 'a record.')
+            rrset = rrsets.setdefault((name, rtype), {'values': [], 'ttl': None})
+            if content not in rrset['values']:
+                rrset['values'].append(content)
+                rrset['ttl'] = rrset['ttl'] or self._get_lexicon_option('ttl') \
+                    or self.default_ttl
+            return [(name, rtype)]
+
+        if action == 'update':
+            name = change.get('identifier') or name
+            if not rtype or not name or not content:
+                raise ValueError('Error, rtype, identifier or name, and content are mandatory '
+                                 'to update a record.')
+            rrset = rrsets.setdefault((name, rtype), {'values': [], 'ttl': None})
+            rrset['values'] = [content]
+            rrset['ttl'] = rrset['ttl'] or self._get_lexicon_option('ttl') or self.default_ttl
+            return [(name, rtype)]
+
+        if action == 'delete':
+            name = change.get('identifier') or name
+            keys = [key for key, rrset in rrsets.items()
+                    if rrset['values'] and (not name or key[0] == name)
+                    and (not rtype or key[1] == rtype)
+                    and (content is None or content in rrset['values'])]
+            if not keys or (not name and not rtype and content is None):
+                raise Exception('Record identifier could not be found.')
+            for key in keys:
+                rrsets[key]['values'] = [value for value in rrsets[key]['values']
+                                         if content is not None and value != content]
+            return keys
+
+        raise ValueError('Invalid action statement: {0}'.format(action))
+
     # Helpers
     def _request(self, action='GET', url='/', data=None, query_params=None):
         if data is None:
@@ -249,9 +343,9 @@ class Provider(BaseProvider):
         if not url.startswith(self.api_endpoint):
             url = self.api_endpoint + url
 
-        response = requests.request(action, url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers)
+        response = self.http_session.request(action, url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         if action == 'DELETE':
@@ -302,12 +396,8 @@ class GandiRPCSubProvider(object):  # pylint: disable=useless-object-inheritance
         try:
             version = self._api.domain.zone.version.new(
                 self._api_key, self._zone_id)
-            self._api.domain.zone.record.add(self._api_key, self._zone_id, version,
-                                             {'type': rtype.upper(),
-                                              'name': name,
-                                              'value': content,
-                                              'ttl': ttl
-                                              })
+            self._add_record(version, {'type': rtype.upper(), 'name': name, 'value': content,
+                                       'ttl': ttl})
             self._api.domain.zone.version.set(
                 self._api_key, self._zone_id, version)
             ret = True
@@ -325,18 +415,9 @@ class GandiRPCSubProvider(object):  # pylint: disable=useless-object-inheritance
     # If possible filter during the query, otherwise filter after response is received.
     def list_records(self, rtype=None, name=None, content=None):
         """List all record for the domain in the active Gandi zone."""
-        opts = {}
-        if rtype is not None:
-            opts['type'] = rtype.upper()
-        if name is not None:
-            opts['name'] = self._relative_name(name)
-        if content is not None:
-            opts['value'] = self._txt_encode(content) if opts.get(
-                'type', '') == 'TXT' else content
-
         records = []
         payload = self._api.domain.zone.record.list(
-            self._api_key, self._zone_id, 0, opts)
+            self._api_key, self._zone_id, 0, self._record_filter(rtype, name, content))
         for record in payload:
             processed_record = {
                 'type': record['type'],
@@ -357,54 +438,18 @@ class GandiRPCSubProvider(object):  # pylint: disable=useless-object-inheritance
         return records
 
     # Update a record. Identifier or type+name+content
-    def update_record(self, identifier, rtype=None, name=None, content=None):  # pylint: disable=too-many-branches
+    def update_record(self, identifier, rtype=None, name=None, content=None):
         """Updates the specified record in a new Gandi zone."""
-        if not identifier:
-            records = self.list_records(rtype, name)
-            if len(records) == 1:
-                identifier = records[0]['id']
-            elif len(records) > 1:
-                raise Exception('Several record identifiers match the request')
-            else:
-                raise Exception('Record identifier could not be found')
-
-        identifier = str(identifier)
         version = None
+        ret = False
 
-        # Gandi doesn't allow you to edit records on the active zone file.
-        # Gandi also doesn't persist zone record identifiers when creating
-        # a new zone file. To update by identifier, we lookup the record
-        # by identifier, then use the record fields to find the record in
-        # the newly created zone.
-        records = self._api.domain.zone.record.list(
-            self._api_key, self._zone_id, 0, {'id': identifier})
-
-        if len(records) == 1:
-            rec = records[0]
-            del rec['id']
-
+        rec = self._active_record(identifier, rtype, name)
+        if rec:
             try:
                 version = self._api.domain.zone.version.new(
                     self._api_key, self._zone_id)
-                records = self._api.domain.zone.record.list(
-                    self._api_key, self._zone_id, version, rec)
-                if len(records) != 1:
-                    raise self.GandiInternalError("expected one record")
-
-                if rtype is not None:
-                    rec['type'] = rtype.upper()
-                if name is not None:
-                    rec['name'] = self._relative_name(name)
-                if content is not None:
-                    rec['value'] = self._txt_encode(
-                        content) if rec['type'] == 'TXT' else content
-
-                records = self._api.domain.zone.record.update(
-                    self._api_key, self._zone_id, version, {'id': records[0]['id']}, rec)
-                if len(records) != 1:
-                    raise self.GandiInternalError(
-                        "Expected one updated record")
-
+                self._update_record(version, rec,
+                                    {'type': rtype, 'name': name, 'content': content})
                 self._api.domain.zone.version.set(
                     self._api_key, self._zone_id, version)
                 ret = True
@@ -428,32 +473,14 @@ class GandiRPCSubProvider(object):  # pylint: disable=useless-object-inheritance
         version = None
         ret = False
 
-        opts = {}
-        if identifier is not None:
-            opts['id'] = identifier
-        else:
-            if not rtype and not name and not content:
-                raise ValueError(
-                    'Error, at least one parameter from type, name or content must be set')
-            if rtype:
-                opts['type'] = rtype.upper()
-            if name:
-                opts['name'] = self._relative_name(name)
-            if content:
-                opts['value'] = self._txt_encode(
-                    content) if opts['type'] == 'TXT' else content
-
         records = self._api.domain.zone.record.list(
-            self._api_key, self._zone_id, 0, opts)
+            self._api_key, self._zone_id, 0, self._delete_filter(identifier, rtype, name, content))
 
         if records:
             try:
                 version = self._api.domain.zone.version.new(
                     self._api_key, self._zone_id)
-                for record in records:
-                    del record['id']
-                    self._api.domain.zone.record.delete(
-                        self._api_key, self._zone_id, version, record)
+                self._delete_records(version, records)
                 self._api.domain.zone.version.set(
                     self._api_key, self._zone_id, version)
                 ret = True
@@ -465,6 +492,159 @@ class GandiRPCSubProvider(object):  # pylint: disable=useless-object-inheritance
         LOGGER.debug("delete_record: %s", ret)
         return ret
 
+    # Apply several changes in a single zone version: the version is created once, every change
+    # is applied to it, and it is activated once at the end. Changes failing with an error are
+    # skipped, the others are activated together. Lookups by type, name and content are done in
+    # the new version, so they take into account the changes preceding them.
+    def apply_changes(self, changes, ttl):
+        """Applies the given changes in one new Gandi zone, and returns the result of each."""
+        results = []
+        version = self._api.domain.zone.version.new(self._api_key, self._zone_id)
+        activated = False
+        try:
+            for change in changes:
+                try:
+                    results.append({'success': True,
+                                    'output': self._apply_change(version, change, ttl)})
+                except Exception as error:  # pylint: disable=broad-except
+                    LOGGER.debug('Change %s failed.', change, exc_info=True)
+                    results.append({'success': False,
+                                    'error': '{0}: {1}'.format(type(error).__name__, error)})
+
+            if any(result['success'] for result in results):
+                try:
+                    self._api.domain.zone.version.set(self._api_key, self._zone_id, version)
+                    activated = True
+                except xmlrpclib.Fault as error:
+                    results = [{'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)}
+                               if result['success'] else result for result in results]
+        finally:
+            if not activated:
+                self._api.domain.zone.version.delete(self._api_key, self._zone_id, version)
+
+        LOGGER.debug("apply_changes: %s", results)
+        return results
+
+    def _apply_change(self, version, change, ttl):
+        action = change.get('action')
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+        if action == 'create':
+            return self._add_record(version, {'type': rtype.upper(),
+                                              'name': self._relative_name(name),
+                                              'value': content, 'ttl': ttl})
+        if action == 'update':
+            rec = self._active_record(change.get('identifier'), rtype, name)
+            if not rec:
+                raise Exception('Record identifier could not be found')
+            return self._update_record(version, rec, change)
+        if action == 'delete':
+            identifier = change.get('identifier')
+            if identifier is not None:
+                # Identifiers are the ones of the active zone version.
+                records = self._api.domain.zone.record.list(
+                    self._api_key, self._zone_id, 0, {'id': identifier})
+            else:
+                records = self._api.domain.zone.record.list(
+                    self._api_key, self._zone_id, version,
+                    self._delete_filter(None, rtype, name, content))
+            if not records:
+                raise Exception('Record identifier could not be found')
+            return self._delete_records(version, records)
+        raise ValueError('Invalid action statement: {0}'.format(action))
+
+    def _add_record(self, version, record):
+        self._api.domain.zone.record.add(self._api_key, self._zone_id, version, record)
+        return True
+
+    # Return the fields of the record to update in the active zone version, or None.
+    def _active_record(self, identifier, rtype=None, name=None):
+        if not identifier:
+            records = self.list_records(rtype, name)
+            if len(records) == 1:
+                identifier = records[0]['id']
+            elif len(records) > 1:
+                raise Exception('Several record identifiers match the request')
+            else:
+                raise Exception('Record identifier could not be found')
+
+        identifier = str(identifier)
+
+        # Gandi doesn't allow you to edit records on the active zone file.
+        # Gandi also doesn't persist zone record identifiers when creating
+        # a new zone file. To update by identifier, we lookup the record
+        # by identifier, then use the record fields to find the record in
+        # the newly created zone.
+        records = self._api.domain.zone.record.list(
+            self._api_key, self._zone_id, 0, {'id': identifier})
+
+        if len(records) != 1:
+            return None
+
+        rec = records[0]
+        del rec['id']
+        return rec
+
+    # Update the record matching the given fields in the zone version, with the type,
+    # name and content of the change when they are provided.
+    def _update_record(self, version, rec, change):
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+        records = self._api.domain.zone.record.list(
+            self._api_key, self._zone_id, version, rec)
+        if len(records) != 1:
+            raise self.GandiInternalError("expected one record")
+
+        rec = dict(rec)
+        if rtype is not None:
+            rec['type'] = rtype.upper()
+        if name is not None:
+            rec['name'] = self._relative_name(name)
+        if content is not None:
+            rec['value'] = self._txt_encode(
+                content) if rec['type'] == 'TXT' else content
+
+        records = self._api.domain.zone.record.update(
+            self._api_key, self._zone_id, version, {'id': records[0]['id']}, rec)
+        if len(records) != 1:
+            raise self.GandiInternalError(
+                "Expected one updated record")
+        return True
+
+    def _delete_records(self, version, records):
+        for record in records:
+            record = dict(record)
+            del record['id']
+            self._api.domain.zone.record.delete(
+                self._api_key, self._zone_id, version, record)
+        return True
+
+    def _record_filter(self, rtype=None, name=None, content=None):
+        opts = {}
+        if rtype is not None:
+            opts['type'] = rtype.upper()
+        if name is not None:
+            opts['name'] = self._relative_name(name)
+        if content is not None:
+            opts['value'] = self._txt_encode(content) if opts.get(
+                'type', '') == 'TXT' else content
+        return opts
+
+    def _delete_filter(self, identifier=None, rtype=None, name=None, content=None):
+        if identifier is not None:
+            return {'id': identifier}
+        if not rtype and not name and not content:
+            raise ValueError(
+                'Error, at least one parameter from type, name or content must be set')
+        opts = {}
+        if rtype:
+            opts['type'] = rtype.upper()
+        if name:
+            opts['name'] = self._relative_name(name)
+        if content:
+            opts['value'] = self._txt_encode(
+                content) if opts['type'] == 'TXT' else content
+        return opts
+
     @staticmethod
     def _txt_encode(val):
         if not val:
@@ -2,7 +2,6 @@
 from __future__ import absolute_import
 import json
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -126,12 +125,12 @@ class Provider(BaseProvider):
 
         credentials = (self._get_provider_option('auth_username'),
                        self._get_provider_option('auth_token'))
-        response = requests.request(action,
-                                    self.api_endpoint + url,
-                                    params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers,
-                                    auth=credentials)
+        response = self.http_session.request(action,
+                                             self.api_endpoint + url,
+                                             params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers,
+                                             auth=credentials)
 
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
@@ -1,13 +1,12 @@
 """Module provider for Godaddy"""
 from __future__ import absolute_import
+from collections import OrderedDict
+import copy
 import hashlib
 import json
 import logging
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
+from lexicon import pool
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -15,6 +14,14 @@ LOGGER = logging.getLogger(__name__)
 
 NAMESERVER_DOMAINS = ['godaddy.com']
 
+# When editing DNS zone, API is unavailable for few seconds
+# (until modifications are propagated).
+# In this case, call to API will return 409 HTTP error.
+# Requests are retried until we get a processable reponse (an HTTP status != 409).
+RETRY_STATUS_FORCELIST = (409,) + pool.RETRY_STATUS_FORCELIST
+RETRY_METHODS = ('GET', 'PUT', 'POST', 'DELETE', 'PATCH')
+DEFAULT_MAX_RETRIES = 10
+
 
 def provider_parser(subparser):
     """Generate a subparser for Godaddy"""
@@ -41,6 +48,9 @@ class Provider(BaseProvider):
           replace with the updated set,
         - deleting a record consists in removing a record in the obtained set and call
           replace with the updated set.
+    Several changes can be applied at once with apply_changes: they are sent in one replace
+    call, which only replaces the modified record set (all records with a given type and name)
+    when there is exactly one, and it still holds records.
     In parallel, as said before, there is no unique identifier.
     This provider then implement a pseudo-identifier, to allow an easy update or delete
     using the '--identifier' lexicon parameter.
@@ -48,11 +58,28 @@ class Provider(BaseProvider):
     because identifier value is tied to the content of the record, and will change anytime
     something is changed in the record.
     """
+    # The API accepts 60 requests per minute
+    rate_limits = ((60, 60),)
+
     def __init__(self, config):
         super(Provider, self).__init__(config)
         self.domain_id = None
         self.api_endpoint = 'https://api.godaddy.com/v1'
 
+    @property
+    def http_session(self):
+        """
+        The requests.Session of this provider, retrying the requests rejected while a previous
+        modification of the DNS zone is propagated. It is built once for the provider lifetime,
+        on an HTTP pool shared process-wide, so connections are kept alive between requests.
+        """
+        if getattr(self, '_http_session', None) is None:
+            self._http_session = pool.build_session(
+                self.config, max_retries=self._get_lexicon_option('http_max_retries')
+                or DEFAULT_MAX_RETRIES, status_forcelist=RETRY_STATUS_FORCELIST,
+                allowed_methods=RETRY_METHODS, rate_limiter=self._rate_limiter())
+        return self._http_session
+
     def _authenticate(self):
         domain = self.domain
 
@@ -82,27 +109,120 @@ class Provider(BaseProvider):
 
         if content:
             records = [
-                record for record in records if record['data'] == content]
+                record for record in records if record['content'] == content]
 
         LOGGER.debug('list_records: %s', records)
 
         return records
 
     def _create_record(self, rtype, name, content):
-        domain = self.domain
-        relative_name = self._relative_name(name)
-        ttl = self._get_lexicon_option('ttl')
+        # Retrieve existing data in DNS zone.
+        records = self._get(self._records_url())
+
+        if not self._create_in_records(records, rtype, name, content):
+            LOGGER.debug(
+                'create_record (ignored, duplicate): %s %s %s', rtype, name, content)
+            return True
+
+        # Synchronize data with inserted record into DNS zone.
+        self._put(self._records_url(), records)
 
+        LOGGER.debug('create_record: %s %s %s', rtype, name, content)
+
+        return True
+
+    def _update_record(self, identifier, rtype=None, name=None, content=None):
         # Retrieve existing data in DNS zone.
-        records = self._get('/domains/{0}/records'.format(domain))
+        records = self._get(self._records_url())
+
+        self._update_in_records(records, {'identifier': identifier, 'type': rtype,
+                                          'name': name, 'content': content})
+
+        # Synchronize data with updated records into DNS zone.
+        self._put(self._records_url(), records)
+
+        LOGGER.debug('update_record: %s %s %s', rtype, name, content)
+
+        return True
+
+    def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
+        # For the LOL. GoDaddy does not accept an empty array
+        # when updating a particular set of records.
+        # It means that you cannot request to remove all records
+        # matching a particular rtype and/or name.
+        # Instead, we get ALL records in the DNS zone, update the set,
+        # and replace EVERYTHING in the DNS zone.
+        # You will always have at minimal NS/SRV entries in the array,
+        # otherwise your DNS zone is broken, and updating the zone is the least of your problem ...
+        records = self._get(self._records_url())
+
+        self._delete_in_records(records, {'identifier': identifier, 'type': rtype,
+                                          'name': name, 'content': content})
+
+        # Synchronize data with expurged entries into DNS zone.
+        self._put(self._records_url(), records)
+
+        LOGGER.debug('delete_records: %s %s %s', rtype, name, content)
+
+        return True
+
+    def _apply_changes(self, changes):
+        """
+        Apply the given changes with one download of the DNS zone and at most one replace call:
+        every change is applied in memory to the records of the zone, then only the modified
+        record set is replaced if there is one, otherwise the whole zone is replaced at once.
+        If the changes leave the zone as it was, nothing is sent. As the replacement is all or
+        nothing, if it fails all the changes are reported as failed.
+        """
+        records = self._get(self._records_url())
+        updated_records = copy.deepcopy(records)
+
+        results = []
+        for change in changes:
+            backup = copy.deepcopy(updated_records)
+            try:
+                results.append({'success': True,
+                                'output': self._apply_change_in_records(updated_records, change)})
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                updated_records[:] = backup
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+
+        try:
+            self._replace_records(records, updated_records)
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.debug('Records replacement failed.', exc_info=True)
+            error = '{0}: {1}'.format(type(error).__name__, error)
+            results = [{'success': False, 'error': result.get('error', error)}
+                       for result in results]
+
+        return results
+
+    def _apply_change_in_records(self, records, change):
+        action = change.get('action')
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+        if action == 'create':
+            if not rtype or not name or not content:
+                raise Exception('ERROR: rtype, name and content are required')
+            self._create_in_records(records, rtype, name, content)
+        elif action == 'update':
+            self._update_in_records(records, change)
+        elif action == 'delete':
+            self._delete_in_records(records, change)
+        else:
+            raise ValueError('Invalid action statement: {0}'.format(action))
+        return True
+
+    def _create_in_records(self, records, rtype, name, content):
+        relative_name = self._record_name(name)
+        ttl = self._get_lexicon_option('ttl')
 
         # Check if a record already matches given parameters
         for record in records:
-            if (record['type'] == rtype and self._relative_name(record['name']) == relative_name
+            if (record['type'] == rtype and record['name'] == relative_name
                     and record['data'] == content):
-                LOGGER.debug(
-                    'create_record (ignored, duplicate): %s %s %s', rtype, name, content)
-                return True
+                return False
 
         # Append a new entry corresponding to given parameters.
         data = {'type': rtype, 'name': relative_name, 'data': content}
@@ -110,15 +230,11 @@ class Provider(BaseProvider):
             data['ttl'] = ttl
 
         records.append(data)
-
-        # Synchronize data with inserted record into DNS zone.
-        self._put('/domains/{0}/records'.format(domain), records)
-
-        LOGGER.debug('create_record: %s %s %s', rtype, name, content)
-
         return True
 
-    def _update_record(self, identifier, rtype=None, name=None, content=None):
+    def _update_in_records(self, records, change):
+        identifier, rtype = change.get('identifier'), change.get('type')
+        name, content = change.get('name'), change.get('content')
         # No identifier is used with GoDaddy.
         # We can rely either:
         #   - only on rtype/name to get the relevant records, both of them are required
@@ -133,13 +249,9 @@ class Provider(BaseProvider):
         if not identifier and not name:
             raise Exception('ERROR: name is required')
 
-        domain = self.domain
         relative_name = None
         if name:
-            relative_name = self._relative_name(name)
-
-        # Retrieve existing data in DNS zone.
-        records = self._get('/domains/{0}/records'.format(domain))
+            relative_name = self._record_name(name)
 
         # Get the record to update:
         #   - either explicitly by its identifier,
@@ -148,70 +260,71 @@ class Provider(BaseProvider):
         for record in records:
             if ((identifier and Provider._identifier(record) == identifier) or  # pylint: disable=too-many-boolean-expressions
                     (not identifier and record['type'] == rtype
-                     and self._relative_name(record['name']) == relative_name
+                     and record['name'] == relative_name
                      and record['data'] != content)):
                 record['data'] = content
                 break
 
-        # Synchronize data with updated records into DNS zone.
-        self._put('/domains/{0}/records'.format(domain), records)
-
-        LOGGER.debug('update_record: %s %s %s', rtype, name, content)
-
-        return True
-
-    def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
-        # For the LOL. GoDaddy does not accept an empty array
-        # when updating a particular set of records.
-        # It means that you cannot request to remove all records
-        # matching a particular rtype and/or name.
-        # Instead, we get ALL records in the DNS zone, update the set,
-        # and replace EVERYTHING in the DNS zone.
-        # You will always have at minimal NS/SRV entries in the array,
-        # otherwise your DNS zone is broken, and updating the zone is the least of your problem ...
-        domain = self.domain
-
-        # Retrieve all records in the DNS zone
-        records = self._get('/domains/{0}/records'.format(domain))
-
+    def _delete_in_records(self, records, change):
+        identifier, rtype = change.get('identifier'), change.get('type')
+        name, content = change.get('name'), change.get('content')
         relative_name = None
         if name:
-            relative_name = self._relative_name(name)
+            relative_name = self._record_name(name)
 
         # Filter out all records which matches the pattern (either identifier
         # or some combination of rtype/name/content).
-        filtered_records = []
-        if identifier:
-            filtered_records = [
-                record for record in records if Provider._identifier(record) != identifier]
+        def _matches(record):
+            if identifier:
+                return Provider._identifier(record) == identifier
+            return ((rtype or relative_name or content)
+                    and (not rtype or record['type'] == rtype)
+                    and (not relative_name or record['name'] == relative_name)
+                    and (not content or record['data'] == content))
+
+        records[:] = [record for record in records if not _matches(record)]
+
+    def _replace_records(self, records, updated_records):
+        """
+        Send to the DNS zone the modifications turning records into updated_records. If only
+        one record set is modified, and still holds records, only this record set is replaced
+        (PUT /records/{type}/{name}). Otherwise, as GoDaddy does not accept to replace a record
+        set with an empty one, all the records of the DNS zone are replaced at once, so records
+        must then be the complete list of records of the DNS zone.
+        """
+        record_sets = OrderedDict()
+        for index, record_list in enumerate((records, updated_records)):
+            for record in record_list:
+                record_sets.setdefault(
+                    (record['type'], record['name']), ([], []))[index].append(record)
+
+        modified = [key for key, (before, after) in record_sets.items() if before != after]
+        if not modified:
+            LOGGER.debug('replace_records: nothing to replace')
+            return False
+
+        if len(modified) == 1 and record_sets[modified[0]][1]:
+            rtype, name = modified[0]
+            self._put(self._records_url(rtype, name), [
+                dict((key, value) for key, value in record.items()
+                     if key not in ('type', 'name'))
+                for record in record_sets[modified[0]][1]])
         else:
-            for record in records:
-                if ((not rtype and not relative_name and not content)  # pylint: disable=too-many-boolean-expressions
-                        or (rtype and not relative_name and not content and record['type'] != rtype)
-                        or (not rtype and relative_name and not content
-                            and self._relative_name(record['name']) != relative_name)
-                        or (not rtype and not relative_name and content
-                            and record['data'] != content)
-                        or (rtype and relative_name and not content
-                            and (record['type'] != rtype
-                                 or self._relative_name(record['name']) != relative_name))
-                        or (rtype and not relative_name and content
-                            and (record['type'] != rtype or record['data'] != content))
-                        or (not rtype and relative_name and content
-                            and (self._relative_name(record['name']) != relative_name
-                                 or record['data'] != content))
-                        or (rtype and relative_name and content
-                            and (record['type'] != rtype
-                                 or self._relative_name(record['name']) != relative_name
-                                 or record['data'] != content))):
-                    filtered_records.append(record)
+            self._put(self._records_url(), updated_records)
 
-        # Synchronize data with expurged entries into DNS zone.
-        self._put('/domains/{0}/records'.format(domain), filtered_records)
+        return True
 
-        LOGGER.debug('delete_records: %s %s %s', rtype, name, content)
+    def _records_url(self, rtype=None, name=None):
+        url = '/domains/{0}/records'.format(self.domain)
+        if rtype:
+            url += '/{0}'.format(rtype)
+        if name:
+            url += '/{0}'.format(self._record_name(name))
+        return url
 
-        return True
+    def _record_name(self, name):
+        # GoDaddy names the records of the zone apex '@'
+        return self._relative_name(name) or '@'
 
     # GoDaddy provides no identifier for a record, which is a problem
     # where identifiers can be used (delete and update).
@@ -237,34 +350,18 @@ class Provider(BaseProvider):
         if not query_params:
             query_params = {}
 
-        # When editing DNS zone, API is unavailable for few seconds
-        # (until modifications are propagated).
-        # In this case, call to API will return 409 HTTP error.
-        # We use the Retry extension to retry the requests until
-        # we get a processable reponse (402 HTTP status, or an HTTP error != 409)
-        retries = Retry(
-            total=10,
-            backoff_factor=0.5,
-            status_forcelist=[409],
-            method_whitelist=frozenset(
-                ['GET', 'PUT', 'POST', 'DELETE', 'PATCH'])
-        )
-
-        session = requests.Session()
-        session.mount('https://', HTTPAdapter(max_retries=retries))
-
-        result = session.request(action, self.api_endpoint + url,
-                                 params=query_params,
-                                 data=json.dumps(data),
-                                 headers={
-                                     'Content-Type': 'application/json',
-                                     'Accept': 'application/json',
-                                     # GoDaddy use a key/secret pair to authenticate
-                                     'Authorization': 'sso-key {0}:{1}'.format(
-                                         self._get_provider_option(
-                                             'auth_key'),
-                                         self._get_provider_option('auth_secret'))
-                                 })
+        result = self.http_session.request(action, self.api_endpoint + url,
+                                           params=query_params,
+                                           data=json.dumps(data),
+                                           headers={
+                                               'Content-Type': 'application/json',
+                                               'Accept': 'application/json',
+                                               # GoDaddy use a key/secret pair to authenticate
+                                               'Authorization': 'sso-key {0}:{1}'.format(
+                                                   self._get_provider_option(
+                                                       'auth_key'),
+                                                   self._get_provider_option('auth_secret'))
+                                           })
 
         result.raise_for_status()
 
@@ -17,19 +17,25 @@ Second, Google Cloud DNS API contains this really particular patterns:
     ones minus the removed one for removing)
 So all the hard work in this provider, apart from the authentication process, is to convert the
 Lexicon monovalued entries representation to/from the Google multivalued and stacked representation
-through create/update/list/delete processes.
+through create/update/list/delete processes. Modifications are staged locally on the RecordSets
+involved (see _RecordSetsChange), then submitted to the API as a single change, even when several
+operations are applied at once.
 """
 from __future__ import absolute_import
 import binascii
+import copy
+import hashlib
 import json
 import logging
+import threading
 import time
 from base64 import b64decode, urlsafe_b64encode
+from collections import OrderedDict
 
-import requests
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding
+from lexicon import cache, pagination
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -37,6 +43,16 @@ LOGGER = logging.getLogger(__name__)
 
 NAMESERVER_DOMAINS = ['googledomains.com']
 
+TOKEN_CACHES = ('memory', 'disk')
+# Lifetime requested for an access token, and delay before its expiration
+# after which it is considered expired and a new one is requested.
+TOKEN_LIFETIME = 60 * 10
+TOKEN_REFRESH_MARGIN = 60
+
+# Access tokens and managed zone ids, per service account.
+_CREDENTIALS = {}
+_CREDENTIALS_LOCK = threading.Lock()
+
 
 def provider_parser(subparser):
     """Generate a subparser for Google Cloud DNS"""
@@ -50,6 +66,10 @@ def provider_parser(subparser):
         can be either the path of a file prefixed by 'file::' (eg. file::/tmp/service_account_info.json)
         or the base64 encoded content of this file prefixed by 'base64::'
         (eg. base64::eyJhbGciOyJ...)''')
+    subparser.add_argument('--token-cache', choices=TOKEN_CACHES, help='''
+        where to keep the access token and managed zone ids between operations: 'memory' (default)
+        for the lifetime of the process, 'disk' to share them with subsequent Lexicon invocations
+        through the Lexicon cache directory''')
 
 
 class Provider(BaseProvider):
@@ -67,6 +87,7 @@ class Provider(BaseProvider):
         super(Provider, self).__init__(config)
         self.domain_id = None
         self._token = None
+        self._token_expires_at = 0
 
         if self._get_provider_option('auth_service_account_info').startswith('file::'):
             with open(self._get_provider_option('auth_service_account_info')
@@ -98,9 +119,40 @@ class Provider(BaseProvider):
     #     to the Google Cloud DNS API to authenticate the user.
     #   - finally we make a first authenticated request to retrieve
     #     the managed zone id, which will also be used on future requests.
-    # This access token has a default lifetime of 10 minutes,
-    # but is used only for the current Lexicon operation, so it should be sufficient.
+    # This access token has a lifetime of 10 minutes. It is cached with the managed zone ids of
+    # the service account (see _load_credentials), and renewed shortly before it expires.
     def _authenticate(self):
+        credentials = self._load_credentials()
+        self.domain_id = credentials.get('zones', {}).get(self.domain)
+        if not self.domain_id:
+            self._access_token()
+
+            results = self._get('/managedZones')
+
+            targeted_managed_zone_ids = [managedZone['id'] for managedZone
+                                         in results['managedZones']
+                                         if managedZone['dnsName'] == '{0}.'.format(self.domain)]
+
+            if not targeted_managed_zone_ids:
+                raise Exception(
+                    'Error, domain {0} is not registered for this project'.format(self.domain))
+
+            self.domain_id = targeted_managed_zone_ids[0]
+            self._store_credentials(zones={self.domain: self.domain_id})
+
+    # Return a valid access token, using the cached one if it does not expire soon,
+    # otherwise requesting a new one to the Google API.
+    def _access_token(self, force_renew=False):
+        if not force_renew and time.time() < self._token_expires_at - TOKEN_REFRESH_MARGIN:
+            return self._token
+
+        credentials = self._load_credentials()
+        if not force_renew and credentials.get('access_token') \
+                and time.time() < credentials.get('expires_at', 0) - TOKEN_REFRESH_MARGIN:
+            self._token = credentials['access_token']
+            self._token_expires_at = credentials['expires_at']
+            return self._token
+
         jwt_header_bytes = urlsafe_b64encode(json.dumps({
             'alg': 'RS256',
             'typ': 'JWT'
@@ -111,7 +163,7 @@ class Provider(BaseProvider):
             'iss': self._service_account_info['client_email'],
             'scope': 'https://www.googleapis.com/auth/ndev.clouddns.readwrite',
             'aud': 'https://www.googleapis.com/oauth2/v4/token',
-            'exp': epoch_time + 60 * 10,
+            'exp': epoch_time + TOKEN_LIFETIME,
             'iat': epoch_time
         }).encode('utf-8'))
 
@@ -129,7 +181,7 @@ class Provider(BaseProvider):
         jwt_bytes = b'.'.join(
             [jwt_header_bytes, jwt_claims_bytes, jwt_sign_bytes])
 
-        auth_request = requests.request(
+        auth_request = self.http_session.request(
             'POST', 'https://www.googleapis.com/oauth2/v4/token',
             data={
                 'grant_type': 'urn:ietf:params:oauth:grant-type:jwt-bearer',
@@ -148,62 +200,162 @@ class Provider(BaseProvider):
                                 self._get_provider_option('auth_email')))
 
         self._token = post_result['access_token']
-
-        results = self._get('/managedZones')
-
-        targeted_managed_zone_ids = [managedZone['id'] for managedZone in results['managedZones']
-                                     if managedZone['dnsName'] == '{0}.'.format(self.domain)]
-
-        if not targeted_managed_zone_ids:
-            raise Exception(
-                'Error, domain {0} is not registered for this project'.format(self.domain))
-
-        self.domain_id = targeted_managed_zone_ids[0]
+        self._token_expires_at = epoch_time + min(
+            int(post_result.get('expires_in') or TOKEN_LIFETIME), TOKEN_LIFETIME)
+        self._store_credentials(access_token=self._token, expires_at=self._token_expires_at)
+
+        return self._token
+
+    # Credentials (access token and managed zone ids) are shared by every provider instance
+    # using the same service account, and stored in the Lexicon cache with the 'disk' token cache.
+    def _credentials_key(self):
+        return hashlib.sha1('/'.join([
+            self._service_account_info['client_email'],
+            self._service_account_info['project_id'],
+            self._service_account_info['private_key'],
+        ]).encode('utf-8')).hexdigest()
+
+    def _token_cache(self):
+        token_cache = self._get_provider_option('token_cache') or 'memory'
+        if token_cache not in TOKEN_CACHES:
+            raise Exception('Invalid value for --token-cache, should be one of: {0}.'
+                            .format(', '.join(TOKEN_CACHES)))
+        return token_cache
+
+    def _load_credentials(self):
+        key = self._credentials_key()
+        with _CREDENTIALS_LOCK:
+            credentials = _CREDENTIALS.get(key)
+        if credentials is None and self._token_cache() == 'disk':
+            credentials = cache.load('googleclouddns_{0}.json'.format(key))
+            if isinstance(credentials, dict):
+                with _CREDENTIALS_LOCK:
+                    credentials = _CREDENTIALS.setdefault(key, credentials)
+        return dict(credentials) if isinstance(credentials, dict) else {}
+
+    def _store_credentials(self, zones=None, **values):
+        key = self._credentials_key()
+        with _CREDENTIALS_LOCK:
+            credentials = dict(_CREDENTIALS.get(key) or {})
+            credentials.update(values)
+            credentials['zones'] = dict(credentials.get('zones') or {}, **(zones or {}))
+            _CREDENTIALS[key] = credentials
+        if self._token_cache() == 'disk':
+            cache.save('googleclouddns_{0}.json'.format(key), credentials)
 
     # List all records for the given type/name/content.
     # It is quite straight forward to request data, the biggest operation is to convert
     # the stacked multivalued RecordSets into Lexicon monovalued entries.
-    # Please note that we could provide type and name to the API to make the filtering,
-    # but providing the type makes the name mandatory with the Google Cloud DNS API, and
-    # name is not always available (we can ask for every TXT record for example). So to stick to
-    # the most general case, its preferable to always get all records and be free to filter
-    # the way we want afterwards.
+    # RecordSets are filtered by the API on the name if given, and on the type only if the name
+    # is given too (providing the type makes the name mandatory with the Google Cloud DNS API).
+    # Other filters are applied afterwards.
     def _list_records(self, rtype=None, name=None, content=None):
-        results = self._get('/managedZones/{0}/rrsets'.format(self.domain_id))
-
-        records = []
-
-        for rrset in results['rrsets']:
-            for rrdata in rrset['rrdatas']:
-                record = {
-                    'type': rrset['type'],
-                    'name': self._full_name(rrset['name']),
-                    'ttl': rrset['ttl'],
-                    'content': rrdata
-                }
-                self._clean_TXT_record(record)
-                record['id'] = Provider._identifier(record)
-                records.append(record)
-
-        if rtype:
-            records = [record for record in records if record['type'] == rtype]
+        records = list(self._iter_records(rtype, name, content))
+        LOGGER.debug('list_records: %s', records)
+        return records
+
+    def _iter_records(self, rtype=None, name=None, content=None):
+        for rrset in self._iter_rrsets(rtype, name):
+            for record in self._rrset_records(rrset):
+                if rtype and record['type'] != rtype:
+                    continue
+                if name and record['name'] != self._full_name(name):
+                    continue
+                if content and record['content'] != content:
+                    continue
+                yield record
+
+    # Generate the RecordSets of the zone, or of the given name, or of the given type/name pair,
+    # following the nextPageToken of each page of results.
+    def _iter_rrsets(self, rtype=None, name=None):
+        url = '/managedZones/{0}/rrsets'.format(self.domain_id)
+        query_params = OrderedDict()
         if name:
-            records = [record for record in records if record['name']
-                       == self._full_name(name)]
-        if content:
-            records = [
-                record for record in records if record['content'] == content]
+            if rtype:
+                query_params['type'] = rtype
+            query_params['name'] = self._fqdn_name(name)
+
+        def _fetch(page_token):
+            return self._get(url, query_params=dict(query_params, pageToken=page_token)
+                             if page_token else query_params)
+
+        for payload in pagination.iter_cursor_pages(
+                _fetch, lambda payload: payload.get('nextPageToken')):
+            for rrset in payload.get('rrsets', []):
+                yield rrset
+
+    # Convert a RecordSet into Lexicon monovalued entries.
+    def _rrset_records(self, rrset):
+        for rrdata in rrset['rrdatas']:
+            record = {
+                'type': rrset['type'],
+                'name': self._full_name(rrset['name']),
+                'ttl': rrset['ttl'],
+                'content': rrdata
+            }
+            self._clean_TXT_record(record)
+            record['id'] = Provider._identifier(record)
+            yield record
+
+    # Create, update and delete operations are first staged in a _RecordSetsChange, which
+    # holds the RecordSets they need to read and modify, then the change is submitted as one
+    # 'changes' object to the API. Several operations can be staged in the same change,
+    # see _apply_changes.
+    def _create_record(self, rtype, name, content):
+        return self._submit_change({'action': 'create', 'type': rtype, 'name': name,
+                                    'content': content})
 
-        LOGGER.debug('list_records: %s', records)
+    def _update_record(self, identifier, rtype=None, name=None, content=None):
+        return self._submit_change({'action': 'update', 'identifier': identifier,
+                                    'type': rtype, 'name': name, 'content': content})
 
-        return records
+    def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
+        return self._submit_change({'action': 'delete', 'identifier': identifier,
+                                    'type': rtype, 'name': name, 'content': content})
+
+    def _submit_change(self, change):
+        change_set = _RecordSetsChange(self)
+        result = self._stage_change(change_set, change)
+        change_set.submit()
+        return result
+
+    # All changes are submitted at once, and the API applies them atomically: if the change
+    # is rejected, every operation fails.
+    def _apply_changes(self, changes):
+        change_set = _RecordSetsChange(self)
+        results = []
+        for change in changes:
+            try:
+                results.append({'success': True,
+                                'output': self._stage_change(change_set, change)})
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+
+        try:
+            change_set.submit()
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.debug('Changes submission failed.', exc_info=True)
+            results = [{'success': False, 'error': '{0}: {1}'.format(type(error).__name__, error)}
+                       if result['success'] else result for result in results]
+
+        return results
+
+    def _stage_change(self, change_set, change):
+        action = change.get('action')
+        if action == 'create':
+            return self._stage_create(change_set, change)
+        if action == 'update':
+            return self._stage_update(change_set, change)
+        if action == 'delete':
+            return self._stage_delete(change_set, change)
+        raise ValueError('Invalid action statement: {0}'.format(action))
 
     # Create the record with provided type, name and content.
-    # Because of the way this API is constructed, it is quite complex in fact.
-    # Indeed we need to know if there is already a RecordSet for the type/name pair, and update
-    # or create accordingly the RecordSet. Furthermore, we need first to delete the old RecordSet
-    # if it exists, to replace it with the RecordSet containing the new content we want.
-    def _create_record(self, rtype, name, content):
+    # The content is added to the RecordSet of the type/name pair, which is created if needed.
+    def _stage_create(self, change_set, change):
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
         if not rtype or not name or not content:
             raise Exception(
                 'Error, rtype, name and content are mandatory to create a record.')
@@ -211,44 +363,10 @@ class Provider(BaseProvider):
         identifier = Provider._identifier(
             {'type': rtype, 'name': self._full_name(name), 'content': content})
 
-        query_params = {
-            'type': rtype,
-            'name': self._fqdn_name(name)
-        }
-
-        results = self._get(
-            '/managedZones/{0}/rrsets'.format(self.domain_id), query_params=query_params)
-
-        rrdatas = []
-        changes = {}
-        if results['rrsets']:
-            rrset = results['rrsets'][0]
-            for rrdata in rrset['rrdatas']:
-                if rrdata == Provider._normalize_content(rrset['type'], content):
-                    LOGGER.debug(
-                        'create_record (ignored, duplicate): %s', identifier)
-                    return True
-
-            changes['deletions'] = [{
-                'name': rrset['name'],
-                'type': rrset['type'],
-                'ttl': rrset['ttl'],
-                'rrdatas': rrset['rrdatas'][:]
-            }]
-
-            rrdatas = rrset['rrdatas'][:]
-
-        rrdatas.append(Provider._normalize_content(rtype, content))
-
-        changes['additions'] = [{
-            'name': self._fqdn_name(name),
-            'type': rtype,
-            'ttl': self._get_lexicon_option('ttl'),
-            'rrdatas': rrdatas
-        }]
-
-        self._post(
-            '/managedZones/{0}/changes'.format(self.domain_id), data=changes)
+        change_set.load(rtype, name)
+        if not change_set.add(rtype, name, content):
+            LOGGER.debug('create_record (ignored, duplicate): %s', identifier)
+            return True
 
         LOGGER.debug('create_record: %s', identifier)
 
@@ -256,24 +374,22 @@ class Provider(BaseProvider):
 
     # Update a record for the given identifier or type/name pair
     # with the given content if provided.
-    # Again because of the API specification, updating is even more complex than creating,
-    # as we need to take into account every RecordSet that should be destroyed then recreated.
-    # As all the hard work has been done on list_record, create_record and delete_record, we use a
-    # combination of these three methods to obtain the state we want.
-    # Even if this make the operation very costly regarding the number of requests to do, it allows
-    # the implementation to be way more readable (without that, it would take grossly the size of
-    # he three quoted methods).
-    def _update_record(self, identifier, rtype=None, name=None, content=None):
+    # The record is removed from its RecordSet, and the new content is added to the RecordSet
+    # of the new type/name pair, which may be the same one.
+    def _stage_update(self, change_set, change):
+        identifier, rtype = change.get('identifier'), change.get('type')
+        name, content = change.get('name'), change.get('content')
         if not identifier and (not rtype or not name):
             raise Exception(
                 'Error, identifier or rtype+name parameters are required.')
 
         if identifier:
-            records = self._list_records()
+            change_set.load()
             records_to_update = [
-                record for record in records if record['id'] == identifier]
+                record for record in change_set.records() if record['id'] == identifier]
         else:
-            records_to_update = self._list_records(rtype=rtype, name=name)
+            change_set.load(rtype, name)
+            records_to_update = list(change_set.records(rtype=rtype, name=name))
 
         if not records_to_update:
             raise Exception(
@@ -284,132 +400,53 @@ class Provider(BaseProvider):
                 'Warning, multiple records found for given parameters, '
                 'only first one will be updated: %s', records_to_update)
 
-        record_identifier = records_to_update[0]['id']
-
-        original_level = LOGGER.getEffectiveLevel()
-        LOGGER.setLevel(logging.WARNING)
-        self._delete_record(record_identifier)
-
+        record_to_update = records_to_update[0]
         new_record = {
-            'type': rtype if rtype else records_to_update[0]['type'],
-            'name': name if name else records_to_update[0]['name'],
-            'content': content if content else records_to_update[0]['content']
+            'type': rtype if rtype else record_to_update['type'],
+            'name': name if name else record_to_update['name'],
+            'content': content if content else record_to_update['content']
         }
 
-        self._create_record(
-            new_record['type'], new_record['name'], new_record['content'])
-        LOGGER.setLevel(original_level)
+        change_set.load(new_record['type'], new_record['name'])
+        change_set.remove(record_to_update['type'], record_to_update['name'],
+                          record_to_update['content'])
+        change_set.add(new_record['type'], new_record['name'], new_record['content'])
 
-        LOGGER.debug('update_record: %s => %s', record_identifier,
+        LOGGER.debug('update_record: %s => %s', record_to_update['id'],
                      Provider._identifier(new_record))
 
         return True
 
     # Delete a record for the given identifier or the given type/name/content.
-    # Really complex to do, because a lot of RecordSets can be updated (so destroyed and recreated)
-    # depending on the given condition (eg. with content alone, every record could be inspected).
     # There is mainly to cases:
-    #   - either an association of one or more between type, name and content is given
-    #   - either an identifier is given, and we extract the type + name + content
-    #     to process as the first case.
-    # Anyway, we will need to parse every RecordSet available, and for each of them
-    # that matches the conditions:
-    #   - mark as deletion the existing RecordSet
-    #   - remove the targeted content from the RecordSet
-    #   - mark as addition the update RecordSet with the subset of rrdatas if rrdatas is not empty
-    #   - do not mark as additions RecordSets whose rrdatas subset become empty:
-    #     for this type/name pair, all RecordSet needs to go away.
-    def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
-        results = self._get('/managedZones/{0}/rrsets'.format(self.domain_id))
-
+    #   - either an association of one or more between type, name and content is given,
+    #     and every matching record is removed from its RecordSet
+    #   - either an identifier is given, and the corresponding record is removed.
+    # RecordSets whose rrdatas become empty are completely removed from the DNS zone.
+    def _stage_delete(self, change_set, change):
+        identifier, rtype = change.get('identifier'), change.get('type')
+        name, content = change.get('name'), change.get('content')
         if identifier:
-            changes = self._process_records_to_delete_by_identifier(
-                results, identifier)
+            change_set.load()
+            records_to_delete = [
+                record for record in change_set.records() if record['id'] == identifier][:1]
         else:
-            changes = self._process_records_to_delete_by_parameters(
-                results, rtype, name, content)
+            change_set.load(rtype, name)
+            records_to_delete = list(change_set.records(rtype=rtype, name=name,
+                                                        content=content))
 
-        if not changes:
+        if not records_to_delete:
             raise Exception(
                 'Could not find existing record matching the given parameters.')
 
-        self._post(
-            '/managedZones/{0}/changes'.format(self.domain_id), data=changes)
+        for record in records_to_delete:
+            change_set.remove(record['type'], record['name'], record['content'])
 
         LOGGER.debug('delete_records: %s %s %s %s',
                      identifier, rtype, name, content)
 
         return True
 
-    # Calculate the changes to do based on the record to remove identified by its identifier.
-    # This implementation find the corresponding record, and use its type + name + value to
-    # delegate the processing to _process_records_to_delete_by_parameters.
-    def _process_records_to_delete_by_identifier(self, results, identifier):
-        for rrset in results['rrsets']:
-            for rrdata in rrset['rrdatas']:
-                record = {
-                    'type': rrset['type'],
-                    'name': self._full_name(rrset['name']),
-                    'content': rrdata
-                }
-
-                self._clean_TXT_record(record)
-                record_identifier = Provider._identifier(record)
-
-                if identifier == record_identifier:
-                    return self._process_records_to_delete_by_parameters(
-                        results, record['type'], record['name'], record['content'])
-
-        return None
-
-    # Calculate the changes to do based on the records to remove identified by type/name/content.
-    # Additions and deletions are registered accordingly in the changes, and RecordSet with empty
-    # rrdatas after its subset are not marked in additions to be completely removed
-    # from the DNS zone.
-    def _process_records_to_delete_by_parameters(
-            self, results, rtype=None, name=None, content=None):
-        rrsets_to_modify = results['rrsets']
-
-        if rtype:
-            rrsets_to_modify = [
-                rrset for rrset in rrsets_to_modify if rrset['type'] == rtype]
-        if name:
-            rrsets_to_modify = [
-                rrset for rrset in rrsets_to_modify if rrset['name'] == self._fqdn_name(name)]
-        if content:
-            rrsets_to_modify = [rrset for rrset in rrsets_to_modify if ('"{0}"'.format(
-                content) if rrset['type'] == 'TXT' else content) in rrset['rrdatas']]
-
-        changes = {
-            'additions': [],
-            'deletions': []
-        }
-
-        for rrset_to_modify in rrsets_to_modify:
-            changes['deletions'].append({
-                'name': rrset_to_modify['name'],
-                'type': rrset_to_modify['type'],
-                'ttl': rrset_to_modify['ttl'],
-                'rrdatas': rrset_to_modify['rrdatas'][:]
-            })
-
-            if content:
-                new_rrdatas = rrset_to_modify['rrdatas'][:]
-                new_rrdatas.remove('"{0}"'.format(
-                    content) if rrset_to_modify['type'] == 'TXT' else content)
-                if new_rrdatas:
-                    changes['additions'].append({
-                        'name': rrset_to_modify['name'],
-                        'type': rrset_to_modify['type'],
-                        'ttl': rrset_to_modify['ttl'],
-                        'rrdatas': new_rrdatas
-                    })
-
-        if not changes['additions'] and not changes['deletions']:
-            return None
-
-        return changes
-
     # With Google Cloud DNS API, content of CNAME entries must be FQDN (with a trailing dot),
     #   and content of TXT entries must be quoted. This static method ensures that.
     @staticmethod
@@ -442,13 +479,101 @@ class Provider(BaseProvider):
     #     (so the use of 'json' config instead of 'data' in request),
     #   - the body response is also encoded as application/json for GET and POST,
     #   - and the request headers must contain the access token in the 'Authorization' field.
+    # A cached access token may have been revoked: in this case a new one is requested,
+    # and the request is sent again.
     def _request(self, action='GET', url='/', data=None, query_params=None):
-        request = requests.request(action,
-                                   'https://content.googleapis.com/dns/v1/projects/{0}{1}'.format(
-                                       self._service_account_info['project_id'], url),
-                                   params=None if not query_params else query_params,
-                                   json=None if not data else data,
-                                   headers={'Authorization': 'Bearer {0}'.format(self._token)})
+        request_kwargs = {'params': None if not query_params else query_params,
+                          'json': None if not data else data}
+        request = self._send_request(action, url, self._access_token(), **request_kwargs)
+        if request.status_code == 401:
+            LOGGER.debug('Access token rejected, requesting a new one.')
+            request = self._send_request(action, url, self._access_token(force_renew=True),
+                                         **request_kwargs)
 
         request.raise_for_status()
         return request.json()
+
+    def _send_request(self, action, url, token, **kwargs):
+        return self.http_session.request(
+            action,
+            'https://content.googleapis.com/dns/v1/projects/{0}{1}'.format(
+                self._service_account_info['project_id'], url),
+            headers={'Authorization': 'Bearer {0}'.format(token)}, **kwargs)
+
+
+class _RecordSetsChange(object):  # pylint: disable=useless-object-inheritance
+    """
+    Modifications of RecordSets, staged locally before being submitted to the API in one
+    change made of the deletion of the original RecordSets and the addition of the modified ones.
+    RecordSets are fetched once by the first operation needing them.
+    """
+    # pylint: disable=protected-access
+    def __init__(self, provider):
+        self._provider = provider
+        self._original = {}
+        self._current = OrderedDict()
+        self._loaded = set()
+
+    def load(self, rtype=None, name=None):
+        """Fetch the RecordSets of the type/name pair, or all of them, if not done already."""
+        fqdn = self._provider._fqdn_name(name) if name else None
+        rtype = rtype if fqdn else None
+        if {(None, None), (None, fqdn), (rtype, fqdn)} & self._loaded:
+            return
+
+        for rrset in self._provider._iter_rrsets(rtype, name):
+            key = (rrset['name'], rrset['type'])
+            if key not in self._current:
+                rrset = {field: rrset[field] for field in ('name', 'type', 'ttl', 'rrdatas')}
+                self._original[key] = copy.deepcopy(rrset)
+                self._current[key] = rrset
+        self._loaded.add((rtype, fqdn))
+
+    def records(self, rtype=None, name=None, content=None):
+        """Generate the Lexicon records of the loaded RecordSets, as currently modified."""
+        provider = self._provider
+        for rrset in self._current.values():
+            if rtype and rrset['type'] != rtype:
+                continue
+            if name and rrset['name'] != provider._fqdn_name(name):
+                continue
+            for record in provider._rrset_records(rrset):
+                if content and Provider._normalize_content(record['type'], record['content']) \
+                        != Provider._normalize_content(record['type'], content):
+                    continue
+                yield record
+
+    def add(self, rtype, name, content):
+        """Add a content to a RecordSet, return False if it is already there."""
+        key = (self._provider._fqdn_name(name), rtype)
+        rrset = self._current.setdefault(key, {'name': key[0], 'type': rtype, 'rrdatas': []})
+        rrdata = Provider._normalize_content(rtype, content)
+        if rrdata in rrset['rrdatas']:
+            return False
+        rrset['rrdatas'].append(rrdata)
+        rrset['ttl'] = self._provider._get_lexicon_option('ttl')
+        return True
+
+    def remove(self, rtype, name, content):
+        """Remove a content from a RecordSet."""
+        key = (self._provider._fqdn_name(name), rtype)
+        rrset = self._current.get(key)
+        rrdata = Provider._normalize_content(rtype, content)
+        if rrset and rrdata in rrset['rrdatas']:
+            rrset['rrdatas'].remove(rrdata)
+
+    def submit(self):
+        """Submit the change to the API, if any RecordSet has been modified."""
+        changes = {'additions': [], 'deletions': []}
+        for key, rrset in self._current.items():
+            original = self._original.get(key)
+            if original == rrset:
+                continue
+            if original:
+                changes['deletions'].append(original)
+            if rrset['rrdatas']:
+                changes['additions'].append(rrset)
+
+        if changes['additions'] or changes['deletions']:
+            self._provider._post(
+                '/managedZones/{0}/changes'.format(self._provider.domain_id), data=changes)
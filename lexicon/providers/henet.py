@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import logging
 import re
 
-from requests import Session
 # Due to optional requirement
 try:
     from bs4 import BeautifulSoup
@@ -44,8 +43,25 @@ class Provider(BaseProvider):
         self.session = None
 
     def _authenticate(self):
+        # Reuse the web session of a previous login if the web session cache is enabled
+        self.session = self.http_session
+        data = self._restore_web_session(self.session, self._is_logged_in)
+        if data is None:
+            if not self._login():
+                return False
+            data = {}
+
+        domain_ids = data.setdefault('domain_ids', {})
+        if self.domain not in domain_ids:
+            domain_ids[self.domain] = self._find_domain_id()
+            self._store_web_session(self.session, data)
+
+        self.domain_id = domain_ids[self.domain]
+        LOGGER.debug("HENET domain ID: %s", self.domain_id)
+        return True
+
+    def _login(self):
         # Create the session GET the login page to retrieve a session cookie
-        self.session = Session()
         self.session.get(
             "https://dns.he.net/"
         )
@@ -64,7 +80,9 @@ class Provider(BaseProvider):
         if html.find("div", {"id": "dns_err"}) is not None:
             LOGGER.warning("HE login failed, check HE_USER and HE_PASS")
             return False
+        return True
 
+    def _find_domain_id(self):
         # Make an authenticated GET to the DNS management page
         zones_response = self.session.get("https://dns.he.net")
 
@@ -76,9 +94,21 @@ class Provider(BaseProvider):
             LOGGER.warning("Domain %s not found in account", self.domain)
             raise AssertionError("Domain {0} not found in account".format(self.domain))
 
-        self.domain_id = zone_img["value"]
-        LOGGER.debug("HENET domain ID: %s", self.domain_id)
-        return True
+        return zone_img["value"]
+
+    def _is_logged_in(self, data):
+        # Probe the zone page of the domain if known, otherwise the DNS management page:
+        # the login form is displayed instead if the session has been closed.
+        domain_id = data.get('domain_ids', {}).get(self.domain)
+        if domain_id:
+            url = "https://dns.he.net/?hosted_dns_zoneid={0}&menu=edit_zone" \
+                  "&hosted_dns_editzone".format(domain_id)
+        else:
+            url = "https://dns.he.net/"
+        response = self.session.get(url)
+
+        html = BeautifulSoup(response.content, "html.parser")
+        return response.status_code == 200 and html.find("input", {"name": "pass"}) is None
 
     # Create record. If record already exists with the same content, do nothing
     def _create_record(self, rtype, name, content):
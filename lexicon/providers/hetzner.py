@@ -3,13 +3,12 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 
 from contextlib import contextmanager
+import copy
 import hashlib
 import logging
 import re
 import time
-import requests
 from six import string_types
-from urllib3.util.retry import Retry
 
 # Due to optional requirement
 try:
@@ -19,6 +18,7 @@ try:
 except ImportError:
     pass
 
+from lexicon import pool
 from lexicon.providers.base import Provider as BaseProvider
 
 LOGGER = logging.getLogger(__name__)
@@ -150,6 +150,7 @@ class Provider(BaseProvider):
             }
         }
         self.session = None
+        self._web_session_data = {}
 
         self.account = self._get_provider_option('auth_account')
         if self.account in (None, 'robot', 'konsoleh'):
@@ -178,31 +179,10 @@ class Provider(BaseProvider):
         content for record to create.
         """
         with self._session(self.domain, self.domain_id) as ddata:
-            # Validate method parameters
-            if not rtype or not name or not content:
-                LOGGER.warning('Hetzner => Record has no rtype|name|content specified')
+            change = {'type': rtype, 'name': name, 'content': content}
+            if not self._create_record_in_zone(ddata, change):
                 return False
-
-            # Add record to zone
-            name = ddata['cname'] if ddata['cname'] else self._fqdn_name(name)
-            rrset = ddata['zone']['data'].get_rdataset(name, rdtype=rtype, create=True)
-            for rdata in rrset:
-                if self._convert_content(rtype, content) == rdata.to_text():
-                    LOGGER.info('Hetzner => Record with content \'%s\' already exists',
-                                content)
-                    return True
-
-            ttl = (rrset.ttl if 0 < rrset.ttl < self._get_lexicon_option('ttl')
-                   else self._get_lexicon_option('ttl'))
-            rdataset = dns.rdataset.from_text(rrset.rdclass, rrset.rdtype,
-                                              ttl, self._convert_content(rtype, content))
-            rrset.update(rdataset)
-            # Post zone to Hetzner
-            synced_change = self._post_zone(ddata['zone'])
-            if synced_change:
-                self._propagated_record(rtype, name, self._convert_content(rtype, content),
-                                        ddata['nameservers'])
-            return synced_change
+            return self._commit_zone(ddata)
 
     def _list_records(self, rtype=None, name=None, content=None):
         """
@@ -213,74 +193,17 @@ class Provider(BaseProvider):
             name = self._fqdn_name(name) if name else None
             return self._list_records_in_zone(ddata['zone']['data'], rtype, name, content)
 
-    def _update_record(self, identifier=None, rtype=None, name=None, content=None):  # pylint: disable=too-many-locals,too-many-branches
+    def _update_record(self, identifier=None, rtype=None, name=None, content=None):
         """
         Connects to Hetzner account, changes an existing record and returns a boolean,
         if update was successful or not. Needed identifier or rtype & name to lookup
         over all records of the zone for exactly one record to update.
         """
         with self._session(self.domain, self.domain_id) as ddata:
-            # Validate method parameters
-            if identifier:
-                dtype, dname, dcontent = self._parse_identifier(identifier, ddata['zone']['data'])
-                if dtype and dname and dcontent:
-                    rtype = rtype if rtype else dtype
-                    name = name if name else dname
-                    content = content if content else dcontent
-                else:
-                    LOGGER.warning('Hetzner => Record with identifier \'%s\' does not exist',
-                                   identifier)
-                    return False
-
-            elif rtype and name and content:
-                dtype, dname, dcontent = rtype, name, None
-            else:
-                LOGGER.warning('Hetzner => Record has no rtype|name|content specified')
+            change = {'identifier': identifier, 'type': rtype, 'name': name, 'content': content}
+            if not self._update_record_in_zone(ddata, change):
                 return False
-
-            dname = ddata['cname'] if ddata['cname'] else self._fqdn_name(dname)
-            records = self._list_records_in_zone(ddata['zone']['data'], dtype, dname, dcontent)
-            if len(records) == 1:
-                # Remove record from zone
-                rrset = ddata['zone']['data'].get_rdataset(records[0]['name'] + '.',
-                                                           rdtype=records[0]['type'])
-                rdatas = []
-                for rdata in rrset:
-                    if self._convert_content(records[0]['type'],
-                                             records[0]['content']) != rdata.to_text():
-                        rdatas.append(rdata.to_text())
-                if rdatas:
-                    rdataset = dns.rdataset.from_text_list(rrset.rdclass, rrset.rdtype,
-                                                           records[0]['ttl'], rdatas)
-                    ddata['zone']['data'].replace_rdataset(records[0]['name'] + '.', rdataset)
-                else:
-                    ddata['zone']['data'].delete_rdataset(records[0]['name'] + '.',
-                                                          records[0]['type'])
-                # Add record to zone
-                name = ddata['cname'] if ddata['cname'] else self._fqdn_name(name)
-                rrset = ddata['zone']['data'].get_rdataset(name, rdtype=rtype, create=True)
-                synced_change = False
-                for rdata in rrset:
-                    if self._convert_content(rtype, content) == rdata.to_text():
-                        LOGGER.info('Hetzner => Record with content \'%s\' already exists',
-                                    content)
-                        synced_change = True
-                        break
-                if not synced_change:
-                    ttl = (rrset.ttl if 0 < rrset.ttl < self._get_lexicon_option('ttl')
-                           else self._get_lexicon_option('ttl'))
-                    rdataset = dns.rdataset.from_text(rrset.rdclass, rrset.rdtype, ttl,
-                                                      self._convert_content(rtype, content))
-                    rrset.update(rdataset)
-                # Post zone to Hetzner
-                synced_change = self._post_zone(ddata['zone'])
-                if synced_change:
-                    self._propagated_record(rtype, name, self._convert_content(rtype, content),
-                                            ddata['nameservers'])
-                return synced_change
-
-            LOGGER.warning('Hetzner => Record lookup has not only one match')
-            return False
+            return self._commit_zone(ddata)
 
     def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
         """
@@ -289,39 +212,221 @@ class Provider(BaseProvider):
         lookup over all records of the zone for one or more records to delete.
         """
         with self._session(self.domain, self.domain_id) as ddata:
-            # Validate method parameters
-            if identifier:
-                rtype, name, content = self._parse_identifier(identifier, ddata['zone']['data'])
-                if rtype is None or name is None or content is None:
-                    LOGGER.info('Hetzner => Record with identifier \'%s\' does not exist',
-                                identifier)
-                    return True
-
-            name = ddata['cname'] if ddata['cname'] else (self._fqdn_name(name) if name else None)
-            records = self._list_records_in_zone(ddata['zone']['data'], rtype, name, content)
-            if records:
-                # Remove records from zone
-                for record in records:
-                    rrset = ddata['zone']['data'].get_rdataset(record['name'] + '.',
-                                                               rdtype=record['type'])
-                    rdatas = []
-                    for rdata in rrset:
-                        if self._convert_content(record['type'],
-                                                 record['content']) != rdata.to_text():
-                            rdatas.append(rdata.to_text())
-                    if rdatas:
-                        rdataset = dns.rdataset.from_text_list(rrset.rdclass, rrset.rdtype,
-                                                               record['ttl'], rdatas)
-                        ddata['zone']['data'].replace_rdataset(record['name'] + '.', rdataset)
-                    else:
-                        ddata['zone']['data'].delete_rdataset(record['name'] + '.', record['type'])
-                # Post zone to Hetzner
-                synced_change = self._post_zone(ddata['zone'])
-                return synced_change
+            change = {'identifier': identifier, 'type': rtype, 'name': name, 'content': content}
+            if not self._delete_record_in_zone(ddata, change):
+                return False
+            return self._commit_zone(ddata)
+
+    def _apply_changes(self, changes):
+        """
+        Connects once to Hetzner account, applies all changes to the zone and posts the zone
+        once, so the latency of Hetzner Robot after a zone update is waited only once. A change
+        of a record with linked CNAME (see --linked parameter) is applied on its own to the zone
+        of the CNAME target, in order with the other changes. Returns one result per change.
+        """
+        results, batch = [], []
+        for change in changes:
+            name, link = self._link_record(change)
+            if link and Provider._get_dns_cname(name, link)[2]:
+                results.extend(self._apply_changes_in_session(batch))
+                results.extend(self._apply_changes_in_session([change], linked=change))
+                batch = []
+            else:
+                batch.append(change)
+        results.extend(self._apply_changes_in_session(batch))
+        return results
+
+    def _apply_changes_in_session(self, changes, linked=False):
+        """
+        Applies the changes to the zone of one session and posts the zone once, if any change
+        was given. Returns one result per change.
+        """
+        results = []
+        if not changes:
+            return results
+        with self._session(self.domain, self.domain_id, linked=linked) as ddata:
+            for change in changes:
+                backup = copy.deepcopy(ddata['zone']['data'])
+                try:
+                    if self._apply_change_in_zone(ddata, change):
+                        results.append({'success': True, 'output': True})
+                        continue
+                    error = 'Hetzner => Change could not be applied to the zone'
+                except Exception as exc:  # pylint: disable=broad-except
+                    LOGGER.debug('Hetzner => Change %s failed', change, exc_info=True)
+                    error = '{0}: {1}'.format(type(exc).__name__, exc)
+                ddata['zone']['data'] = backup
+                results.append({'success': False, 'error': error})
+
+            if not self._commit_zone(ddata):
+                results = [{'success': False, 'error': 'Hetzner => Unable to update zone'}
+                           if result['success'] else result for result in results]
+        return results
+
+    def _apply_change_in_zone(self, ddata, change):
+        action = change.get('action')
+        if action == 'create':
+            return self._create_record_in_zone(ddata, change)
+        if action == 'update':
+            return self._update_record_in_zone(ddata, change)
+        if action == 'delete':
+            return self._delete_record_in_zone(ddata, change)
+        raise ValueError('Invalid action statement: {0}'.format(action))
+
+    ###############################################################################
+    # Zone edit helpers
+    ###############################################################################
+
+    def _create_record_in_zone(self, ddata, change):
+        """
+        Adds a new record to the zone of the session and returns a boolean, if creation
+        was successful or not. The zone is not posted to Hetzner (see _commit_zone).
+        """
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+        # Validate method parameters
+        if not rtype or not name or not content:
+            LOGGER.warning('Hetzner => Record has no rtype|name|content specified')
+            return False
+
+        # Add record to zone
+        name = ddata['cname'] if ddata['cname'] else self._fqdn_name(name)
+        rrset = ddata['zone']['data'].get_rdataset(name, rdtype=rtype, create=True)
+        for rdata in rrset:
+            if self._convert_content(rtype, content) == rdata.to_text():
+                LOGGER.info('Hetzner => Record with content \'%s\' already exists',
+                            content)
+                return True
+
+        ttl = (rrset.ttl if 0 < rrset.ttl < self._get_lexicon_option('ttl')
+               else self._get_lexicon_option('ttl'))
+        rdataset = dns.rdataset.from_text(rrset.rdclass, rrset.rdtype,
+                                          ttl, self._convert_content(rtype, content))
+        rrset.update(rdataset)
+        ddata['changed'] = True
+        ddata['propagate'].append((rtype, name, self._convert_content(rtype, content)))
+        return True
+
+    # pylint: disable=too-many-locals,too-many-branches
+    def _update_record_in_zone(self, ddata, change):
+        """
+        Changes an existing record in the zone of the session and returns a boolean, if update
+        was successful or not. The zone is not posted to Hetzner (see _commit_zone).
+        """
+        identifier, rtype = change.get('identifier'), change.get('type')
+        name, content = change.get('name'), change.get('content')
+        # Validate method parameters
+        if identifier:
+            dtype, dname, dcontent = self._parse_identifier(identifier, ddata['zone']['data'])
+            if dtype and dname and dcontent:
+                rtype = rtype if rtype else dtype
+                name = name if name else dname
+                content = content if content else dcontent
+            else:
+                LOGGER.warning('Hetzner => Record with identifier \'%s\' does not exist',
+                               identifier)
+                return False
+
+        elif rtype and name and content:
+            dtype, dname, dcontent = rtype, name, None
+        else:
+            LOGGER.warning('Hetzner => Record has no rtype|name|content specified')
+            return False
+
+        dname = ddata['cname'] if ddata['cname'] else self._fqdn_name(dname)
+        records = self._list_records_in_zone(ddata['zone']['data'], dtype, dname, dcontent)
+        if len(records) != 1:
+            LOGGER.warning('Hetzner => Record lookup has not only one match')
+            return False
 
+        # Remove record from zone
+        rrset = ddata['zone']['data'].get_rdataset(records[0]['name'] + '.',
+                                                   rdtype=records[0]['type'])
+        rdatas = []
+        for rdata in rrset:
+            if self._convert_content(records[0]['type'],
+                                     records[0]['content']) != rdata.to_text():
+                rdatas.append(rdata.to_text())
+        if rdatas:
+            rdataset = dns.rdataset.from_text_list(rrset.rdclass, rrset.rdtype,
+                                                   records[0]['ttl'], rdatas)
+            ddata['zone']['data'].replace_rdataset(records[0]['name'] + '.', rdataset)
+        else:
+            ddata['zone']['data'].delete_rdataset(records[0]['name'] + '.',
+                                                  records[0]['type'])
+        # Add record to zone
+        name = ddata['cname'] if ddata['cname'] else self._fqdn_name(name)
+        rrset = ddata['zone']['data'].get_rdataset(name, rdtype=rtype, create=True)
+        exists = False
+        for rdata in rrset:
+            if self._convert_content(rtype, content) == rdata.to_text():
+                LOGGER.info('Hetzner => Record with content \'%s\' already exists',
+                            content)
+                exists = True
+                break
+        if not exists:
+            ttl = (rrset.ttl if 0 < rrset.ttl < self._get_lexicon_option('ttl')
+                   else self._get_lexicon_option('ttl'))
+            rdataset = dns.rdataset.from_text(rrset.rdclass, rrset.rdtype, ttl,
+                                              self._convert_content(rtype, content))
+            rrset.update(rdataset)
+        ddata['changed'] = True
+        ddata['propagate'].append((rtype, name, self._convert_content(rtype, content)))
+        return True
+
+    def _delete_record_in_zone(self, ddata, change):
+        """
+        Removes existing records from the zone of the session and returns a boolean, if deletion
+        was successful or not. The zone is not posted to Hetzner (see _commit_zone).
+        """
+        identifier, rtype = change.get('identifier'), change.get('type')
+        name, content = change.get('name'), change.get('content')
+        # Validate method parameters
+        if identifier:
+            rtype, name, content = self._parse_identifier(identifier, ddata['zone']['data'])
+            if rtype is None or name is None or content is None:
+                LOGGER.info('Hetzner => Record with identifier \'%s\' does not exist',
+                            identifier)
+                return True
+
+        name = ddata['cname'] if ddata['cname'] else (self._fqdn_name(name) if name else None)
+        records = self._list_records_in_zone(ddata['zone']['data'], rtype, name, content)
+        if not records:
             LOGGER.info('Hetzner => Record lookup has no matches')
             return True
 
+        # Remove records from zone
+        for record in records:
+            rrset = ddata['zone']['data'].get_rdataset(record['name'] + '.',
+                                                       rdtype=record['type'])
+            rdatas = []
+            for rdata in rrset:
+                if self._convert_content(record['type'],
+                                         record['content']) != rdata.to_text():
+                    rdatas.append(rdata.to_text())
+            if rdatas:
+                rdataset = dns.rdataset.from_text_list(rrset.rdclass, rrset.rdtype,
+                                                       record['ttl'], rdatas)
+                ddata['zone']['data'].replace_rdataset(record['name'] + '.', rdataset)
+            else:
+                ddata['zone']['data'].delete_rdataset(record['name'] + '.', record['type'])
+        ddata['changed'] = True
+        return True
+    # pylint: enable=too-many-locals,too-many-branches
+
+    def _commit_zone(self, ddata):
+        """
+        Posts the zone of the session to Hetzner if it has been changed, then waits until the
+        created or updated records are publicly propagated. Returns a boolean, if the zone is
+        up to date on Hetzner or not.
+        """
+        if not ddata['changed']:
+            return True
+        synced_change = self._post_zone(ddata['zone'])
+        if synced_change:
+            for rtype, name, content in ddata['propagate']:
+                self._propagated_record(rtype, name, content, ddata['nameservers'])
+        return synced_change
+
     ###############################################################################
     # Provider base helpers
     ###############################################################################
@@ -488,18 +593,20 @@ class Provider(BaseProvider):
             LOGGER.info('Hetzner => Record %s has CNAME %s', name, cname)
         return domain, nameservers, cname
 
-    def _link_record(self):
+    def _link_record(self, change=None):
         """
         Checks restrictions for use of CNAME lookup and returns a tuple of the
         fully qualified record name to lookup and a boolean, if a CNAME lookup
         should be done or not. The fully qualified record name is empty if no
-        record name is specified by this provider.
-        """
-        action = self._get_lexicon_option('action')
-        identifier = self._get_lexicon_option('identifier')
-        rdtype = self._get_lexicon_option('type')
-        name = (self._fqdn_name(self._get_lexicon_option('name'))
-                if self._get_lexicon_option('name') else None)
+        record name is specified by this provider. Checks the given change of
+        a batch instead of the lexicon options, if any.
+        """
+        if change is None:
+            change = {key: self._get_lexicon_option(key)
+                      for key in ('action', 'identifier', 'type', 'name')}
+        action, identifier = change.get('action'), change.get('identifier')
+        rdtype = change.get('type')
+        name = self._fqdn_name(change.get('name')) if change.get('name') else None
         link = self._get_provider_option('linked')
         qname = name
         if identifier:
@@ -581,15 +688,20 @@ class Provider(BaseProvider):
         return str(match.group(1))
 
     @contextmanager
-    def _session(self, domain, domain_id=None, get_zone=True):
+    def _session(self, domain, domain_id=None, get_zone=True, linked=True):
         """
         Generates, authenticates and exits session to Hetzner account, and
         provides tuple of additional needed domain data (domain nameservers,
         zone and linked record name) to public methods. The tuple parameters
         are empty if not existent or specified. Exits session and raises error
-        if provider fails during session.
+        if provider fails during session. The linked record name is looked up
+        for the given change of a batch, if linked is a change, and skipped if
+        linked is False.
         """
-        name, link = self._link_record()
+        if linked:
+            name, link = self._link_record(linked if isinstance(linked, dict) else None)
+        else:
+            name, link = None, False
         qdomain, nameservers, cname = Provider._get_dns_cname(
             (name if name else domain + '.'), link)
         qdomain_id, zone = domain_id, None
@@ -601,7 +713,8 @@ class Provider(BaseProvider):
                 self.domain_id = qdomain_id
             if get_zone:
                 zone = self._get_zone(qdomain, qdomain_id)
-            yield {'nameservers': nameservers, 'zone': zone, 'cname': cname}
+            yield {'nameservers': nameservers, 'zone': zone, 'cname': cname,
+                   'changed': False, 'propagate': []}
         except Exception as exc:
             raise exc
         finally:
@@ -614,10 +727,14 @@ class Provider(BaseProvider):
         """
         api = self.api[self.account]['auth']
         endpoint = api.get('endpoint', self.api[self.account]['endpoint'])
-        session = requests.Session()
-        session_retries = Retry(total=10, backoff_factor=0.5)
-        session_adapter = requests.adapters.HTTPAdapter(max_retries=session_retries)
-        session.mount('https://', session_adapter)
+        session = pool.build_session(self.config, max_retries=10, backoff_factor=0.5,
+                                     rate_limiter=self._rate_limiter())
+        self._web_session_data = self._restore_web_session(
+            session, lambda data: self._is_authenticated(session))
+        if self._web_session_data is not None:
+            LOGGER.info('Hetzner => Reuse session with %s account \'%s\'',
+                        self.account, username)
+            return session
         response = session.request('GET', endpoint + api['GET'].get('url', '/'))
         dom = Provider._filter_dom(response.text, api['filter'])
         data = Provider._extract_hidden_data(dom)
@@ -630,13 +747,30 @@ class Provider(BaseProvider):
             raise AssertionError
         LOGGER.info('Hetzner => Authenticate session with %s account \'%s\'',
                     self.account, username)
+        self._web_session_data = {}
+        self._store_web_session(session, self._web_session_data)
         return session
 
+    def _is_authenticated(self, session):
+        """
+        Requests the start page of Hetzner account with given session and returns a boolean,
+        if the session is still authenticated or not (the login form is shown otherwise).
+        """
+        api = self.api[self.account]
+        response = session.request('GET', api['endpoint'] + '/')
+        return (response.status_code == 200
+                and not Provider._filter_dom(response.text, api['auth']['filter']))
+
     def _exit_session(self):
         """
         Exits session to Hetzner account and returns.
         """
         api = self.api[self.account]
+        storage, _ = self._web_session_cache_settings()
+        if storage:
+            LOGGER.info('Hetzner => Keep session for subsequent operations')
+            self.session = None
+            return True
         response = self._get(api['exit']['GET']['url'])
         if not Provider._filter_dom(response.text, api['filter']):
             LOGGER.info('Hetzner => Exit session')
@@ -645,6 +779,10 @@ class Provider(BaseProvider):
         self.session = None
         return True
 
+    def _web_session_key(self):
+        # The same username may exist on Hetzner Robot and on Hetzner konsoleH
+        return (self.provider_name, self.account, self.username)
+
     def _get_domain_id(self, domain):
         """
         Pulls all domains managed by authenticated Hetzner account, extracts their IDs
@@ -652,6 +790,10 @@ class Provider(BaseProvider):
         """
         api = self.api[self.account]['domain_id']
         qdomain = dns.name.from_text(domain).to_unicode(True)
+        domain_ids = self._web_session_data.setdefault('domain_ids', {})
+        if qdomain in domain_ids:
+            LOGGER.info('Hetzner => Get ID %s for domain %s', domain_ids[qdomain], qdomain)
+            return domain_ids[qdomain]
         domains, last_count, page = {}, -1, 0
         while last_count != len(domains):
             last_count = len(domains)
@@ -670,6 +812,8 @@ class Provider(BaseProvider):
                 domains[domain] = domain_id
                 if domain == qdomain:
                     LOGGER.info('Hetzner => Get ID %s for domain %s', domain_id, qdomain)
+                    domain_ids[qdomain] = domain_id
+                    self._store_web_session(self.session, self._web_session_data)
                     return domain_id
         LOGGER.error('Hetzner => ID for domain %s does not exists', qdomain)
         raise AssertionError
@@ -3,7 +3,6 @@ from __future__ import absolute_import
 
 import json
 import logging
-import requests
 
 from lexicon.providers.base import Provider as BaseProvider
 
@@ -31,14 +30,14 @@ class Provider(BaseProvider):
 
     def _authenticate(self):
         # Getting required cookies "hover_session" and "hoverauth"
-        response = requests.get("https://www.hover.com/signin")
+        response = self.http_session.get("https://www.hover.com/signin")
         self.cookies["hover_session"] = response.cookies['hover_session']
 
         payload = {"username": self._get_provider_option('auth_username'),
                    "password": self._get_provider_option('auth_password')}
-        response = requests.post("https://www.hover.com/signin/auth.json",
-                                 json=payload,
-                                 cookies=self.cookies)
+        response = self.http_session.post("https://www.hover.com/signin/auth.json",
+                                          json=payload,
+                                          cookies=self.cookies)
         response.raise_for_status()
 
         if "hoverauth" not in response.cookies:
@@ -168,11 +167,11 @@ class Provider(BaseProvider):
             data = {}
         if query_params is None:
             query_params = {}
-        response = requests.request(action, self.api_endpoint + url,
-                                    params=query_params,
-                                    data=json.dumps(data),
-                                    cookies=self.cookies,
-                                    headers={'Content-Type': 'application/json'})
+        response = self.http_session.request(action, self.api_endpoint + url,
+                                             params=query_params,
+                                             data=json.dumps(data),
+                                             cookies=self.cookies,
+                                             headers={'Content-Type': 'application/json'})
 
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
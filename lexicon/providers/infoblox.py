@@ -18,7 +18,6 @@ from __future__ import absolute_import
 
 import logging
 import json
-import requests
 
 from lexicon.providers.base import Provider as BaseProvider
 
@@ -64,7 +63,7 @@ class Provider(BaseProvider):
         self.domain_id = None
         self.version_id = None
         self.view = self._get_provider_option('ib_view')
-        self.session = requests.session()
+        self.session = self.http_session
         self.session.auth = (self._get_provider_option('auth_user'),
                              self._get_provider_option('auth_psw'))
         self.version = '2.6.1' #WAPI version supported by NIOS 8.3 and above
@@ -94,9 +93,7 @@ class Provider(BaseProvider):
         else:
             raise Exception('Name not specified, no FQDN could be build')
         # Find existing records for all types
-        existing = []
-        for rrtype in IB_TYPE2CONTENT:
-            existing = existing + self._list_records(rtype=rrtype, name=name)
+        existing = self._list_records(name=name)
         # we don't want to delete all existing A,AAAA,TXT,SRV,MX,NS records
         # which can not co-exist with CNAMEs
         if any(d['type'] == rtype for d in existing):
@@ -143,11 +140,14 @@ class Provider(BaseProvider):
     # If possible filter during the query, otherwise filter after response is received.
     def _list_records(self, rtype=None, name=None, content=None):
         # Infoblox stores entries based on their type, if type is not specified look up all types
+        # Types are queried concurrently, and results merged in the order of IB_TYPE2CONTENT.
         if not rtype:
             records = []
-            for one_rtype in IB_TYPE2CONTENT:
-                records = records + self._list_records_internal(
-                    rtype=one_rtype, name=name, content=content)
+            for type_records in self._parallel_map(
+                    lambda one_rtype: self._list_records_internal(
+                        rtype=one_rtype, name=name, content=content),
+                    IB_TYPE2CONTENT):
+                records.extend(type_records)
             return records
         return self._list_records_internal(rtype=rtype, name=name, content=content)
 
@@ -17,7 +17,6 @@ import hashlib
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -36,6 +35,9 @@ def provider_parser(subparser):
 
 class Provider(BaseProvider):
     """Provider class for internetbs"""
+    # Limits given by the support for an account without any registered domain (N = 0)
+    rate_limits = ((60, 60), (500, 3600), (1000, 86400), (2000, 604800), (3000, 2592000))
+
     def __init__(self, config):
         super(Provider, self).__init__(config)
         self.domain_id = None
@@ -182,9 +184,9 @@ class Provider(BaseProvider):
         query_params['ResponseFormat'] = 'json'
         query_params['ApiKey'] = self._get_provider_option('auth_key')
         query_params['Password'] = self._get_provider_option('auth_password')
-        request = requests.request(action, self.api_endpoint + url, params=query_params,
-                                   data=json.dumps(data),
-                                   headers={'Content-Type': 'application/json'})
+        request = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                            data=json.dumps(data),
+                                            headers={'Content-Type': 'application/json'})
         # if the request fails for any reason, throw an error.
         request.raise_for_status()
         return request.json()
@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -129,9 +128,9 @@ class Provider(BaseProvider):
         query_params['resultFormat'] = 'JSON'
         query_params['api_action'] = url
 
-        response = requests.request(action, self.api_endpoint, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers)
+        response = self.http_session.request(action, self.api_endpoint, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         if action == 'DELETE':
@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -55,20 +54,21 @@ class Provider(BaseProvider):
     # type, name and content are used to filter records.
     # If possible filter during the query, otherwise filter after response is received.
     def _list_records(self, rtype=None, name=None, content=None):
+        processed_records = list(self._iter_records(rtype, name, content))
+        LOGGER.debug('list_records: %s', processed_records)
+        return processed_records
+
+    def _iter_records(self, rtype=None, name=None, content=None):
         resources_url = "domains/{0}/records".format(self.domain_id)
 
         if name:
             name = self._relative_name(name)
 
-        processed_records = []
-
-        payload = self._get(resources_url)
-        for page in range(1, payload['pages'] + 1, 1):
-            if page > 1:
-                payload = self._get(resources_url, query_params={
+        for payload in self._iter_numbered_pages(
+                lambda page: self._get(resources_url, query_params={
                     'page': page
-                })
-
+                } if page > 1 else None),
+                lambda payload: payload['pages']):
             resource_list = payload['data']
             if rtype:
                 resource_list = [
@@ -81,16 +81,13 @@ class Provider(BaseProvider):
                     resource for resource in resource_list if resource['target'] == content]
 
             for resource in resource_list:
-                processed_records.append({
+                yield {
                     'id': resource['id'],
                     'type': resource['type'],
                     'name': self._full_name(resource['name']),
                     'ttl': resource['ttl_sec'],
                     'content': resource['target']
-                })
-
-        LOGGER.debug('list_records: %s', processed_records)
-        return processed_records
+                }
 
     # Create or update a record.
     def _update_record(self, identifier, rtype=None, name=None, content=None):
@@ -151,9 +148,9 @@ class Provider(BaseProvider):
 
         request_url = "{0}{1}".format(self.api_endpoint, url)
 
-        response = requests.request(action, request_url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers)
+        response = self.http_session.request(action, request_url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         if action == 'DELETE':
@@ -1,7 +1,14 @@
 """Module provider for a localzone"""
 from __future__ import absolute_import, print_function
+from contextlib import contextmanager
+import hashlib
 import logging
+import os
+import shutil
+import tempfile
+import threading
 
+from lexicon import cache
 from .base import Provider as BaseProvider
 
 
@@ -17,6 +24,11 @@ LOGGER = logging.getLogger(__name__)
 
 NAMESERVER_DOMAINS = []
 
+# Parsed zones, by path of their master file and origin, with the stat of the file they were
+# parsed from: a zone is parsed again only if its master file has been modified since.
+_ZONES = {}
+_ZONES_LOCK = threading.RLock()
+
 
 def provider_parser(subparser):
     """Configure provider parserfor a localzone"""
@@ -32,6 +44,7 @@ class Provider(BaseProvider):
         self.domain = self._get_lexicon_option("domain")
         self.origin = self.domain + "."
         self.filename = self._get_provider_option("filename")
+        self._transaction = None
 
     def _authenticate(self):
         # Authentication is not required for localzone.
@@ -50,8 +63,9 @@ class Provider(BaseProvider):
         if self.ttl:
             ttl = self.ttl
 
-        with localzone.manage(self.filename, self.origin, autosave=True) as zone:
-            if zone.add_record(name, rtype, content, ttl=ttl):  # pylint: disable=no-member
+        with self._zone_transaction() as transaction:
+            if transaction.zone.add_record(name, rtype, content, ttl=ttl):
+                transaction.modified = True
                 result = True
 
         LOGGER.debug("create_record: %s", result)
@@ -70,8 +84,12 @@ class Provider(BaseProvider):
 
         filter_query = {"rdtype": rtype, "name": name, "content": content}
 
-        with localzone.manage(self.filename, self.origin, autosave=True) as zone:
-            records = zone.find_record(**filter_query)  # pylint: disable=no-member
+        if self._transaction is not None:
+            records = self._transaction.zone.find_record(**filter_query)
+        else:
+            # Reads use the cached zone, and never save it.
+            with _ZONES_LOCK:
+                records = _load_zone(self._zone_path(), self.origin).find_record(**filter_query)
 
         result = []
         for record in records:
@@ -97,17 +115,18 @@ class Provider(BaseProvider):
         """
         result = False
 
-        # TODO: some providers allow content-based updates without supplying an
-        # ID, and therefore `identifier` is here optional. If we don't receive
-        # an ID, look it up.
-        if not identifier and rtype and name:
-            records = self._list_records(rtype, name)
-            if len(records) == 1:
-                identifier = records[0]["id"]
-
-        if identifier and content:
-            with localzone.manage(self.filename, self.origin, autosave=True) as zone:
-                if zone.update_record(identifier, content):  # pylint: disable=no-member
+        with self._zone_transaction() as transaction:
+            # TODO: some providers allow content-based updates without supplying an
+            # ID, and therefore `identifier` is here optional. If we don't receive
+            # an ID, look it up.
+            if not identifier and rtype and name:
+                records = self._list_records(rtype, name)
+                if len(records) == 1:
+                    identifier = records[0]["id"]
+
+            if identifier and content:
+                transaction.modified = True
+                if transaction.zone.update_record(identifier, content):
                     result = True
 
         LOGGER.debug("update_record: %s", result)
@@ -120,22 +139,113 @@ class Provider(BaseProvider):
         """
         ids = []
 
-        if identifier:
-            ids.append(identifier)
-        elif not identifier and rtype and name:
-            records = self._list_records(rtype, name, content)
-            if records:
-                ids = [record["id"] for record in records]
-
-        if ids:
-            LOGGER.debug("delete_records: %s", ids)
-            with localzone.manage(self.filename, self.origin, autosave=True) as zone:
+        with self._zone_transaction() as transaction:
+            if identifier:
+                ids.append(identifier)
+            elif not identifier and rtype and name:
+                records = self._list_records(rtype, name, content)
+                if records:
+                    ids = [record["id"] for record in records]
+
+            if ids:
+                LOGGER.debug("delete_records: %s", ids)
+                transaction.modified = True
                 for hashid in ids:
-                    zone.remove_record(hashid)  # pylint: disable=no-member
+                    transaction.zone.remove_record(hashid)
                     LOGGER.debug("delete_record: %s", hashid)
 
         return True
 
+    def _apply_changes(self, changes):
+        """
+        Apply the given changes one by one to the zone, then save the zone master file once.
+        """
+        with self._zone_transaction():
+            return super(Provider, self)._apply_changes(changes)
+
+    @contextmanager
+    def _zone_transaction(self):
+        """
+        Yield a transaction holding the zone, reused from the zone cache unless its master file
+        has been modified. Changes done to transaction.zone must set transaction.modified: the
+        zone master file is then saved once, when the transaction ends. Transactions nest, only
+        the outermost one saves the zone. Across processes, transactions on the same zone
+        master file are serialized with a lock in the Lexicon cache directory.
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+
+        path = self._zone_path()
+        lock_name = 'localzone_{0}'.format(hashlib.sha1(path.encode('utf-8')).hexdigest())
+        with cache.lock(lock_name), _ZONES_LOCK:
+            self._transaction = _Transaction(_load_zone(path, self.origin))
+            try:
+                yield self._transaction
+                if self._transaction.modified:
+                    _save_zone(path, self.origin, self._transaction.zone)
+            except BaseException:
+                if self._transaction.modified:
+                    # The cached zone holds changes that are not saved.
+                    _ZONES.pop((path, self.origin), None)
+                raise
+            finally:
+                self._transaction = None
+
+    def _zone_path(self):
+        # Resolve symbolic links, so that the zone master file they target is replaced on save.
+        return os.path.realpath(self.filename)
+
     def _request(self, action='GET', url='/', data=None, query_params=None):
         # Not required
         pass
+
+
+class _Transaction(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+    def __init__(self, zone):
+        self.zone = zone
+        self.modified = False
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return (stat.st_dev, stat.st_ino, stat.st_size,
+            getattr(stat, 'st_mtime_ns', stat.st_mtime))
+
+
+def _load_zone(path, origin):
+    """Return the zone parsed from the given master file, reusing the cached one if still valid."""
+    key = _stat_key(path)
+    cached = _ZONES.get((path, origin))
+    if cached and cached[0] == key:
+        return cached[1]
+
+    LOGGER.debug("Parsing zone master file %s", path)
+    zone = localzone.load(path, origin)
+    _ZONES[(path, origin)] = (key, zone)
+    return zone
+
+
+def _save_zone(path, origin, zone):
+    """
+    Save the zone to the given master file atomically: the zone is written to a temporary file
+    next to it, with the same permissions, which then replaces the master file.
+    """
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                         prefix='.{0}.'.format(os.path.basename(path)))
+    os.close(handle)
+    try:
+        shutil.copymode(path, temp_path)
+        stat = os.stat(path)
+        try:
+            os.chown(temp_path, stat.st_uid, stat.st_gid)
+        except (AttributeError, OSError):
+            # Not supported (Windows), or not allowed: the new file belongs to the current user.
+            pass
+        zone.save(filename=temp_path)
+        cache.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    _ZONES[(path, origin)] = (_stat_key(path), zone)
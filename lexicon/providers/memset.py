@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -139,11 +138,11 @@ class Provider(BaseProvider):
             data = {}
         if query_params is None:
             query_params = {}
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    auth=(self._get_provider_option(
-                                        'auth_token'), 'x'),
-                                    headers={'Content-Type': 'application/json'})
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=json.dumps(data),
+                                             auth=(self._get_provider_option(
+                                                 'auth_token'), 'x'),
+                                             headers={'Content-Type': 'application/json'})
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
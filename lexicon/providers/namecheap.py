@@ -14,6 +14,13 @@ LOGGER = logging.getLogger(__name__)
 
 NAMESERVER_DOMAINS = ['namecheap.com']
 
+# Fields of a host, as returned by getHosts, which are sent back by setHosts.
+HOST_FIELDS = [('Name', 'HostName'), ('Type', 'RecordType'), ('Address', 'Address'),
+               ('MXPref', 'MXPref'), ('TTL', 'TTL')]
+
+# Preference of the MX hosts set without one, as Namecheap does when adding a host.
+DEFAULT_MX_PREF = 10
+
 
 def provider_parser(subparser):
     """Configure provider parser for Namecheap"""
@@ -59,6 +66,9 @@ class Provider(BaseProvider):
 
     If you have SRV record, it may get lost. Also records configured as
     `A + DDNS` on their control panel will be downgrated to `A` records.
+
+    To limit the number of replacements, `apply_changes` reads the hosts once,
+    applies all the changes to them in memory, and sets them back at once.
     """
 
     def __init__(self, config):
@@ -214,6 +224,13 @@ class Provider(BaseProvider):
         for record in raw_records:
             records.append(self._convert_to_lexicon(record))
 
+        records = self._filter_records(records, rtype, name, content, identifier)
+
+        LOGGER.debug('list_records: %s', records)
+        return records
+
+    @staticmethod
+    def _filter_records(records, rtype=None, name=None, content=None, identifier=None):
         if identifier:
             records = [record for record in records if record['id'] == identifier]
         if rtype:
@@ -225,8 +242,6 @@ class Provider(BaseProvider):
         if content:
             records = [
                 record for record in records if record['content'].lower() == content.lower()]
-
-        LOGGER.debug('list_records: %s', records)
         return records
 
     # Create or update a record.
@@ -245,6 +260,128 @@ class Provider(BaseProvider):
                 self.domain, self._convert_to_namecheap(record))
         return True
 
+    def _apply_changes(self, changes):
+        """
+        Apply the given changes with one getHosts call and at most one setHosts call: the hosts
+        are read once, every change is applied to them in memory, and the resulting hosts replace
+        the remote ones at once. If the changes leave the hosts as they were, nothing is sent.
+        As the replacement is all or nothing, if it fails all the changes are reported as failed.
+        """
+        hosts = self.client.domains_dns_getHosts(self.domain)
+        original_hosts = sorted(self._host_fields(host) for host in hosts)
+
+        results = []
+        for change in changes:
+            backup = list(hosts)
+            try:
+                results.append({'success': True,
+                                'output': self._apply_change_to_hosts(hosts, change)})
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                hosts[:] = backup
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+
+        if sorted(self._host_fields(host) for host in hosts) == original_hosts:
+            LOGGER.debug('apply_changes: hosts are unchanged, nothing to set')
+            return results
+
+        try:
+            self.client.domains_dns_setHosts(self.domain, [
+                dict((set_field, host[field]) for field, set_field in HOST_FIELDS
+                     if host.get(field) is not None) for host in hosts])
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.debug('Hosts replacement failed.', exc_info=True)
+            error = '{0}: {1}'.format(type(error).__name__, error)
+            results = [{'success': False, 'error': result.get('error', error)}
+                       for result in results]
+
+        return results
+
+    def _apply_change_to_hosts(self, hosts, change):
+        """
+        Apply a change to the given list of hosts, in the getHosts format. Hosts are never
+        modified in place, but replaced in the list, so that a shallow copy of the list is
+        enough to restore it.
+        """
+        action = change.get('action')
+        if action not in ('create', 'update', 'delete'):
+            raise ValueError('Invalid action statement: {0}'.format(action))
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+
+        if action == 'create':
+            if not rtype or not name or content is None:
+                raise ValueError('Creating a record requires a type, a name and a content')
+            if not self._find_hosts(hosts, {'type': rtype, 'name': name, 'content': content}):
+                hosts.append(self._new_host(rtype, name, content))
+            return True
+
+        if action == 'delete':
+            for index in reversed(self._find_hosts(hosts, change)):
+                del hosts[index]
+            return True
+
+        return self._update_hosts(hosts, change)
+
+    def _update_hosts(self, hosts, change):
+        identifier, rtype = change.get('identifier'), change.get('type')
+        name, content = change.get('name'), change.get('content')
+        if identifier:
+            indexes = self._find_hosts(hosts, {'identifier': identifier})
+            if not indexes:
+                raise Exception('Record identifier {0} does not exist'.format(identifier))
+        elif rtype and name:
+            indexes = self._find_hosts(hosts, {'type': rtype, 'name': name})
+        else:
+            raise ValueError('Updating a record requires an identifier, or a type and a name')
+        if content is None:
+            raise ValueError('Updating a record requires a content')
+
+        if not indexes:
+            hosts.append(self._new_host(rtype, name, content))
+            return True
+        host = dict(hosts[indexes[0]], Address=content)
+        if rtype:
+            host['Type'] = rtype
+        if name:
+            host['Name'] = self._host_name(name)
+        if host['Type'] == 'MX' and host.get('MXPref') is None:
+            host['MXPref'] = DEFAULT_MX_PREF
+        if self.option_ttl():
+            host['TTL'] = self.option_ttl()
+        hosts[indexes[0]] = host
+        return True
+
+    def _find_hosts(self, hosts, filters):
+        """
+        Return the indexes of the hosts matching the identifier, type, name and content of the
+        given filters. Unlike list_records, which matches any record whose name contains the
+        given one, the name must match exactly.
+        """
+        name = filters.get('name')
+        records = [dict(self._convert_to_lexicon(host), index=index)
+                   for index, host in enumerate(hosts)
+                   if not name or host['Name'] == self._host_name(name)]
+        return [record['index'] for record
+                in self._filter_records(records, filters.get('type'), None,
+                                        filters.get('content'), filters.get('identifier'))]
+
+    def _new_host(self, rtype, name, content):
+        host = {'Type': rtype, 'Name': self._host_name(name), 'Address': content}
+        if rtype == 'MX':
+            host['MXPref'] = DEFAULT_MX_PREF
+        if self.option_ttl():
+            host['TTL'] = self.option_ttl()
+        return host
+
+    def _host_name(self, name):
+        return self._relative_name(name) or '@'
+
+    @staticmethod
+    def _host_fields(host):
+        return [str(host[field]) if host.get(field) is not None else ''
+                for field, _ in HOST_FIELDS]
+
     def _convert_to_namecheap(self, record):
         """ converts from lexicon format record to namecheap format record,
         suitable to sending through the api to namecheap"""
@@ -275,9 +412,9 @@ class Provider(BaseProvider):
         processed_record = {
             'type': record['Type'],
             'name': '{0}.{1}'.format(record['Name'], self.domain),
-            'ttl': record['TTL'],
+            'ttl': record.get('TTL'),
             'content': record['Address'],
-            'id': record['HostId']
+            'id': record.get('HostId')
         }
 
         return processed_record
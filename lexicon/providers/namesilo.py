@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import logging
 from xml.etree import ElementTree
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -134,8 +133,8 @@ class Provider(BaseProvider):
         query_params['version'] = 1
         query_params['type'] = 'xml'
         query_params['key'] = self._get_provider_option('auth_token')
-        response = requests.request(action, self.api_endpoint +
-                                    url, params=query_params)
+        response = self.http_session.request(action, self.api_endpoint +
+                                             url, params=query_params)
         # data=json.dumps(data))
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -168,7 +167,7 @@ class Provider(BaseProvider):
             'Accept': 'application/json',
             'Content-Type': 'application/json'
         }
-        response = requests.request(
+        response = self.http_session.request(
             action,
             self.api_endpoint + url,
             data=json.dumps(data),
@@ -10,7 +10,6 @@ try:
 except ImportError:
     from urllib import urlencode
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -173,9 +172,9 @@ class Provider(BaseProvider):
             'X-NFSN-Authentication': auth_value
         }
 
-        response = requests.request(action, ''.join([self.api_endpoint, url]),
-                                    data=data,
-                                    headers=auth_header)
+        response = self.http_session.request(action, ''.join([self.api_endpoint, url]),
+                                             data=data,
+                                             headers=auth_header)
         response.raise_for_status()
         if response.content:
             return response.json()
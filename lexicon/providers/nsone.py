@@ -144,7 +144,7 @@ class Provider(BaseProvider):
 
             return _resolve_link(match, recurse=recurse - 1)
 
-        payload = self._get('/zones/{0}'.format(self.domain_id))
+        payload = self._zone_snapshot(lambda: self._get('/zones/{0}'.format(self.domain_id)))
         records = []
         for record in payload['records']:
 
@@ -253,10 +253,10 @@ class Provider(BaseProvider):
         }
         default_auth = None
 
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers=default_headers,
-                                    auth=default_auth)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers=default_headers,
+                                             auth=default_auth)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
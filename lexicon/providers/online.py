@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -246,7 +245,7 @@ class Provider(BaseProvider):
                 headers['Content-Type'] = 'application/json'
                 data = json.dumps(data)
 
-        response = requests.request(
+        response = self.http_session.request(
             action,
             self.api_endpoint + url,
             params=query_params,
@@ -62,10 +62,13 @@ class Provider(BaseProvider):
             self._get_provider_option('auth_entrypoint'))
         self.session = None
         self.time_delta = None
+        # Records details are immutable for a given id, unless modified by this provider:
+        # they are kept in this cache during the whole provider lifetime.
+        self._records_details = {}
 
     def _authenticate(self):
         # All requests will be done in one HTTPS session
-        self.session = requests.Session()
+        self.session = self.http_session
 
         # Calculate delta time between local and OVH to avoid requests rejection
         server_time = self.session.get(
@@ -127,9 +130,19 @@ class Provider(BaseProvider):
         record_ids = self._get(
             '/domain/zone/{0}/record'.format(domain), params)
 
+        # Fetch concurrently the details of the records not already known. Identifiers are
+        # integers in the API responses, but strings when given by the user: the cache is
+        # keyed by their string form.
+        missing_ids = [record_id for record_id in record_ids
+                       if str(record_id) not in self._records_details]
+        for raw in self._parallel_map(
+                lambda record_id: self._get(
+                    '/domain/zone/{0}/record/{1}'.format(domain, record_id)),
+                missing_ids):
+            self._records_details[str(raw['id'])] = raw
+
         for record_id in record_ids:
-            raw = self._get(
-                '/domain/zone/{0}/record/{1}'.format(domain, record_id))
+            raw = self._records_details[str(record_id)]
             records.append({
                 'type': raw['fieldType'],
                 'name': self._full_name(raw['subDomain']),
@@ -166,6 +179,7 @@ class Provider(BaseProvider):
 
         self._put(
             '/domain/zone/{0}/record/{1}'.format(domain, identifier), data)
+        self._records_details.pop(str(identifier), None)
         self._post('/domain/zone/{0}/refresh'.format(domain))
 
         LOGGER.debug('update_record: %s', identifier)
@@ -187,6 +201,7 @@ class Provider(BaseProvider):
         for record_id in delete_record_id:
             self._delete(
                 '/domain/zone/{0}/record/{1}'.format(domain, record_id))
+            self._records_details.pop(str(record_id), None)
 
         self._post('/domain/zone/{0}/refresh'.format(domain))
 
@@ -7,10 +7,10 @@ Author: Jens Reimann, 2018
 API Docs: https://docs.plesk.com/en-US/onyx/api-rpc
 """
 from __future__ import absolute_import
+import copy
 import logging
 from collections import OrderedDict
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -61,6 +61,10 @@ class Provider(BaseProvider):
         self.password = self._get_provider_option('auth_password')
         assert self.password is not None
 
+        # DNS records of the site, as returned by get_rec, kept for the lifetime of the provider
+        # and updated with the changes applied in batch.
+        self._site_records = None
+
     def __simple_request(self, rtype, operation, req):
 
         response = self.__plesk_request({
@@ -97,8 +101,8 @@ class Provider(BaseProvider):
 
         LOGGER.debug("Request: %s", xml)
 
-        response = requests.post(self.api_endpoint, headers=headers,
-                                 data=xml, auth=(self.username, self.password))
+        response = self.http_session.post(self.api_endpoint, headers=headers,
+                                          data=xml, auth=(self.username, self.password))
 
         data = response.text
 
@@ -167,15 +171,19 @@ class Provider(BaseProvider):
         if entries:
             return True  # already exists
 
-        self.__simple_request('dns', 'add_rec', OrderedDict([
+        self._site_records = None
+        self.__simple_request('dns', 'add_rec', self.__add_rec_request(rtype, host, value, opt))
+
+        return True
+
+    def __add_rec_request(self, rtype, host, value, opt):
+        return OrderedDict([
             ('site-id', self.domain_id),
             ('type', rtype),
             ('host', self._relative_name(host)),
             ('value', value),
             ('opt', opt)
-        ]))
-
-        return True
+        ])
 
     def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
         if identifier:
@@ -208,15 +216,9 @@ class Provider(BaseProvider):
         if host:
             host = self._fqdn_name(host)
 
-        result = self.__simple_request('dns', 'get_rec', {
-            'filter': {
-                'site-id': self.domain_id
-            }
-        })
-
         entries = []
 
-        for record in result["result"]:
+        for record in self.__get_site_records(refresh=True):
 
             LOGGER.debug("Record: %s", record)
 
@@ -261,24 +263,194 @@ class Provider(BaseProvider):
 
         return entries
 
+    def __get_site_records(self, refresh=False):
+        if refresh or self._site_records is None:
+            result = self.__simple_request('dns', 'get_rec', {
+                'filter': {
+                    'site-id': self.domain_id
+                }
+            })["result"]
+            if not isinstance(result, list):
+                result = [result]
+            self._site_records = [record for record in result if record.get("data")]
+
+        return self._site_records
+
     def __delete_dns_records_by_id(self, ids):
         if not ids:
             return
 
-        req = []
-        for i in ids:
-            req.append({
-                'del_rec': {
-                    'filter': {
-                        'id': i
-                    }
-                }
-            })
-
+        self._site_records = None
         self.__plesk_request({
-            'dns': req
+            'dns': [{'del_rec': self.__del_rec_request(i)} for i in ids]
         })
 
+    def __del_rec_request(self, identifier):  # pylint: disable=no-self-use
+        return {
+            'filter': {
+                'id': identifier
+            }
+        }
+
+    def __multiple_request(self, rtype, operations):
+        """
+        Send the given operations, a list of (operation, request) tuples, in one packet, and
+        return the result of each operation, in the same order. Plesk processes each operation
+        on its own, so some of them may fail while others succeed.
+        """
+        response = self.__plesk_request({
+            rtype: [{operation: req} for operation, req in operations]
+        })[rtype]
+
+        if not isinstance(response, list):
+            response = [response]
+
+        return [item[operation]["result"]
+                for (operation, _), item in zip(operations, response)]
+
+    def _apply_changes(self, changes):
+        """
+        Apply the given changes to the DNS records of the site in memory, then send every
+        resulting add_rec and del_rec operation in one packet. Changes whose operations all
+        succeed are reported as successful, others as failed.
+        """
+        records = [{'id': record["id"], 'operation': None, 'type': record["data"]["type"],
+                    'host': record["data"]["host"], 'value': record["data"]["value"],
+                    'opt': record["data"].get("opt")}
+                   for record in self.__get_site_records()]
+        operations = []
+        owners = []
+
+        results = []
+        for index, change in enumerate(changes):
+            backup = (copy.deepcopy(records), list(operations))
+            try:
+                self.__apply_change(records, operations, change)
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                records, operations = backup
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+                continue
+            owners.extend([index] * (len(operations) - len(backup[1])))
+            results.append({'success': True, 'output': True})
+
+        sent = [index for index, operation in enumerate(operations) if operation is not None]
+        if not sent:
+            return results
+
+        self._site_records = None
+        try:
+            responses = self.__multiple_request('dns', [operations[index] for index in sent])
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.debug('Operations packet failed.', exc_info=True)
+            error = '{0}: {1}'.format(type(error).__name__, error)
+            return [{'success': False, 'error': result.get('error', error)}
+                    for result in results]
+
+        created_ids = self.__apply_responses(results, owners, zip(sent, responses))
+        if created_ids is not None:
+            # Keep the records of the site up to date, with the ids of the added records.
+            self._site_records = [
+                {'id': record['id'] if record['id'] is not None
+                       else created_ids[record['operation']],
+                 'data': {'site-id': self.domain_id, 'type': record['type'],
+                          'host': record['host'], 'value': record['value'],
+                          'opt': record['opt']}}
+                for record in records]
+
+        return results
+
+    @staticmethod
+    def __apply_responses(results, owners, responses):
+        # Report as failed the changes owning an operation which failed, given the responses
+        # of the sent operations along with their index. Return the ids of the added records
+        # by operation index, or None if an operation failed.
+        created_ids = {}
+        failed = False
+        for index, response in responses:
+            for result in response if isinstance(response, list) else [response]:
+                if result["status"] != "error":
+                    created_ids[index] = result.get("id")
+                    continue
+                failed = True
+                if results[owners[index]]['success']:
+                    results[owners[index]] = {
+                        'success': False,
+                        'error': 'Exception: API returned error: {0} ({1})'
+                                 .format(result.get("errcode"), result.get("errtext"))}
+        return None if failed else created_ids
+
+    def __apply_change(self, records, operations, change):
+        # Apply in place to the given records the given change, like the corresponding
+        # _create_record, _update_record or _delete_record would do, and append to the given
+        # operations the add_rec and del_rec operations doing it. The operation adding a record
+        # not created yet is canceled (replaced by None) if the record is deleted.
+        action = change.get('action')
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+
+        if action == 'create':
+            if not rtype or not name or not content:
+                raise Exception('ERROR: rtype, name and content are required')
+            self.__add_record(records, operations,
+                              {'type': rtype, 'host': name, 'value': content, 'opt': None})
+            return
+        if action not in ('update', 'delete'):
+            raise ValueError('Invalid action statement: {0}'.format(action))
+
+        deleted = self.__deleted_records(records, change)
+        for record in deleted:
+            if record in records:
+                records.remove(record)
+            if record['id'] is None:
+                operations[record['operation']] = None
+            else:
+                operations.append(('del_rec', self.__del_rec_request(record['id'])))
+
+        if action == 'update':
+            entry = deleted[0]
+            self.__add_record(records, operations,
+                              {'type': rtype or entry['type'], 'host': name or entry['host'],
+                               'value': content or entry['value'], 'opt': entry['opt']})
+
+    def __deleted_records(self, records, change):
+        # Return the records deleted by the given update or delete change. A record given by
+        # its identifier is deleted even if it is unknown, but must exist to be updated.
+        identifier = change.get('identifier')
+        if identifier:
+            deleted = [record for record in records if record['id'] == identifier]
+            if not deleted and change['action'] == 'delete':
+                deleted = [{'id': identifier, 'operation': None}]
+        else:
+            deleted = self.__filter_records(
+                records, change.get('type'), change.get('name'),
+                change.get('content') if change['action'] == 'delete' else None)
+        if change['action'] == 'update' and not deleted:
+            raise Exception("No entry found for updating")
+        return deleted
+
+    def __add_record(self, records, operations, record):
+        # Add to the given records the given record (type, host, value and opt), and append
+        # to the given operations the add_rec operation creating it, if it does not exist yet.
+        rtype, host, value, opt = record['type'], record['host'], record['value'], record['opt']
+        if self.__filter_records(records, rtype, host, value):
+            return  # already exists
+
+        records.append({'id': None, 'operation': len(operations), 'type': rtype,
+                        'host': self._fqdn_name(host), 'value': value, 'opt': opt})
+        operations.append(('add_rec', self.__add_rec_request(rtype, host, value, opt)))
+
+    def __filter_records(self, records, rtype=None, host=None, value=None):
+        if value and rtype and rtype in ["CNAME"]:
+            value = value.rstrip('.') + "."
+        if host:
+            host = self._fqdn_name(host)
+
+        return [record for record in records
+                if (rtype is None or record['type'] == rtype)
+                and (host is None or record['host'] == host)
+                and (value is None or record['value'] == value)]
+
     def _request(self, action='GET', url='/', data=None, query_params=None):
         # Helper _request is not used for Plesk provider
         pass
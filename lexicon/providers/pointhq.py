@@ -126,14 +126,15 @@ class Provider(BaseProvider):
             data = {}
         if query_params is None:
             query_params = {}
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    auth=requests.auth.HTTPBasicAuth(self._get_provider_option(
-                                        'auth_username'), self._get_provider_option('auth_token')),
-                                    headers={
-                                        'Content-Type': 'application/json',
-                                        'Accept': 'application/json'
-                                    })
+        response = self.http_session.request(
+            action, self.api_endpoint + url, params=query_params,
+            data=json.dumps(data),
+            auth=requests.auth.HTTPBasicAuth(self._get_provider_option(
+                'auth_username'), self._get_provider_option('auth_token')),
+            headers={
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            })
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
@@ -21,10 +21,10 @@ This is why the _clean_content and _unclean_content methods exist, to convert
 back and forth between the format PowerDNS expects, and the format Lexicon uses
 """
 from __future__ import absolute_import
+from collections import OrderedDict
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -86,9 +86,18 @@ class Provider(BaseProvider):
     def zone_data(self):
         """Get zone data"""
         if self._zone_data is None:
-            self._zone_data = self._get('/zones/' + self.domain).json()
+            self._zone_data = self._zone_snapshot(
+                lambda: self._get('/zones/' + self.domain).json(), serial=self._zone_serial)
         return self._zone_data
 
+    def _zone_serial(self):
+        # Zone metadata without its records: available since PowerDNS 4.3, older versions
+        # ignore the parameter and return the whole zone.
+        return self._get('/zones/' + self.domain, query_params={'rrsets': 'false'}).json()['serial']
+
+    def _zone_snapshot_key(self):
+        return super(Provider, self)._zone_snapshot_key() + (self.api_endpoint,)
+
     def _authenticate(self):
         self.zone_data()
         self.domain_id = self.domain
@@ -140,11 +149,108 @@ class Provider(BaseProvider):
         return content
 
     def _create_record(self, rtype, name, content):
-        rname = self._fqdn_name(name)
+        rrsets = self._rrsets_index()
+        self._patch_rrsets([self._created_rrset(
+            rrsets.get(self._rrset_key(rtype, name)), rtype, name, content)])
+        return True
+
+    def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
+        if identifier is not None:
+            rtype, name, content = self._parse_identifier(identifier)
+
+        LOGGER.debug("delete %s %s %s", rtype, name, content)
+        if rtype is None or name is None:
+            raise Exception("Must specify at least both rtype and name")
+
+        rrsets = self._rrsets_index()
+        rrset = rrsets.get(self._rrset_key(rtype, name))
+        if rrset is None:
+            LOGGER.debug('delete_record: no record to delete')
+            return True
+
+        self._patch_rrsets([self._deleted_rrset(rrset, content)])
+        return True
+
+    def _update_record(self, identifier, rtype=None, name=None, content=None):
+        self._delete_record(identifier)
+        return self._create_record(rtype, name, content)
+
+    def _apply_changes(self, changes):
+        """
+        Apply the given changes with one PATCH of the zone, holding one entry per modified RRSet,
+        and at most one notification of the slaves. Changes are applied in memory to the RRSets
+        of the zone, in order, so a change sees the effect of the previous ones. As the PATCH is
+        all or nothing, if it fails all the changes are reported as failed.
+        """
+        rrsets = self._rrsets_index()
+        patched = OrderedDict()
+
+        results = []
+        for change in changes:
+            try:
+                changed = self._change_rrsets(rrsets, change)
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+                continue
+            for rrset in changed:
+                key = self._rrset_key(rrset['type'], rrset['name'])
+                rrsets[key] = patched[key] = rrset
+            results.append({'success': True, 'output': True})
+
+        if patched:
+            try:
+                self._patch_rrsets(list(patched.values()))
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Zone patch failed.', exc_info=True)
+                error = '{0}: {1}'.format(type(error).__name__, error)
+                results = [{'success': False, 'error': result.get('error', error)}
+                           for result in results]
+
+        return results
+
+    def _change_rrsets(self, rrsets, change):
+        # Return the RRSets to patch to apply the given change to the given RRSets
+        action = change.get('action')
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+        if action == 'create':
+            if not rtype or not name or not content:
+                raise Exception('ERROR: rtype, name and content are required')
+            return [self._created_rrset(rrsets.get(self._rrset_key(rtype, name)),
+                                        rtype, name, content)]
+        if action not in ('update', 'delete'):
+            raise ValueError('Invalid action statement: {0}'.format(action))
+
+        identifier = change.get('identifier')
+        if action == 'update' or identifier is not None:
+            if identifier is None:
+                raise Exception("Must specify at least both rtype and name")
+            delete_type, delete_name, delete_content = self._parse_identifier(identifier)
+        else:
+            delete_type, delete_name, delete_content = rtype, name, content
+        if delete_type is None or delete_name is None:
+            raise Exception("Must specify at least both rtype and name")
+
+        changed = []
+        rrset = rrsets.get(self._rrset_key(delete_type, delete_name))
+        if rrset is not None:
+            changed.append(self._deleted_rrset(rrset, delete_content))
+        if action == 'update':
+            current = rrsets.get(self._rrset_key(rtype, name))
+            if changed and self._rrset_key(rtype, name) == self._rrset_key(delete_type,
+                                                                             delete_name):
+                current = changed[0]
+            changed.append(self._created_rrset(current, rtype, name, content))
+        return changed
+
+    def _created_rrset(self, rrset, rtype, name, content):
+        # Return the RRSet with the given record added to the given RRSet (None if it does not
+        # exist yet)
         newcontent = self._clean_content(rtype, content)
 
         updated_data = {
-            'name': rname,
+            'name': self._fqdn_name(name),
             'type': rtype,
             'records': [],
             'ttl': self._get_lexicon_option('ttl') or 600,
@@ -153,66 +259,73 @@ class Provider(BaseProvider):
 
         updated_data['records'].append({'content': newcontent, 'disabled': False})
 
-        for rrset in self.zone_data()['rrsets']:
-            if rrset['name'] == rname and rrset['type'] == rtype:
-                updated_data['ttl'] = rrset['ttl']
-
-                for record in rrset['records']:
-                    if record['content'] != newcontent:
-                        updated_data['records'].append(
-                            {
-                                'content': record['content'],
-                                'disabled': record['disabled']
-                            })
-                break
-
-        request = {'rrsets': [updated_data]}
-        LOGGER.debug('request: %s', request)
+        if rrset is not None and rrset['records']:
+            updated_data['ttl'] = rrset['ttl']
 
-        self._patch('/zones/' + self.domain, data=request)
-        self.notify_slaves()
-        self._zone_data = None
-        return True
+            for record in rrset['records']:
+                if record['content'] != newcontent:
+                    updated_data['records'].append(
+                        {
+                            'content': record['content'],
+                            'disabled': record['disabled']
+                        })
 
-    def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
-        if identifier is not None:
-            rtype, name, content = self._parse_identifier(identifier)
+        return updated_data
 
-        LOGGER.debug("delete %s %s %s", rtype, name, content)
-        if rtype is None or name is None:
-            raise Exception("Must specify at least both rtype and name")
+    def _deleted_rrset(self, rrset, content=None):
+        # Return the RRSet with the records matching content (all if None) removed
+        # from the given RRSet
+        update_data = dict((key, value) for key, value in rrset.items() if key != 'comments')
 
-        for rrset in self.zone_data()['rrsets']:
-            if rrset['type'] == rtype and self._fqdn_name(rrset['name']) == self._fqdn_name(name):
-                update_data = rrset
-
-                if 'comments' in update_data:
-                    del update_data['comments']
-
-                if content is None:
-                    update_data['records'] = []
-                    update_data['changetype'] = 'DELETE'
-                else:
-                    new_record_list = []
-                    for record in update_data['records']:
-                        if self._clean_content(rrset['type'], content) != record['content']:
-                            new_record_list.append(record)
-
-                    update_data['records'] = new_record_list
-                    update_data['changetype'] = 'REPLACE'
-                break
-
-        request = {'rrsets': [update_data]}
+        if content is None:
+            update_data['records'] = []
+            update_data['changetype'] = 'DELETE'
+        else:
+            new_record_list = []
+            for record in rrset['records']:
+                if self._clean_content(rrset['type'], content) != record['content']:
+                    new_record_list.append(record)
+
+            update_data['records'] = new_record_list
+            update_data['changetype'] = 'REPLACE'
+
+        return update_data
+
+    def _patch_rrsets(self, rrsets):
+        """
+        Send the given RRSets to the zone in one PATCH, notify the slaves, then apply them to
+        the zone data already retrieved, instead of retrieving the whole zone again.
+        """
+        request = {'rrsets': rrsets}
         LOGGER.debug('request: %s', request)
 
         self._patch('/zones/' + self.domain, data=request)
         self.notify_slaves()
-        self._zone_data = None
-        return True
 
-    def _update_record(self, identifier, rtype=None, name=None, content=None):
-        self._delete_record(identifier)
-        return self._create_record(rtype, name, content)
+        zone_rrsets = self.zone_data()['rrsets']
+        indexes = dict((self._rrset_key(rrset['type'], rrset['name']), index)
+                       for index, rrset in enumerate(zone_rrsets))
+        for rrset in rrsets:
+            index = indexes.get(self._rrset_key(rrset['type'], rrset['name']))
+            current = zone_rrsets[index] if index is not None else None
+            if rrset['changetype'] == 'DELETE' or not rrset['records']:
+                updated = None
+            else:
+                updated = {'name': rrset['name'], 'type': rrset['type'], 'ttl': rrset['ttl'],
+                           'records': rrset['records'],
+                           'comments': current.get('comments', []) if current else []}
+            if index is not None:
+                zone_rrsets[index] = updated
+            elif updated is not None:
+                zone_rrsets.append(updated)
+        zone_rrsets[:] = [rrset for rrset in zone_rrsets if rrset is not None]
+
+    def _rrsets_index(self):
+        return dict((self._rrset_key(rrset['type'], rrset['name']), rrset)
+                    for rrset in self.zone_data()['rrsets'])
+
+    def _rrset_key(self, rtype, name):
+        return self._fqdn_name(name), rtype
 
     def _patch(self, url='/', data=None, query_params=None):
         return self._request('PATCH', url, data=data, query_params=query_params)
@@ -222,12 +335,12 @@ class Provider(BaseProvider):
             data = {}
         if query_params is None:
             query_params = {}
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers={
-                                        'X-API-Key': self.api_key,
-                                        'Content-Type': 'application/json'
-                                    })
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=json.dumps(data),
+                                             headers={
+                                                 'X-API-Key': self.api_key,
+                                                 'Content-Type': 'application/json'
+                                             })
         LOGGER.debug('response: %s', response.text)
         response.raise_for_status()
         return response
@@ -4,7 +4,6 @@ import json
 import logging
 import time
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -192,12 +191,13 @@ class Provider(BaseProvider):
         LOGGER.debug('request tenant ID: %s', self._get_rackspace_option('auth_account'))
         full_url = (self.api_endpoint +
                     '/{0}' + url).format(self._get_rackspace_option('auth_account'))
-        response = requests.request(action, full_url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers={
-                                        'X-Auth-Token': self._get_rackspace_option('auth_token'),
-                                        'Content-Type': 'application/json'
-                                    })
+        response = self.http_session.request(
+            action, full_url, params=query_params,
+            data=json.dumps(data),
+            headers={
+                'X-Auth-Token': self._get_rackspace_option('auth_token'),
+                'Content-Type': 'application/json'
+            })
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
@@ -231,11 +231,12 @@ class Provider(BaseProvider):
         return self._request_and_wait('DELETE', url, data, query_params)
 
     def _update_response(self, payload):
-        response = requests.request('GET', payload['callbackUrl'], params={'showDetails': 'true'},
-                                    data={},
-                                    headers={
-                                        'X-Auth-Token': self._get_rackspace_option('auth_token'),
-                                        'Content-Type': 'application/json'})
+        response = self.http_session.request(
+            'GET', payload['callbackUrl'], params={'showDetails': 'true'},
+            data={},
+            headers={
+                'X-Auth-Token': self._get_rackspace_option('auth_token'),
+                'Content-Type': 'application/json'})
 
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
@@ -245,11 +246,12 @@ class Provider(BaseProvider):
         if data is None:
             data = {}
 
-        response = requests.request(action, self.auth_api_endpoint + url, params=query_params,
-                                    data=json.dumps(data),
-                                    headers={
-                                        'Content-Type': 'application/json'
-                                    })
+        response = self.http_session.request(
+            action, self.auth_api_endpoint + url, params=query_params,
+            data=json.dumps(data),
+            headers={
+                'Content-Type': 'application/json'
+            })
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
         return response.json()
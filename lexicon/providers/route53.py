@@ -1,5 +1,6 @@
 """Provide support to Lexicon for AWS Route 53 DNS changes."""
 from __future__ import absolute_import
+from collections import OrderedDict
 import logging
 import re
 
@@ -16,6 +17,12 @@ LOGGER = logging.getLogger(__name__)
 
 NAMESERVER_DOMAINS = [re.compile(r'^awsdns-\d+\.\w+$')]
 
+# Limits of one ChangeBatch in the Route 53 API, UPSERT changes counting twice.
+MAX_BATCH_RECORDS = 1000
+MAX_BATCH_VALUES_LENGTH = 32000
+
+CHANGE_ACTIONS = {'create': 'CREATE', 'update': 'UPSERT', 'delete': 'DELETE'}
+
 
 def provider_parser(subparser):
     """Specify arguments for AWS Route 53 Lexicon Provider."""
@@ -134,36 +141,123 @@ class Provider(BaseProvider):
             raise Exception('No domain found')
 
     def _change_record_sets(self, action, rtype, name, content):
-        ttl = self._get_lexicon_option('ttl')
-        value = '"{0}"'.format(content) if rtype in ['TXT', 'SPF'] else content
         try:
-            self.r53_client.change_resource_record_sets(
-                HostedZoneId=self.domain_id,
-                ChangeBatch={
-                    'Comment': '{0} using lexicon Route 53 provider'.format(
-                        action
-                    ),
-                    'Changes': [
-                        {
-                            'Action': action,
-                            'ResourceRecordSet': {
-                                'Name': self._fqdn_name(name),
-                                'Type': rtype,
-                                'TTL': ttl if ttl is not None else 300,
-                                'ResourceRecords': [
-                                    {
-                                        'Value': value
-                                    }
-                                ]
-                            }
-                        }
-                    ]
-                }
-            )
+            self._change_batch([self._record_set_change(action, rtype, name, [content])])
             return True
         except botocore.exceptions.ClientError as error:
             LOGGER.debug(str(error), exc_info=True)
 
+    def _record_set_change(self, action, rtype, name, contents):
+        ttl = self._get_lexicon_option('ttl')
+        return {
+            'Action': action,
+            'ResourceRecordSet': {
+                'Name': self._fqdn_name(name),
+                'Type': rtype,
+                'TTL': ttl if ttl is not None else 300,
+                'ResourceRecords': [
+                    {
+                        'Value': '"{0}"'.format(content) if rtype in ['TXT', 'SPF'] else content
+                    } for content in contents
+                ]
+            }
+        }
+
+    def _change_batch(self, changes):
+        actions = OrderedDict((change['Action'], True) for change in changes)
+        self.r53_client.change_resource_record_sets(
+            HostedZoneId=self.domain_id,
+            ChangeBatch={
+                'Comment': '{0} using lexicon Route 53 provider'.format(', '.join(actions)),
+                'Changes': changes
+            }
+        )
+
+    def _apply_changes(self, changes):
+        """
+        Apply the given changes in as few ChangeBatch calls as possible. Successive changes with
+        the same action on the same record set are merged in one change holding all their values,
+        except successive updates (UPSERT) which replace the whole record set: only the last one
+        is sent, as applying them one by one would leave only its value.
+        As the API rejects a whole ChangeBatch if one of its changes is invalid, a rejected
+        ChangeBatch is split in two halves sent separately, until the invalid changes are found.
+        """
+        results = [None] * len(changes)
+        for batch in self._change_batches(changes, self._merge_changes(changes, results)):
+            self._send_changes(batch, results)
+        return results
+
+    def _merge_changes(self, changes, results):
+        """
+        Return the list of (action, indexes) of the changes once merged by record set. Invalid
+        changes are not merged, their failure is reported in results. Merged UPSERT changes keep
+        the indexes of the superseded ones, to report them the result of the last one.
+        """
+        merged = []
+        last_merged = {}
+        for index, change in enumerate(changes):
+            action = CHANGE_ACTIONS.get(change.get('action'))
+            if not action or not change.get('type') or not change.get('name') \
+                    or change.get('content') is None:
+                results[index] = {'success': False,
+                                  'error': 'ValueError: Route 53 changes require an action '
+                                           '(create, update or delete), a type, a name '
+                                           'and a content'}
+                continue
+
+            record_set = (self._fqdn_name(change['name']), change['type'])
+            previous = last_merged.get(record_set)
+            if previous is not None and merged[previous][0] == action:
+                merged[previous][1].append(index)
+            else:
+                # Order of the changes on a given record set must be kept.
+                last_merged[record_set] = len(merged)
+                merged.append((action, [index]))
+        return merged
+
+    def _change_batches(self, changes, merged):
+        """
+        Generate the batches of (change, indexes) to send, each one within the limits of the
+        API on the number of records and on the length of their values.
+        """
+        batch, records, length = [], 0, 0
+        for action, indexes in merged:
+            contents = ([changes[indexes[-1]]['content']] if action == 'UPSERT'
+                        else [changes[index]['content'] for index in indexes])
+            change = self._record_set_change(
+                action, changes[indexes[0]]['type'], changes[indexes[0]]['name'], contents)
+            weight = 2 if action == 'UPSERT' else 1
+            change_records = weight * len(contents)
+            change_length = weight * sum(len(record['Value']) for record
+                                         in change['ResourceRecordSet']['ResourceRecords'])
+            if batch and (records + change_records > MAX_BATCH_RECORDS
+                          or length + change_length > MAX_BATCH_VALUES_LENGTH):
+                yield batch
+                batch, records, length = [], 0, 0
+            batch.append((change, indexes))
+            records += change_records
+            length += change_length
+        if batch:
+            yield batch
+
+    def _send_changes(self, batch, results):
+        try:
+            self._change_batch([change for change, _ in batch])
+        except botocore.exceptions.ClientError as error:
+            LOGGER.debug(str(error), exc_info=True)
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                self._send_changes(batch[:middle], results)
+                self._send_changes(batch[middle:], results)
+                return
+            result = {'success': False, 'error': '{0}: {1}'.format(type(error).__name__, error)}
+        else:
+            result = {'success': True, 'output': True}
+
+        for _, indexes in batch:
+            for index in indexes:
+                results[index] = dict(result)
+
     def _create_record(self, rtype, name, content):
         """Create a record in the hosted zone."""
         return self._change_record_sets('CREATE', rtype, name, content)
@@ -181,7 +275,12 @@ class Provider(BaseProvider):
 
     def _list_records(self, rtype=None, name=None, content=None):
         """List all records for the hosted zone."""
-        records = []
+        records = list(self._iter_records(rtype, name, content))
+        LOGGER.debug('list_records: %s', records)
+        return records
+
+    def _iter_records(self, rtype=None, name=None, content=None):
+        """Generate the records of the hosted zone, fetching record sets page by page."""
         paginator = RecordSetPaginator(self.r53_client, self.domain_id)
         for record in paginator.all_record_sets():
             if rtype is not None and record['Type'] != rtype:
@@ -196,14 +295,12 @@ class Provider(BaseProvider):
             if content is not None and content not in record_content:
                 continue
             LOGGER.debug('record: %s', record)
-            records.append({
+            yield {
                 'type': record['Type'],
                 'name': self._full_name(record['Name']),
                 'ttl': record.get('TTL', None),
                 'content': record_content[0] if len(record_content) == 1 else record_content,
-            })
-        LOGGER.debug('list_records: %s', records)
-        return records
+            }
 
     def _request(self, action='GET', url='/', data=None, query_params=None):
         # Helper _request is not used in Route53 provider
@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from requests.auth import HTTPBasicAuth
 
 from lexicon.providers.base import Provider as BaseProvider
@@ -222,10 +221,10 @@ class Provider(BaseProvider):
         if query_params:
             query_string = json.dumps(query_params)
 
-        response = requests.request(action, self.api_endpoint + url, params=query_string,
-                                    data=json.dumps(data),
-                                    headers=default_headers,
-                                    auth=default_auth)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_string,
+                                             data=json.dumps(data),
+                                             headers=default_headers,
+                                             auth=default_auth)
         try:
             # if the request fails for any reason, throw an error.
             response.raise_for_status()
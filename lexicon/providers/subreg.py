@@ -2,12 +2,19 @@
 from __future__ import absolute_import
 import collections
 import logging
+import os
+import threading
 
+import requests
+
+from lexicon import cache
 from lexicon.providers.base import Provider as BaseProvider
 
 
 try:
     import zeep  # Optional dependency
+    import zeep.cache
+    import zeep.exceptions
 except BaseException:
     pass
 
@@ -15,6 +22,15 @@ LOGGER = logging.getLogger(__name__)
 
 NAMESERVER_DOMAINS = ['subreg.cz']
 
+WSDL_URL = 'https://subreg.cz/wsdl'
+# Copy of the WSDL shipped with Lexicon, used when the WSDL cannot be downloaded.
+BUNDLED_WSDL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'data', 'subreg.wsdl')
+WSDL_CACHE_TIMEOUT = 7 * 24 * 3600
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
 
 def provider_parser(subparser):
     """Configure provider parser"""
@@ -31,8 +47,7 @@ class Provider(BaseProvider):
         self.domain_id = None
         self.ssid = None
 
-        client = zeep.Client("https://subreg.cz/wsdl")
-        self.api = client.service
+        self.api = get_client().service
 
     # Authenticate against provider,
     # Make any requests required to get the domain's id for
@@ -49,8 +64,7 @@ class Provider(BaseProvider):
                                        self._get_provider_option('auth_password'))
         if 'ssid' in response:
             self.ssid = response['ssid']
-            domains = self.domains_list()
-            if any((domain['name'] == self.domain for domain in domains)):
+            if self._is_account_domain():
                 self.domain_id = self.domain
             else:
                 raise Exception("Unknown domain {}".format(self.domain))
@@ -148,6 +162,19 @@ class Provider(BaseProvider):
         response = self._request_domains_list()
         return response['domains'] if 'domains' in response else list()
 
+    def _is_account_domain(self):
+        """
+        Checks that the domain belongs to the account. If the web session cache is enabled, the
+        domains of the account are kept with it, and only listed again for an unknown domain.
+        """
+        data = self._restore_web_session_data(lambda data: 'domains' in data)
+        if data and self.domain in data['domains']:
+            return True
+
+        domains = [domain['name'] for domain in self.domains_list()]
+        self._store_web_session_data({'domains': domains})
+        return self.domain in domains
+
     def _create_request_record(self, identifier, rtype, name, content, ttl, priority):  # pylint: disable=too-many-arguments
         """Creates record for Subreg API calls"""
         record = collections.OrderedDict()
@@ -305,6 +332,38 @@ class Provider(BaseProvider):
         pass
 
 
+def get_client():
+    """
+    Return the SOAP client of the Subreg API, shared by every provider of the process. The WSDL
+    and its schemas are kept in the Lexicon cache directory for WSDL_CACHE_TIMEOUT seconds, so
+    it is only downloaded and compiled once per process, and only downloaded once a week. If it
+    cannot be downloaded, the copy bundled with Lexicon is used.
+    """
+    global _CLIENT  # pylint: disable=global-statement
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            transport = zeep.Transport(cache=_wsdl_cache())
+            try:
+                _CLIENT = zeep.Client(WSDL_URL, transport=transport)
+            except (requests.exceptions.RequestException, zeep.exceptions.Error) as error:
+                LOGGER.warning('Subreg WSDL could not be retrieved (%s), using the bundled one.',
+                               error)
+                _CLIENT = zeep.Client(BUNDLED_WSDL, transport=transport)
+        return _CLIENT
+
+
+def _wsdl_cache():
+    cache_dir = cache.get_cache_dir()
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        return zeep.cache.SqliteCache(path=os.path.join(cache_dir, 'subreg_wsdl.db'),
+                                      timeout=WSDL_CACHE_TIMEOUT)
+    except Exception as error:  # pylint: disable=broad-except
+        LOGGER.debug('WSDL cache could not be opened, using memory: %s', error)
+        return zeep.cache.InMemoryCache(timeout=WSDL_CACHE_TIMEOUT)
+
+
 class SubregError(Exception):
     """Specific error for Subreg provider"""
     def __init__(self, major, minor, message):
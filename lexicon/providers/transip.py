@@ -1,5 +1,6 @@
 """Module provider for Transip"""
 from __future__ import absolute_import
+import copy
 import logging
 
 from lexicon.providers.base import Provider as BaseProvider
@@ -44,6 +45,9 @@ class Provider(BaseProvider):
         super(Provider, self).__init__(config)
         self.provider_name = 'transip'
         self.domain_id = None
+        # Working copy of the DNS entries of the domain, retrieved during the authentication
+        # and kept up to date with the changes applied by this provider.
+        self._dns_entries = None
 
         username = self._get_provider_option('auth_username')
         key_file = self._get_provider_option('auth_api_key')
@@ -66,7 +70,7 @@ class Provider(BaseProvider):
         # allowing us to check for existence
         domain = self.domain
         try:
-            self.client.get_info(domain)
+            self._fetch_dns_entries()
         except BaseException:
             raise Exception("Could not retrieve information about {0}, "
                             "is this domain yours?".format(domain))
@@ -74,7 +78,7 @@ class Provider(BaseProvider):
 
     # Create record. If record already exists with the same content, do nothing'
     def _create_record(self, rtype, name, content):
-        records = self.client.get_info(self.domain).dnsEntries
+        records = list(self._fetch_dns_entries())
 
         if self._filter_records(records, rtype, name, content):
             # Nothing to do, record already exists
@@ -101,8 +105,7 @@ class Provider(BaseProvider):
         return self._list_records_internal(rtype=rtype, name=name, content=content)
 
     def _list_records_internal(self, rtype=None, name=None, content=None, show_output=True):
-        all_records = self._convert_records(
-            self.client.get_info(self.domain).dnsEntries)
+        all_records = self._convert_records(self._fetch_dns_entries())
         records = self._filter_records(
             records=all_records,
             rtype=rtype,
@@ -161,6 +164,85 @@ class Provider(BaseProvider):
         LOGGER.debug('delete_record: %s', status)
         return status
 
+    def _apply_changes(self, changes):
+        """
+        Apply the given changes to the working copy of the DNS entries retrieved during the
+        authentication, then replace the DNS entries of the domain with one set_dns_entries
+        call, or with no call at all if the changes leave the entries unchanged. As the
+        replacement is all or nothing, if it fails all the changes are reported as failed.
+        """
+        if self._dns_entries is None:
+            self._fetch_dns_entries()
+        initial_records = self._convert_records(self._dns_entries)
+        records = copy.deepcopy(initial_records)
+
+        results = []
+        for change in changes:
+            backup = copy.deepcopy(records)
+            try:
+                self._apply_change_to_records(records, change)
+                results.append({'success': True, 'output': True})
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.debug('Change %s failed.', change, exc_info=True)
+                records = backup
+                results.append({'success': False,
+                                'error': '{0}: {1}'.format(type(error).__name__, error)})
+
+        if self._records_key(records) == self._records_key(initial_records):
+            LOGGER.debug('apply_changes: DNS entries unchanged, nothing to set')
+            return results
+
+        entries = self._convert_records_back(records)
+        try:
+            self.client.set_dns_entries(self.domain, entries)
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.debug('DNS entries replacement failed.', exc_info=True)
+            error = '{0}: {1}'.format(type(error).__name__, error)
+            return [{'success': False, 'error': result.get('error', error)}
+                    for result in results]
+
+        self._dns_entries = entries
+        return results
+
+    def _apply_change_to_records(self, records, change):
+        # Apply in place to the given records the given change, like the corresponding
+        # _create_record, _update_record or _delete_record would do.
+        action = change.get('action')
+        rtype, name, content = change.get('type'), change.get('name'), change.get('content')
+        if action == 'create':
+            if not rtype or not name or not content:
+                raise Exception('ERROR: rtype, name and content are required')
+            if self._filter_records(records, rtype, name,
+                                    self._bind_format_target(rtype, content)):
+                return
+        elif action in ('update', 'delete'):
+            if not (rtype or name or content):
+                raise Exception(
+                    "At least one of rtype, name or content must be specified.")
+            for record in self._filter_records(records, rtype, name,
+                                               content if action == 'delete' else None):
+                records.remove(record)
+            if action == 'delete':
+                return
+        else:
+            raise ValueError('Invalid action statement: {0}'.format(action))
+
+        records.append({
+            "name": self._full_name(name),
+            "type": rtype,
+            "content": self._bind_format_target(rtype, content),
+            "ttl": self._get_lexicon_option('ttl')
+        })
+
+    def _records_key(self, records):
+        return sorted((self._full_name(record['name']), record['type'], record['content'],
+                       record['ttl']) for record in records)
+
+    def _fetch_dns_entries(self):
+        """Retrieve the DNS entries of the domain, and keep them as the working copy."""
+        self._dns_entries = self.client.get_info(self.domain).dnsEntries
+        return self._dns_entries
+
     def _full_name(self, record_name):
         if record_name == "@":
             record_name = self.domain
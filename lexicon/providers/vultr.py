@@ -2,7 +2,6 @@
 from __future__ import absolute_import
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -56,7 +55,8 @@ class Provider(BaseProvider):
     # type, name and content are used to filter records.
     # If possible filter during the query, otherwise filter after response is received.
     def _list_records(self, rtype=None, name=None, content=None):
-        payload = self._get('/dns/records', {'domain': self.domain_id})
+        payload = self._zone_snapshot(
+            lambda: self._get('/dns/records', {'domain': self.domain_id}))
         records = []
         for record in payload:
             processed_record = {
@@ -141,9 +141,9 @@ class Provider(BaseProvider):
             'API-Key': self._get_provider_option('auth_token')
         }
 
-        response = requests.request(action, self.api_endpoint + url, params=query_params,
-                                    data=data,
-                                    headers=default_headers)
+        response = self.http_session.request(action, self.api_endpoint + url, params=query_params,
+                                             data=data,
+                                             headers=default_headers)
         # if the request fails for any reason, throw an error.
         response.raise_for_status()
 
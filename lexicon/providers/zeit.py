@@ -3,7 +3,6 @@ from __future__ import absolute_import
 import json
 import logging
 
-import requests
 from lexicon.providers.base import Provider as BaseProvider
 
 
@@ -166,7 +165,7 @@ class Provider(BaseProvider):
         if query_params is None:
             query_params = {}
 
-        request = requests.request(
+        request = self.http_session.request(
             action,
             self.api_endpoint + url,
             params=query_params,
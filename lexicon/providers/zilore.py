@@ -149,9 +149,10 @@ class Provider(BaseProvider):
         return True
 
     def _request(self, action='GET', url='/', data=None, query_params=None):
-        response = requests.request(action, 'https://api.zilore.com/dns/v1{0}'.format(url),
-                                    params=query_params, json=data,
-                                    headers={'X-Auth-Key': self._get_provider_option('auth_key')})
+        response = self.http_session.request(
+            action, 'https://api.zilore.com/dns/v1{0}'.format(url),
+            params=query_params, json=data,
+            headers={'X-Auth-Key': self._get_provider_option('auth_key')})
 
         try:
             response.raise_for_status()
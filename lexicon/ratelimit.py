@@ -0,0 +1,262 @@
+"""
+Rate limiting primitives used by Lexicon to stay under the quotas of the DNS providers APIs.
+
+A TokenBucket limits the operations of one process. A RateLimiter limits the requests sent to
+one provider API: it enforces the quotas of the API, and slows down as asked by the API itself
+(429 responses, Retry-After and X-RateLimit-* headers). Its state is kept in memory, or with the
+'disk' storage in the Lexicon cache (see lexicon.cache), so every Lexicon process shares it.
+"""
+from __future__ import absolute_import
+import copy
+import email.utils
+import logging
+import threading
+import time
+from timeit import default_timer
+
+from lexicon import cache
+
+
+LOGGER = logging.getLogger(__name__)
+
+STORAGES = ('memory', 'disk')
+DEFAULT_STORAGE = 'memory'
+DEFAULT_MAX_WAIT = 300
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1
+
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+class TokenBucket(object):  # pylint: disable=useless-object-inheritance
+    """
+    Thread-safe token bucket: on average `rate` tokens are delivered per second,
+    with bursts up to `capacity` tokens (by default, one second worth of tokens).
+    """
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError('Rate of a token bucket must be strictly positive.')
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._last = default_timer()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = default_timer()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take the given number of tokens if available, and return 0. Otherwise nothing is taken,
+        and the number of seconds to wait before the tokens are available is returned.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        """Take the given number of tokens, blocking until they are available."""
+        wait = self.try_acquire(tokens)
+        while wait:
+            time.sleep(wait)
+            wait = self.try_acquire(tokens)
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request to a provider API could only be sent after waiting longer than
+    allowed, typically because a daily quota is exhausted or the API asked to wait too long.
+    """
+    def __init__(self, name, wait):
+        super(RateLimitExceeded, self).__init__(
+            'Rate limit of {0} exceeded, next request allowed in {1:.0f} seconds.'
+            .format(name, wait))
+        self.name = name
+        self.wait = wait
+
+
+class RateLimiter(object):  # pylint: disable=useless-object-inheritance
+    """
+    Thread-safe rate limiter of the requests sent to one provider API.
+
+    :param name: name of the limiter, typically the provider name and a fingerprint of the account
+    :param quotas: iterable of (requests, seconds) tuples, each one allowing at most `requests`
+    requests in `seconds` seconds, with bursts up to `requests` requests
+    :param storage: 'memory' to share the limiter state within the process, or 'disk' to also
+    share it with other Lexicon processes
+    :param max_wait: maximum number of seconds to wait before sending a request, beyond which
+    RateLimitExceeded is raised instead
+    """
+    def __init__(self, name, quotas=(), storage='memory', max_wait=DEFAULT_MAX_WAIT):
+        if storage not in STORAGES:
+            raise ValueError('Invalid rate limit storage {0}, must be one of: {1}.'
+                             .format(storage, ', '.join(STORAGES)))
+        self.name = name
+        self.quotas = tuple((float(requests), float(seconds)) for requests, seconds in quotas)
+        self.storage = storage
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def acquire(self):
+        """Wait until a request can be sent to the API, and count it in the quotas."""
+        wait = self._try_acquire()
+        while wait:
+            if wait > self.max_wait:
+                raise RateLimitExceeded(self.name, wait)
+            LOGGER.info('Rate limit of %s reached, waiting %.1f seconds.', self.name, wait)
+            time.sleep(wait)
+            wait = self._try_acquire()
+
+    def block(self, seconds):
+        """Prevent any request to be sent to the API for the given number of seconds."""
+        def _block(state):
+            state['blocked_until'] = max(state.get('blocked_until') or 0, time.time() + seconds)
+        self._update_state(_block)
+
+    def observe(self, response, attempt=0):
+        """
+        Update the limiter from the given requests.Response of the API: a Retry-After header on
+        a 429 or 503 response, or an X-RateLimit-Remaining header announcing that no request is
+        left until X-RateLimit-Reset, blocks the requests for the time asked. If the response is
+        a 429, return the delay before sending the request again (its attempt-th retry), which
+        is an exponential backoff if the API did not give any. Otherwise return None.
+        """
+        headers = response.headers
+        delay = _parse_retry_after(headers.get('Retry-After'))
+        if response.status_code == 429 and delay is None:
+            delay = DEFAULT_BACKOFF * 2 ** attempt
+        if response.status_code not in (429, 503):
+            delay = None
+
+        remaining = _parse_number(headers.get('X-RateLimit-Remaining')
+                                  or headers.get('RateLimit-Remaining'))
+        if remaining is not None and remaining <= 0:
+            reset = _parse_reset(headers.get('X-RateLimit-Reset')
+                                 or headers.get('RateLimit-Reset'))
+            if reset is not None:
+                delay = max(delay or 0, reset)
+
+        if delay:
+            LOGGER.debug('Rate limit of %s asked by the API: %.1f seconds.', self.name, delay)
+            self.block(delay)
+
+        if response.status_code == 429:
+            return delay or 0
+        return None
+
+    def _try_acquire(self):
+        # Without quotas, the state is only read, so no lock is needed.
+        if not self.quotas:
+            return max(0, (self._load_state().get('blocked_until') or 0) - time.time())
+
+        def _take(state):
+            now = time.time()
+            tokens = state.get('tokens')
+            if not isinstance(tokens, list) or len(tokens) != len(self.quotas):
+                tokens = [requests for requests, _ in self.quotas]
+            elapsed = max(0, now - (state.get('timestamp') or now))
+            tokens = [min(requests, value + elapsed * requests / seconds)
+                      for (requests, seconds), value in zip(self.quotas, tokens)]
+            state['tokens'], state['timestamp'] = tokens, now
+
+            wait = max(0, (state.get('blocked_until') or 0) - now)
+            for (requests, seconds), value in zip(self.quotas, tokens):
+                if value < 1:
+                    wait = max(wait, (1 - value) * seconds / requests)
+            if not wait:
+                state['tokens'] = [value - 1 for value in tokens]
+            return wait
+
+        return self._update_state(_take)
+
+    def _load_state(self):
+        if self.storage == 'disk':
+            state = cache.load(self._cache_name())
+            return state if isinstance(state, dict) else {}
+        with self._lock:
+            return copy.deepcopy(self._state)
+
+    def _update_state(self, function):
+        if self.storage == 'disk':
+            with cache.lock(self._cache_name()):
+                state = self._load_state()
+                result = function(state)
+                cache.save(self._cache_name(), state)
+            return result
+        with self._lock:
+            return function(self._state)
+
+    def _cache_name(self):
+        return 'rate_limit_{0}.json'.format(self.name)
+
+
+def get_rate_limiter(name, quotas=(), storage='memory', max_wait=DEFAULT_MAX_WAIT):
+    """
+    Return the RateLimiter of the given name shared process-wide for the given configuration,
+    creating it if needed.
+    """
+    key = (name, tuple(tuple(quota) for quota in quotas), storage, max_wait)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if not limiter:
+            limiter = RateLimiter(name, quotas, storage, max_wait)
+            _LIMITERS[key] = limiter
+    return limiter
+
+
+def parse_quotas(value):
+    """
+    Parse quotas given as a comma separated list of REQUESTS/SECONDS elements,
+    eg. '60/60,1000/86400' for 60 requests per minute and 1000 requests per day.
+    The value 'none' disables any quota.
+    """
+    quotas = []
+    if value.strip().lower() == 'none':
+        return quotas
+    for item in value.split(','):
+        if item.strip():
+            try:
+                requests, seconds = item.split('/')
+                quotas.append((int(requests), float(seconds)))
+            except ValueError:
+                raise ValueError('Invalid quota {0}, must be in the form REQUESTS/SECONDS.'
+                                 .format(item.strip()))
+    return quotas
+
+
+def clear():
+    """Forget every shared rate limiter. Limiters state stored on disk is not affected."""
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
+
+
+def _parse_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date.
+    seconds = _parse_number(value)
+    if seconds is None and value:
+        date = email.utils.parsedate_tz(str(value))
+        if date:
+            seconds = email.utils.mktime_tz(date) - time.time()
+    return max(0, seconds) if seconds is not None else None
+
+
+def _parse_reset(value):
+    # X-RateLimit-Reset is either a number of seconds or a UNIX timestamp, depending on the API.
+    reset = _parse_number(value)
+    if reset is not None and reset > 10 ** 9:
+        reset -= time.time()
+    return max(0, reset) if reset is not None else None
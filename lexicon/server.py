@@ -0,0 +1,298 @@
+"""
+Lexicon server, executing operations received over a local HTTP API.
+
+A server keeps the providers it instantiates authenticated between operations, and their HTTP
+sessions alive, so successive operations on a same zone are much cheaper than successive
+invocations of the Lexicon CLI. It listens either on a Unix socket (address is a file path),
+or on a TCP port (address is in the form host:port, localhost is strongly advised).
+
+Operations hold credentials, so only their owner may send them to the server: a Unix socket is
+only accessible to the user running the server, and a TCP port requires clients to present the
+token given to the server in the LEXICON_SERVER_TOKEN environment variable.
+
+The server resolves the parameters missing from an operation with the environment variables and
+the configuration directory it was started with. The Lexicon CLI sends a fingerprint of its own
+LEXICON_* environment variables and configuration directory with its operations, and the server
+refuses them if they differ from its own: the CLI then executes the operation locally.
+
+The API has two endpoints:
+    * POST /operations: execute the operation given as a JSON object in the request body,
+      in the format of a batch operation (see lexicon.batch), and return its JSON result
+    * GET /health: return the status of the server
+
+Operations are executed one at a time, in the order they are received.
+"""
+from __future__ import absolute_import
+import hashlib
+import hmac
+import json
+import logging
+import os
+import socket
+try:
+    from http.client import HTTPConnection
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import UnixStreamServer
+except ImportError:
+    from httplib import HTTPConnection
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import UnixStreamServer
+
+from lexicon import cache
+from lexicon.batch import BatchClient
+
+
+LOGGER = logging.getLogger(__name__)
+
+SOCKET_FILE = 'server.sock'
+TOKEN_ENVIRONMENT_VARIABLE = 'LEXICON_SERVER_TOKEN'
+CONTEXT_HEADER = 'X-Lexicon-Context'
+
+# Parameters of the CLI that are not operation parameters.
+_CLI_PARAMETERS = ('config_dir', 'log_level', 'output', 'server_address')
+# Parameters of an operation that are not specific to its provider.
+_GENERIC_PARAMETERS = ('provider_name', 'action', 'domain', 'delegated', 'identifier',
+                       'type', 'name', 'content', 'ttl', 'priority', 'propagation_timeout')
+
+
+class ServerError(Exception):
+    """An operation executed by a Lexicon server failed."""
+
+
+class ServerUnavailable(ServerError):
+    """No Lexicon server could be reached at the given address."""
+
+
+class ServerContextMismatch(ServerUnavailable):
+    """The Lexicon server does not share the environment and configuration of the client."""
+
+
+class LexiconServer(object):  # pylint: disable=useless-object-inheritance
+    """
+    Serve the Lexicon API on the given address.
+
+    :param address: file path of a Unix socket, or host:port for a TCP socket
+    :param config: ConfigResolver used as a fallback for any parameter not defined by an
+    operation itself, typically to hold the credentials of the providers.
+    :param context: fingerprint of the environment and configuration directory of config, as
+    returned by context_fingerprint(): operations sent with another fingerprint are refused.
+    :param token: token that clients must present, required to listen on a TCP port.
+    """
+    def __init__(self, address, config=None, context=None, token=None):
+        self.address = address
+        self.context = context
+        self.token = token
+        self.batch_client = BatchClient(config)
+        self._http_server = None
+
+    def execute(self, operation):
+        """Execute one operation, and return its result."""
+        result = self.batch_client.execute_operation(operation)
+        if not result['success']:
+            # The provider may be in a bad state (eg. expired session): it will be
+            # authenticated again on the next operation on this zone.
+            self.batch_client.forget(operation)
+        return result
+
+    def serve_forever(self):
+        """Listen on the server address, and execute operations until shutdown() is called."""
+        unix_socket = _parse_address(self.address)
+        if isinstance(unix_socket, tuple):
+            if not self.token:
+                raise ServerError('A token must be given in the {0} environment variable to '
+                                  'listen on a TCP port.'.format(TOKEN_ENVIRONMENT_VARIABLE))
+            self._http_server = HTTPServer(unix_socket, _RequestHandler)
+        else:
+            directory = os.path.dirname(os.path.abspath(unix_socket))
+            if not os.path.isdir(directory):
+                os.makedirs(directory, 0o700)
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            # Operations hold credentials: only the current user may talk to the server. The
+            # socket is created with these permissions, they are not granted afterwards.
+            umask = os.umask(0o177)
+            try:
+                self._http_server = _UnixHTTPServer(unix_socket, _RequestHandler)
+            finally:
+                os.umask(umask)
+        self._http_server.lexicon_server = self  # pylint: disable=attribute-defined-outside-init
+
+        LOGGER.info('Lexicon server listening on %s', self.address)
+        try:
+            self._http_server.serve_forever()
+        finally:
+            self._http_server.server_close()
+            if not isinstance(unix_socket, tuple) and os.path.exists(unix_socket):
+                os.remove(unix_socket)
+
+    def shutdown(self):
+        """Stop serving, this method must be called from another thread than serve_forever()."""
+        if self._http_server:
+            self._http_server.shutdown()
+
+
+class _UnixHTTPServer(UnixStreamServer):
+    allow_reuse_address = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve the health endpoint"""
+        if self.path == '/health':
+            self._reply(200, {'status': 'ok', 'pid': os.getpid()})
+        else:
+            self._reply(404, {'error': 'Not found'})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Serve the operations endpoint"""
+        if self.path != '/operations':
+            self._reply(404, {'error': 'Not found'})
+            return
+
+        lexicon_server = self.server.lexicon_server
+        if lexicon_server.token and not hmac.compare_digest(
+                self.headers.get('Authorization') or '',
+                'Bearer {0}'.format(lexicon_server.token)):
+            self._reply(401, {'error': 'Invalid token'})
+            return
+        context = self.headers.get(CONTEXT_HEADER)
+        if context and lexicon_server.context and context != lexicon_server.context:
+            self._reply(409, {'error': 'The environment or the configuration directory of the '
+                                       'client differs from the one of the server'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            operation = json.loads(self.rfile.read(length).decode('utf-8'))
+        except ValueError as error:
+            # Reported as a failed operation by the batch client.
+            operation = error
+
+        self._reply(200, lexicon_server.execute(operation))
+
+    def _reply(self, status, data):
+        body = json.dumps(data, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Clients of a Unix socket have no address.
+        return self.client_address[0] if self.client_address else self.server.server_address
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        LOGGER.debug(format, *args)
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path, timeout=None):
+        HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # pylint: disable=no-member
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def default_address():
+    """
+    Return the default address of a Lexicon server: a Unix socket in the Lexicon cache directory
+    if Unix sockets are supported by the platform, otherwise the port 8053 of localhost.
+    """
+    if hasattr(socket, 'AF_UNIX'):
+        return os.path.join(cache.get_cache_dir(), SOCKET_FILE)
+    return 'localhost:8053'
+
+
+def find_server(address=None):
+    """
+    Return the address of the Lexicon server to use: the given address if any, otherwise the
+    default address if a server Unix socket exists there, otherwise None.
+    """
+    if address:
+        return address
+    address = default_address()
+    if not isinstance(_parse_address(address), tuple) and os.path.exists(address):
+        return address
+    return None
+
+
+def context_fingerprint(config_dir=None):
+    """
+    Return a fingerprint of the LEXICON_* environment variables and of the given configuration
+    directory, that identifies the parameters a Lexicon server would resolve for an operation.
+    """
+    environment = sorted((key, value) for key, value in os.environ.items()
+                         if key.startswith('LEXICON') and not key.startswith('LEXICON_SERVER'))
+    config_dir = os.path.realpath(config_dir) if config_dir else None
+    data = json.dumps([environment, config_dir]).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def execute(address, operation, timeout=None, context=None):
+    """
+    Send the given operation to the Lexicon server at the given address, and return its result.
+    The token of the LEXICON_SERVER_TOKEN environment variable is presented to the server if set.
+    Raise ServerUnavailable if the server cannot be reached, and ServerContextMismatch if the
+    given context fingerprint differs from the one of the server.
+    """
+    unix_socket = _parse_address(address)
+    if isinstance(unix_socket, tuple):
+        connection = HTTPConnection(unix_socket[0], unix_socket[1], timeout=timeout)
+    else:
+        connection = _UnixHTTPConnection(unix_socket, timeout=timeout)
+
+    body = json.dumps(operation)
+    headers = {'Content-Type': 'application/json'}
+    if os.environ.get(TOKEN_ENVIRONMENT_VARIABLE):
+        headers['Authorization'] = 'Bearer {0}'.format(os.environ[TOKEN_ENVIRONMENT_VARIABLE])
+    if context:
+        headers[CONTEXT_HEADER] = context
+    try:
+        connection.connect()
+    except (IOError, OSError) as error:
+        raise ServerUnavailable('Lexicon server {0} unavailable: {1}'.format(address, error))
+
+    try:
+        connection.request('POST', '/operations', body, headers)
+        response = connection.getresponse()
+        data = response.read().decode('utf-8')
+    finally:
+        connection.close()
+
+    if response.status == 409:
+        raise ServerContextMismatch('Lexicon server {0} refused the operation: {1}'.format(
+            address, data))
+    if response.status != 200:
+        raise ServerError('Lexicon server {0} replied {1}: {2}'.format(
+            address, response.status, data))
+
+    return json.loads(data)
+
+
+def operation_from_args(parsed_args):
+    """Build the operation corresponding to the parsed arguments of a Lexicon CLI invocation."""
+    operation = {}
+    provider_options = {}
+    for key, value in vars(parsed_args).items():
+        if value is None or key in _CLI_PARAMETERS:
+            continue
+        if key in _GENERIC_PARAMETERS:
+            operation[key] = value
+        else:
+            provider_options[key] = value
+
+    operation[parsed_args.provider_name] = provider_options
+    return operation
+
+
+def _parse_address(address):
+    """Return the (host, port) tuple of a TCP address, or the path of a Unix socket."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit() and os.sep not in address:
+        return (host, int(port))
+    return address
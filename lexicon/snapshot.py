@@ -0,0 +1,101 @@
+"""
+Zone snapshots: copies of the content of a DNS zone as downloaded from a provider API, kept to
+answer subsequent operations on the same zone without downloading it again.
+
+Snapshots are always kept in memory for the lifetime of the process. With the 'disk' storage,
+they are also stored in the Lexicon cache (see lexicon.cache), so they are shared across Lexicon
+invocations. A snapshot is used as is until it is older than its time-to-live, then it must be
+revalidated against the provider API (see lexicon.providers.base.Provider._zone_snapshot).
+"""
+from __future__ import absolute_import
+import copy
+import hashlib
+import logging
+import threading
+import time
+
+from lexicon import cache
+
+
+LOGGER = logging.getLogger(__name__)
+
+STORAGES = ('memory', 'disk')
+DEFAULT_TTL = 60
+
+_SNAPSHOTS = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+class ZoneSnapshot(object):  # pylint: disable=useless-object-inheritance
+    """
+    Content of a zone at a given time.
+
+    :param data: JSON serializable content of the zone, as returned by the provider API
+    :param validator: token identifying the version of the zone content (eg. a serial),
+    used to revalidate the snapshot once expired
+    :param timestamp: time of the last (re)validation of the snapshot, in seconds since epoch
+    """
+    def __init__(self, data, validator=None, timestamp=None):
+        self.data = data
+        self.validator = validator
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    def is_fresh(self, ttl):
+        """Check if the snapshot has been (re)validated less than ttl seconds ago."""
+        return 0 <= time.time() - self.timestamp < ttl
+
+    def to_dict(self):
+        """Serialize the snapshot."""
+        return {'data': self.data, 'validator': self.validator, 'timestamp': self.timestamp}
+
+    @classmethod
+    def from_dict(cls, value):
+        """Deserialize a snapshot."""
+        return cls(value['data'], value.get('validator'), value['timestamp'])
+
+
+def load(key, storage='memory'):
+    """Return a copy of the snapshot stored for the given key, or None if there is none."""
+    with _SNAPSHOTS_LOCK:
+        snapshot = _SNAPSHOTS.get(key)
+
+    if not snapshot and storage == 'disk':
+        value = cache.load(_cache_name(key))
+        try:
+            snapshot = ZoneSnapshot.from_dict(value) if value else None
+        except (KeyError, TypeError):
+            LOGGER.debug('Invalid zone snapshot in cache for %s, ignoring it.', key)
+            snapshot = None
+        if snapshot:
+            with _SNAPSHOTS_LOCK:
+                _SNAPSHOTS[key] = snapshot
+
+    return copy.deepcopy(snapshot)
+
+
+def save(key, snapshot, storage='memory'):
+    """Store a copy of the given snapshot for the given key."""
+    snapshot = copy.deepcopy(snapshot)
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS[key] = snapshot
+    if storage == 'disk':
+        cache.save(_cache_name(key), snapshot.to_dict())
+
+
+def invalidate(key, storage='memory'):
+    """Drop the snapshot stored for the given key, if any."""
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS.pop(key, None)
+    if storage == 'disk':
+        cache.delete(_cache_name(key))
+
+
+def clear():
+    """Drop every snapshot held in memory. Snapshots stored on disk are not affected."""
+    with _SNAPSHOTS_LOCK:
+        _SNAPSHOTS.clear()
+
+
+def _cache_name(key):
+    return 'zone_snapshot_{0}.json'.format(
+        hashlib.sha1('/'.join(key).encode('utf-8')).hexdigest())
@@ -0,0 +1,10 @@
+"""Pytest fixtures shared by the unit tests of Lexicon."""
+import mock
+import pytest
+
+
+@pytest.fixture(name='http_session')
+def fixture_http_session():
+    """Serve the HTTP requests of every provider from a mock, in place of its requests.Session"""
+    with mock.patch('lexicon.pool.build_session') as build_session:
+        yield build_session.return_value
@@ -0,0 +1,31 @@
+"""Fake HTTP responses, to be served by the http_session fixture"""
+from __future__ import absolute_import
+
+import json
+
+import mock
+import requests
+
+
+def response(data=None, status_code=200, reason=None):
+    """
+    Build a response of the given status code, holding the given data as JSON body. The
+    response has no body if data is None, and raises an HTTPError of the given reason from
+    raise_for_status if the status code is an error.
+    """
+    fake = mock.Mock(status_code=status_code, text=json.dumps(data) if data is not None else '')
+    if data is None:
+        fake.json.side_effect = ValueError
+    else:
+        fake.json.return_value = data
+    if status_code >= 400:
+        message = '{0} Client Error'.format(status_code)
+        fake.raise_for_status.side_effect = requests.exceptions.HTTPError(
+            '{0}: {1}'.format(message, reason) if reason else message)
+    return fake
+
+
+def sent_requests(http_session):
+    """Return the method, URL and JSON body of the requests sent through the http_session"""
+    return [(call[0][0], call[0][1], json.loads(call[1]['data']))
+            for call in http_session.request.call_args_list]
@@ -418,6 +418,12 @@ class IntegrationTests(object):  # pylint: disable=useless-object-inheritance,to
         overrides = self._test_parameters_overrides()
         overrides['domain'] = self.domain
         overrides['provider_name'] = self.provider_name
+        if RECORD_MODE == 'none':
+            # VCR.py playback is not thread-safe: requests are sent sequentially.
+            overrides.setdefault('http_pool_maxsize', 1)
+        # Quotas of the provider API are not enforced during tests, as the placeholder
+        # given by the fallback function would not be a valid value anyway.
+        overrides.setdefault('rate_limit_quotas', 'none')
         config.with_config_source(EngineOverrideConfigSource(overrides))
 
         # Then we get environment variables
@@ -34,4 +34,5 @@ class GoogleCloudDnsTests(TestCase, IntegrationTests):
     #
     # Override _test_options to call env_auth_options and then import auth config from env variables
     def _test_parameters_overrides(self):
-        return {'auth_service_account_info': 'base64::{0}'.format(SERVICE_ACCOUNT_INFO_BASE64)}
+        return {'auth_service_account_info': 'base64::{0}'.format(SERVICE_ACCOUNT_INFO_BASE64),
+                'token_cache': 'memory'}
@@ -0,0 +1,194 @@
+"""Unit tests for the batch execution of Lexicon operations"""
+# pylint: disable=missing-docstring
+from __future__ import absolute_import
+import io
+import json
+import threading
+import time
+
+import mock
+import pytest
+
+from lexicon import cli
+from lexicon.batch import BatchClient, ConcurrentBatchClient, read_operations
+from lexicon.config import ConfigResolver
+from lexicon.tests.test_library import Provider, mock_fake_provider
+
+
+@pytest.fixture(autouse=True)
+def fake_provider():
+    """Activate the fake_provider mock"""
+    with mock_fake_provider():
+        yield
+
+
+def _operation(**kwargs):
+    operation = {'provider_name': 'fakeprovider', 'action': 'create',
+                 'domain': 'example.com', 'type': 'TXT', 'name': 'fake', 'content': 'fake'}
+    operation.update(kwargs)
+    return operation
+
+
+def test_batch_executes_operations_in_order():
+    operations = [_operation(),
+                  _operation(action='list', content=None),
+                  _operation(action='delete', identifier='fake-id')]
+
+    results = list(BatchClient(ConfigResolver()).execute(operations))
+
+    assert [result['index'] for result in results] == [0, 1, 2]
+    assert all(result['success'] for result in results)
+    assert [result['output']['action'] for result in results] == ['create', 'list', 'delete']
+    assert results[1]['output']['content'] is None
+    assert results[2]['output']['identifier'] == 'fake-id'
+
+
+def test_batch_authenticates_once_per_zone():
+    operations = [_operation(),
+                  _operation(domain='www.example.com'),
+                  _operation(domain='example.net'),
+                  _operation(domain='sub.example.com', delegated='sub')]
+
+    with mock.patch.object(Provider, '_authenticate') as mock_authenticate:
+        results = list(BatchClient(ConfigResolver()).execute(operations))
+
+    assert mock_authenticate.call_count == 3
+    assert [result['output']['domain'] for result in results] \
+        == ['example.com', 'example.com', 'example.net', 'sub.example.com']
+
+
+def test_batch_authenticates_once_per_credentials():
+    operations = [_operation(fakeprovider={'auth_token': token})
+                  for token in ('FIRST', 'SECOND', 'FIRST')]
+    tokens = []
+
+    def _authenticate(provider):
+        tokens.append(provider.config.resolve('lexicon:fakeprovider:auth_token'))
+
+    with mock.patch.object(Provider, '_authenticate', autospec=True, side_effect=_authenticate):
+        results = list(BatchClient(ConfigResolver()).execute(operations))
+
+    assert all(result['success'] for result in results)
+    assert tokens == ['FIRST', 'SECOND']
+
+
+def test_batch_authenticates_again_after_a_failure():
+    operations = [_operation(), _operation(action='list'), _operation(name='another')]
+
+    with mock.patch.object(Provider, '_authenticate',
+                           side_effect=[Exception('Temporary failure'), None]) as authenticate:
+        results = list(BatchClient(ConfigResolver()).execute(operations))
+
+    assert [result['success'] for result in results] == [False, True, True]
+    assert results[0]['error'] == 'Exception: Temporary failure'
+    assert authenticate.call_count == 2
+
+
+def test_batch_reports_failures_without_interrupting():
+    operations = [_operation(action=None),
+                  _operation(provider_name='unknownprovider'),
+                  _operation(action='invalid'),
+                  ValueError('Invalid JSON'),
+                  _operation()]
+
+    results = list(BatchClient(ConfigResolver()).execute(operations))
+
+    assert [result['success'] for result in results] == [False, False, False, False, True]
+    assert results[0]['error'] == 'AttributeError: action'
+    assert results[1]['error'].startswith('ProviderNotAvailableError')
+    assert results[3]['error'] == 'ValueError: Invalid JSON'
+
+
+def test_batch_applies_successive_changes_together():
+    operations = [_operation(name='a'), _operation(action='delete', name='b'),
+                  _operation(action='list'),
+                  _operation(name='c'), _operation(name='d', ttl=60),
+                  _operation(name='e', ttl=60)]
+
+    with mock.patch.object(Provider, '_apply_changes',
+                           side_effect=lambda changes: [{'success': True, 'output': True}
+                                                        for _ in changes]) as apply_changes:
+        results = list(BatchClient(ConfigResolver()).execute(operations))
+
+    assert [result['index'] for result in results] == [0, 1, 2, 3, 4, 5]
+    assert all(result['success'] for result in results)
+    assert [[change['name'] for change in call[0][0]]
+            for call in apply_changes.call_args_list] == [['a', 'b'], ['d', 'e']]
+    assert apply_changes.call_args_list[0][0][0][1] == {
+        'action': 'delete', 'type': 'TXT', 'name': 'b', 'content': 'fake', 'identifier': None}
+
+
+def test_batch_reports_failures_of_changes_applied_together():
+    operations = [_operation(name='a'), _operation(name='b')]
+
+    with mock.patch.object(Provider, '_authenticate', side_effect=Exception('Unauthorized')):
+        results = list(BatchClient(ConfigResolver()).execute(operations))
+
+    assert [(result['index'], result['name'], result['success']) for result in results] \
+        == [(0, 'a', False), (1, 'b', False)]
+    assert results[1]['error'] == 'Exception: Unauthorized'
+
+
+def test_read_operations_from_json_lines():
+    stream = io.StringIO(u'{"action": "list"}\n\n{invalid\n')
+
+    operations = list(read_operations(stream))
+
+    assert operations[0] == {'action': 'list'}
+    assert isinstance(operations[1], ValueError)
+
+
+def test_cli_batch_outputs_one_json_line_per_operation(tmpdir, capsys):
+    batch_file = tmpdir.join('operations.jsonl')
+    batch_file.write('\n'.join(json.dumps(_operation(name=name)) for name in ('a', 'b')))
+
+    success = cli.execute_batch(BatchClient(ConfigResolver()), str(batch_file))
+
+    out, _ = capsys.readouterr()
+    # Fake provider prints its own trace on authentication, that is ignored here.
+    lines = [json.loads(line) for line in out.splitlines() if line.startswith('{')]
+    assert success
+    assert [line['output']['name'] for line in lines] == ['a', 'b']
+
+
+def test_batch_reports_elapsed_time():
+    results = list(BatchClient(ConfigResolver()).execute([_operation()]))
+
+    assert results[0]['elapsed'] >= 0
+
+
+def test_concurrent_batch_keeps_order_of_operations_per_zone():
+    operations = [_operation(domain='example{0}.com'.format(index % 3), name=str(index))
+                  for index in range(30)]
+
+    results = list(ConcurrentBatchClient(ConfigResolver(), workers=3).execute(operations))
+
+    assert sorted(result['index'] for result in results) == list(range(30))
+    for domain in ('example0.com', 'example1.com', 'example2.com'):
+        indexes = [result['index'] for result in results
+                   if result['output']['domain'] == domain]
+        assert indexes == sorted(indexes)
+
+
+def test_concurrent_batch_respects_provider_concurrency():
+    lock = threading.Lock()
+    state = {'current': 0, 'max': 0}
+
+    def _create_record(provider, _rtype, _name, _content):
+        with lock:
+            state['current'] += 1
+            state['max'] = max(state['max'], state['current'])
+        time.sleep(0.01)
+        with lock:
+            state['current'] -= 1
+        return {'action': 'create', 'domain': provider.domain}
+
+    operations = [_operation(domain='example{0}.com'.format(index)) for index in range(8)]
+
+    with mock.patch.object(Provider, '_create_record', _create_record):
+        results = list(ConcurrentBatchClient(ConfigResolver(), workers=4,
+                                             concurrency={'fakeprovider': 2})
+                       .execute(operations))
+
+    assert all(result['success'] for result in results)
+    assert state['max'] == 2
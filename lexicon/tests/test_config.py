@@ -1,6 +1,8 @@
 """Unit tests for the Lexicon config mechanism"""
 # pylint: disable=redefined-outer-name,missing-docstring
-from lexicon.config import ConfigResolver, ConfigSource
+import mock
+
+from lexicon.config import ConfigResolver, ConfigSource, DictConfigSource
 from lexicon.parser import generate_cli_main_parser
 
 
@@ -116,3 +118,40 @@ def test_prioritized_resolution(tmpdir, monkeypatch):
         'lexicon:cloudflare:auth_token') == 'TEST1'
     assert ConfigResolver().with_env().with_config_file(
         str(lexicon_file)).resolve('lexicon:cloudflare:auth_token') == 'TEST2'
+
+
+def test_cacheable_sources_are_memoized():
+    source = mock.Mock(cacheable=True, resolve=mock.Mock(return_value='TEST1'))
+    config = ConfigResolver().with_config_source(source)
+
+    assert config.resolve('lexicon:delegated') == 'TEST1'
+    assert config.resolve('lexicon:delegated') == 'TEST1'
+    assert source.resolve.call_count == 1
+
+
+def test_other_sources_are_queried_each_time():
+    class OperationConfigSource(ConfigSource):  # pylint: disable=too-few-public-methods
+        def __init__(self):
+            super(OperationConfigSource, self).__init__()
+            self.value = None
+
+        def resolve(self, config_key):
+            return self.value
+
+    source = OperationConfigSource()
+    config = ConfigResolver().with_config_source(source).with_dict({'delegated': 'TEST1'})
+
+    assert config.resolve('lexicon:delegated') == 'TEST1'
+    source.value = 'TEST2'
+    assert config.resolve('lexicon:delegated') == 'TEST2'
+
+
+def test_memoized_values_are_dropped_when_a_source_is_added():
+    config = ConfigResolver().with_dict({'delegated': 'TEST1'})
+    assert config.resolve('lexicon:delegated') == 'TEST1'
+    assert config.resolve('lexicon:ttl') is None
+
+    config.add_config_source(DictConfigSource({'delegated': 'TEST2', 'ttl': 3600}), 0)
+
+    assert config.resolve('lexicon:delegated') == 'TEST2'
+    assert config.resolve('lexicon:ttl') == 3600
@@ -0,0 +1,91 @@
+"""Unit tests for the discovery of Lexicon providers"""
+# pylint: disable=missing-docstring
+from __future__ import absolute_import
+import argparse
+
+import mock
+import pytest
+
+from lexicon import cache, discovery
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmpdir, monkeypatch):
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(discovery, '_MANIFEST', {})
+    return tmpdir
+
+
+def test_list_providers():
+    providers = discovery.list_providers()
+
+    assert 'cloudflare' in providers
+    assert 'auto' in providers
+    assert 'base' not in providers
+
+
+def test_manifest_describes_providers():
+    manifest = discovery.get_manifest()
+
+    assert 'auto' not in manifest
+    assert 'ovh.net' in manifest['ovh']['nameserver_domains']
+    assert {'regex': r'^awsdns-\d+\.\w+$'} in manifest['route53']['nameserver_domains']
+    assert '--auth-token' in [option for argument in manifest['cloudflare']['arguments']
+                              for option in argument['option_strings']]
+
+
+def test_manifest_is_cached_on_disk():
+    manifest = discovery.get_manifest()
+    discovery._MANIFEST.clear()  # pylint: disable=protected-access
+
+    with mock.patch('lexicon.discovery.generate_manifest') as mock_generate:
+        assert discovery.get_manifest() == manifest
+
+    assert not mock_generate.called
+    assert cache.load(discovery.MANIFEST_FILE)['providers'] == manifest
+
+
+def test_manifest_is_regenerated_when_providers_change():
+    discovery.get_manifest()
+
+    with mock.patch('lexicon.discovery._providers_fingerprint', return_value='changed'), \
+            mock.patch('lexicon.discovery.generate_manifest', return_value={}) as mock_generate:
+        assert discovery.get_manifest() == {}
+
+    assert mock_generate.called
+
+
+def test_manifest_is_regenerated_when_packages_are_installed(tmpdir, monkeypatch):
+    site_packages = tmpdir.mkdir('site-packages')
+    monkeypatch.syspath_prepend(str(site_packages))
+    discovery.get_manifest()
+
+    site_packages.mkdir('optional_dependency')
+    site_packages.setmtime(site_packages.mtime() + 10)
+    with mock.patch('lexicon.discovery.generate_manifest', return_value={}) as mock_generate:
+        assert discovery.get_manifest() == {}
+
+    assert mock_generate.called
+
+
+def test_manifest_arguments_are_rebuilt():
+    parser = argparse.ArgumentParser()
+    discovery.add_manifest_arguments(parser, discovery.get_manifest()['namecheap']['arguments'],
+                                     option_prefix='namecheap-', dest_prefix='auto_namecheap_')
+
+    parsed = parser.parse_args(['--namecheap-auth-username', 'USERNAME'])
+
+    assert parsed.auto_namecheap_auth_username == 'USERNAME'
+    assert parsed.auto_namecheap_auth_sandbox is False
+
+
+def test_nameserver_domains_matcher():
+    matchers = discovery.nameserver_domains_matcher(['ovh.net', {'regex': r'^awsdns-\d+$'}])
+
+    assert matchers[0] == 'ovh.net'
+    assert matchers[1].match('awsdns-42')
+
+
+def test_provider_availability_is_cached():
+    assert discovery.is_provider_available('cloudflare')
+    assert 'cloudflare' in cache.load(discovery.AVAILABILITY_FILE)['providers']
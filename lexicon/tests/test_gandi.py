@@ -0,0 +1,90 @@
+"""Unit tests for the zone versions (XML-RPC) and RRSet updates (LiveDNS) of the Gandi provider"""
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import gandi
+
+
+def _provider(protocol):
+    return gandi.Provider(ConfigResolver().with_dict({
+        'provider_name': 'gandi', 'domain': 'example.com', 'ttl': 3600,
+        'gandi': {'auth_token': 'token', 'api_protocol': protocol}}))
+
+
+@pytest.fixture(name='rpc_api')
+def fixture_rpc_api():
+    """Serve the XML-RPC API of Gandi from a mock, for a provider authenticated on zone 42"""
+    with mock.patch('lexicon.providers.gandi.xmlrpclib.ServerProxy') as server_proxy:
+        api = server_proxy.return_value
+        api.domain.info.return_value = {'id': 'example.com', 'zone_id': 42}
+        api.domain.zone.version.new.return_value = 5
+        provider = _provider('rpc')
+        provider.authenticate()
+        yield provider, api
+
+
+def test_rpc_changes_share_one_zone_version(rpc_api):
+    """Every change is made in one new zone version, which is then activated"""
+    provider, api = rpc_api
+    api.domain.zone.record.list.side_effect = [
+        [{'id': 1, 'type': 'TXT', 'name': 'old', 'value': '"token"', 'ttl': 3600}], []]
+
+    results = provider.apply_changes(
+        [{'action': 'create', 'type': 'TXT', 'name': '_acme-challenge.example.com',
+          'content': 'token{0}'.format(index)} for index in range(3)]
+        + [{'action': 'delete', 'type': 'TXT', 'name': 'old', 'content': 'token'},
+           {'action': 'delete', 'type': 'TXT', 'name': 'missing', 'content': 'token'}])
+
+    assert [result['success'] for result in results] == [True, True, True, True, False]
+    api.domain.zone.version.new.assert_called_once_with('token', 42)
+    api.domain.zone.version.set.assert_called_once_with('token', 42, 5)
+    assert not api.domain.zone.version.delete.called
+    assert api.domain.zone.record.add.call_args_list == [
+        mock.call('token', 42, 5, {'type': 'TXT', 'name': '_acme-challenge',
+                                   'value': 'token{0}'.format(index), 'ttl': 3600})
+        for index in range(3)]
+    api.domain.zone.record.delete.assert_called_once_with(
+        'token', 42, 5, {'type': 'TXT', 'name': 'old', 'value': '"token"', 'ttl': 3600})
+
+
+def test_rpc_zone_version_is_dropped_if_every_change_fails(rpc_api):
+    """The new zone version is deleted instead of being activated if no change succeeds"""
+    provider, api = rpc_api
+    api.domain.zone.record.list.return_value = []
+
+    results = provider.apply_changes([{'action': 'delete', 'type': 'A', 'name': 'www'}])
+
+    assert not results[0]['success']
+    assert not api.domain.zone.version.set.called
+    api.domain.zone.version.delete.assert_called_once_with('token', 42, 5)
+
+
+def test_rest_changes_put_each_rrset_once():
+    """Changes are applied on the fetched rrsets, then each modified rrset is sent once"""
+    provider = _provider('rest')
+    zone = [{'rrset_name': '_acme-challenge', 'rrset_type': 'TXT', 'rrset_ttl': 300,
+             'rrset_values': ['"old"']},
+            {'rrset_name': 'www', 'rrset_type': 'A', 'rrset_ttl': 300,
+             'rrset_values': ['127.0.0.1']}]
+
+    with mock.patch.object(gandi.Provider, '_request', return_value=zone) as request:
+        provider.authenticate()
+        results = provider.apply_changes(
+            [{'action': 'create', 'type': 'TXT', 'name': '_acme-challenge',
+              'content': 'token{0}'.format(index)} for index in range(3)]
+            + [{'action': 'delete', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'old'},
+               {'action': 'delete', 'type': 'A', 'name': 'www'},
+               {'action': 'delete', 'type': 'A', 'name': 'missing'}])
+
+    assert [result['success'] for result in results] == [True] * 5 + [False]
+    assert request.call_args_list == [
+        mock.call('GET', '/domains/example.com', query_params=None),
+        mock.call('GET', '/domains/example.com/records', query_params=None),
+        mock.call('PUT', '/domains/example.com/records/_acme-challenge/TXT',
+                  data={'rrset_values': ['token0', 'token1', 'token2'], 'rrset_ttl': 300},
+                  query_params=None),
+        mock.call('DELETE', '/domains/example.com/records/www/A', query_params=None),
+    ]
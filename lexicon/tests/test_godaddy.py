@@ -0,0 +1,92 @@
+"""Unit tests for the record set replacements and the retrying HTTP session of GoDaddy"""
+from __future__ import absolute_import
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import godaddy
+from lexicon.tests import fake_http
+
+RECORDS_URL = 'https://api.godaddy.com/v1/domains/example.com/records'
+
+
+def _provider():
+    return godaddy.Provider(ConfigResolver().with_dict({
+        'provider_name': 'godaddy', 'domain': 'example.com', 'ttl': 600,
+        'godaddy': {'auth_key': 'key', 'auth_secret': 'secret'}}))
+
+
+def _record(rtype, name, data):
+    return {'type': rtype, 'name': name, 'data': data, 'ttl': 3600}
+
+
+def test_changes_of_one_record_set_are_put_on_this_record_set(http_session):
+    """Changes modifying one record set only replace this record set"""
+    http_session.request.side_effect = [
+        fake_http.response([_record('A', '@', '127.0.0.1'),
+                            _record('TXT', '_acme-challenge', 'old')]),
+        fake_http.response()]
+
+    results = _provider().apply_changes(
+        [{'action': 'create', 'type': 'TXT', 'name': '_acme-challenge.example.com',
+          'content': 'token{0}'.format(index)} for index in range(2)]
+        + [{'action': 'delete', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'old'},
+           {'action': 'update', 'identifier': 'unknown', 'content': '127.0.0.3'}])
+
+    assert [result['success'] for result in results] == [True, True, True, True]
+    assert fake_http.sent_requests(http_session) == [
+        ('GET', RECORDS_URL, {}),
+        ('PUT', RECORDS_URL + '/TXT/_acme-challenge',
+         [{'data': 'token0', 'ttl': 600}, {'data': 'token1', 'ttl': 600}])]
+
+
+def test_emptied_record_set_replaces_the_whole_zone(http_session):
+    """A record set left empty by the changes is removed by replacing every record of the zone"""
+    http_session.request.side_effect = [
+        fake_http.response([_record('A', '@', '127.0.0.1'), _record('A', 'www', '127.0.0.1')]),
+        fake_http.response()]
+
+    results = _provider().apply_changes([
+        {'action': 'delete', 'type': 'A', 'name': 'www'},
+        {'action': 'create', 'type': 'A', 'name': 'example.com', 'content': '127.0.0.1'},
+        {'action': 'update', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'}])
+
+    assert all(result['success'] for result in results)
+    assert fake_http.sent_requests(http_session)[1:] == [
+        ('PUT', RECORDS_URL, [_record('A', '@', '127.0.0.1')])]
+
+
+def test_noop_changes_are_not_put(http_session):
+    """Changes leaving the zone as it was do not send any replacement"""
+    http_session.request.side_effect = [fake_http.response([_record('A', 'www', '127.0.0.1')])]
+
+    results = _provider().apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www.example.com', 'content': '127.0.0.1'},
+        {'action': 'delete', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'}])
+
+    assert all(result['success'] for result in results)
+    assert [(method, url) for method, url, _ in fake_http.sent_requests(http_session)] == [
+        ('GET', RECORDS_URL)]
+
+
+def test_failed_replacement_fails_every_change(http_session):
+    """A rejected replacement fails every change, keeping the errors of invalid ones"""
+    http_session.request.side_effect = [fake_http.response([]), fake_http.response(status_code=422)]
+
+    results = _provider().apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'rename', 'type': 'A', 'name': 'www'}])
+
+    assert [method for method, _, _ in fake_http.sent_requests(http_session)] == ['GET', 'PUT']
+    assert results == [{'success': False, 'error': 'HTTPError: 422 Client Error'},
+                       {'success': False,
+                        'error': 'ValueError: Invalid action statement: rename'}]
+
+
+def test_session_retries_conflicts_and_is_reused():
+    """The HTTP session is built once, and retries the requests rejected by a conflict"""
+    provider = _provider()
+    http_session = provider.http_session
+    retry = http_session.get_adapter('https://api.godaddy.com').max_retries
+
+    assert provider.http_session is http_session
+    assert retry.total == 10
+    assert retry.is_retry('PUT', 409)
@@ -0,0 +1,239 @@
+"""Unit tests for the credentials cache and the staged changes of the Google Cloud DNS provider"""
+from __future__ import absolute_import
+
+import time
+
+import mock
+import pytest
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import googleclouddns
+from lexicon.tests import fake_http
+from lexicon.tests.providers.test_googleclouddns import SERVICE_ACCOUNT_INFO_BASE64
+
+TOKEN_URL = 'https://www.googleapis.com/oauth2/v4/token'
+
+
+@pytest.fixture(name='credentials_caches', autouse=True)
+def fixture_credentials_caches(tmpdir, monkeypatch, http_session):
+    """Isolate the credentials caches, and serve the HTTP requests of every provider"""
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(googleclouddns, '_CREDENTIALS', {})
+    return http_session
+
+
+def _token_response(token):
+    return fake_http.response({'access_token': token, 'expires_in': 3600})
+
+
+def _zones_response():
+    return fake_http.response({'managedZones': [{'id': '123', 'dnsName': 'fullm3tal.tk.'}]})
+
+
+def _provider(token_cache=None):
+    return googleclouddns.Provider(ConfigResolver().with_dict({
+        'provider_name': 'googleclouddns', 'domain': 'fullm3tal.tk',
+        'googleclouddns': {
+            'auth_service_account_info': 'base64::{0}'.format(SERVICE_ACCOUNT_INFO_BASE64),
+            'token_cache': token_cache}}))
+
+
+def _sent_requests(http_session):
+    return [(call[0][0], call[0][1], call[1]['headers'].get('Authorization'))
+            for call in http_session.request.call_args_list]
+
+
+def test_access_token_and_zone_id_are_shared_by_providers(http_session):
+    """A second provider of the same service account reuses the token and zone id"""
+    http_session.request.side_effect = [
+        _token_response('token'), _zones_response(), fake_http.response({'rrsets': []})]
+    first, second = _provider(), _provider()
+
+    first.authenticate()
+    second.authenticate()
+    second.list_records()
+
+    assert second.domain_id == '123'
+    assert [(method, authorization) for method, _, authorization
+            in _sent_requests(http_session)] == [
+                ('POST', None), ('GET', 'Bearer token'), ('GET', 'Bearer token')]
+    assert _sent_requests(http_session)[2][1].endswith('/managedZones/123/rrsets')
+
+
+def test_access_token_is_renewed_before_expiration(http_session):
+    """A token expiring within the refresh margin is replaced before the next request"""
+    http_session.request.side_effect = [
+        _token_response('token'), _zones_response(),
+        _token_response('new_token'), fake_http.response({'rrsets': []})]
+    provider = _provider()
+    provider.authenticate()
+
+    almost_expired = (time.time() + googleclouddns.TOKEN_LIFETIME
+                      - googleclouddns.TOKEN_REFRESH_MARGIN / 2)
+    with mock.patch('lexicon.providers.googleclouddns.time.time', return_value=almost_expired):
+        provider.list_records()
+
+    assert _sent_requests(http_session)[2:] == [
+        ('POST', TOKEN_URL, None),
+        ('GET', 'https://content.googleapis.com/dns/v1/projects/named-archway-209418'
+                '/managedZones/123/rrsets', 'Bearer new_token')]
+
+
+def test_disk_token_cache_is_shared_across_processes(http_session, monkeypatch):
+    """Credentials stored on disk are loaded once the memory of the process is lost"""
+    http_session.request.side_effect = [_token_response('token'), _zones_response()]
+    _provider('disk').authenticate()
+    monkeypatch.setattr(googleclouddns, '_CREDENTIALS', {})
+    http_session.request.reset_mock()
+
+    provider = _provider('disk')
+    provider.authenticate()
+
+    assert not http_session.request.called
+    assert provider.domain_id == '123'
+
+
+def test_memory_token_cache_is_not_written_on_disk(http_session, tmpdir):
+    """The default token cache keeps the credentials in memory only"""
+    http_session.request.side_effect = [_token_response('token'), _zones_response()]
+
+    _provider().authenticate()
+
+    assert not tmpdir.listdir()
+
+
+def _rrset(name, rtype, rrdatas, ttl=3600):
+    return {'kind': 'dns#resourceRecordSet', 'name': name, 'type': rtype, 'ttl': ttl,
+            'rrdatas': rrdatas}
+
+
+def _authenticated_provider(http_session):
+    http_session.request.side_effect = [_token_response('token'), _zones_response()]
+    provider = _provider()
+    provider.authenticate()
+    http_session.request.reset_mock()
+    return provider
+
+
+def test_list_records_filters_on_server_and_follows_page_tokens(http_session):
+    """RecordSets are filtered by the API on the name, on every page of results"""
+    provider = _authenticated_provider(http_session)
+    http_session.request.side_effect = [
+        fake_http.response({'rrsets': [_rrset('www.fullm3tal.tk.', 'A', ['127.0.0.1'])],
+                   'nextPageToken': 'next'}),
+        fake_http.response({'rrsets': [_rrset('www.fullm3tal.tk.', 'AAAA', ['::1'])]}),
+    ]
+
+    records = provider.list_records(name='www')
+
+    assert [record['content'] for record in records] == ['127.0.0.1', '::1']
+    assert [call[1]['params'] for call in http_session.request.call_args_list] == [
+        {'name': 'www.fullm3tal.tk.'}, {'name': 'www.fullm3tal.tk.', 'pageToken': 'next'}]
+
+
+def test_update_record_submits_one_change(http_session):
+    """An update fetches its RecordSet only, and replaces it in one change"""
+    provider = _authenticated_provider(http_session)
+    http_session.request.side_effect = [
+        fake_http.response({'rrsets': [_rrset('txt.fullm3tal.tk.', 'TXT', ['"old"', '"other"'])]}),
+        fake_http.response({}),
+    ]
+
+    assert provider.update_record(None, 'TXT', 'txt', 'new')
+
+    assert [(call[0][0], call[1]['params'])
+            for call in http_session.request.call_args_list] == [
+                ('GET', {'type': 'TXT', 'name': 'txt.fullm3tal.tk.'}), ('POST', None)]
+    assert http_session.request.call_args[1]['json'] == {
+        'deletions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"old"', '"other"']}],
+        'additions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"other"', '"new"']}]}
+
+
+def test_delete_record_submits_one_change(http_session):
+    """A deletion fetches its RecordSet only, and removes the record in one change"""
+    provider = _authenticated_provider(http_session)
+    http_session.request.side_effect = [
+        fake_http.response({'rrsets': [_rrset('txt.fullm3tal.tk.', 'TXT', ['"one"', '"two"'])]}),
+        fake_http.response({}),
+    ]
+
+    assert provider.delete_record(None, 'TXT', 'txt', 'one')
+
+    assert [(call[0][0], call[1]['params'])
+            for call in http_session.request.call_args_list] == [
+                ('GET', {'type': 'TXT', 'name': 'txt.fullm3tal.tk.'}), ('POST', None)]
+    assert http_session.request.call_args[1]['json'] == {
+        'deletions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"one"', '"two"']}],
+        'additions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"two"']}]}
+
+
+def test_apply_changes_submits_one_change(http_session):
+    """RecordSets are fetched once per type/name pair, and modified in one change"""
+    provider = _authenticated_provider(http_session)
+    http_session.request.side_effect = [
+        fake_http.response({'rrsets': [_rrset('txt.fullm3tal.tk.', 'TXT', ['"one"'])]}),
+        fake_http.response({'rrsets': []}),
+        fake_http.response({'rrsets': []}),
+        fake_http.response({}),
+    ]
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'TXT', 'name': 'txt', 'content': 'two'},
+        {'action': 'delete', 'type': 'TXT', 'name': 'txt', 'content': 'one'},
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'delete', 'type': 'A', 'name': 'missing', 'content': '127.0.0.1'},
+    ])
+
+    assert [result['success'] for result in results] == [True, True, True, False]
+    assert [(call[0][0], call[1]['params'])
+            for call in http_session.request.call_args_list] == [
+                ('GET', {'type': 'TXT', 'name': 'txt.fullm3tal.tk.'}),
+                ('GET', {'type': 'A', 'name': 'www.fullm3tal.tk.'}),
+                ('GET', {'type': 'A', 'name': 'missing.fullm3tal.tk.'}),
+                ('POST', None)]
+    assert http_session.request.call_args[1]['json'] == {
+        'deletions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"one"']}],
+        'additions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"two"']},
+                      {'name': 'www.fullm3tal.tk.', 'type': 'A', 'ttl': 3600,
+                       'rrdatas': ['127.0.0.1']}]}
+
+
+def test_apply_changes_updates_a_record_set_in_one_change(http_session):
+    """An update replaces the content in its RecordSet, and keeps the other contents"""
+    provider = _authenticated_provider(http_session)
+    http_session.request.side_effect = [
+        fake_http.response({'rrsets': [_rrset('txt.fullm3tal.tk.', 'TXT', ['"old"', '"other"'])]}),
+        fake_http.response({}),
+    ]
+
+    results = provider.apply_changes([
+        {'action': 'update', 'type': 'TXT', 'name': 'txt', 'content': 'new'}])
+
+    assert results == [{'success': True, 'output': True}]
+    assert http_session.request.call_args[1]['json'] == {
+        'deletions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"old"', '"other"']}],
+        'additions': [{'name': 'txt.fullm3tal.tk.', 'type': 'TXT', 'ttl': 3600,
+                       'rrdatas': ['"other"', '"new"']}]}
+
+
+def test_apply_changes_fails_every_change_if_rejected(http_session):
+    """The API applies a change atomically, so a rejected change fails every operation"""
+    provider = _authenticated_provider(http_session)
+    http_session.request.side_effect = [
+        fake_http.response({'rrsets': []}),
+        fake_http.response(status_code=412, reason='Precondition Failed')]
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'},
+    ])
+
+    assert results == [{'success': False,
+                        'error': 'HTTPError: 412 Client Error: Precondition Failed'}] * 2
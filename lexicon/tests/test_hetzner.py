@@ -0,0 +1,121 @@
+"""Unit tests for the zone file updates posted by the Hetzner provider"""
+from __future__ import absolute_import
+
+from contextlib import contextmanager
+
+import mock
+import pytest
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import hetzner
+
+DNS_RDATATYPE = pytest.importorskip('dns.rdatatype')
+DNS_ZONE = pytest.importorskip('dns.zone')
+
+ZONE = '''$TTL 86400
+@ IN SOA ns1.first-ns.de. postmaster.robot.first-ns.de. 2019010100 14400 1800 604800 86400
+@ IN NS ns1.first-ns.de.
+www IN A 127.0.0.1
+_acme-challenge IN TXT "old"
+'''
+CNAMES = {}
+
+
+@pytest.fixture(name='hetzner_post')
+def fixture_hetzner_post():
+    """Serve sessions on the zone of a Hetzner Robot account, and mock the zone update"""
+    zone = {'data': DNS_ZONE.from_text(ZONE, origin='rimek.info', relativize=False),
+            'hidden': {'id': '1234'}}
+
+    def _get_dns_cname(name, link=False):
+        return 'rimek.info', [], CNAMES.get(name) if link else None
+
+    @contextmanager
+    def _session(*_, **kwargs):
+        linked = kwargs.get('linked')
+        cname = CNAMES.get('{0}.rimek.info.'.format(linked['name'])) if linked else None
+        yield {'nameservers': [], 'cname': cname, 'changed': False, 'propagate': [],
+               'zone': zone}
+
+    with mock.patch.object(hetzner.Provider, '_session', side_effect=_session) as session, \
+            mock.patch.object(hetzner.Provider, '_get_dns_cname', side_effect=_get_dns_cname), \
+            mock.patch.object(hetzner.Provider, '_post') as post:
+        post.session = session
+        post.return_value.text = '<div id="center_col"></div>'
+        yield post
+
+
+def _provider(linked='yes'):
+    return hetzner.Provider(ConfigResolver().with_dict({
+        'provider_name': 'hetzner', 'domain': 'rimek.info', 'ttl': 3600,
+        'hetzner': {'auth_username': 'user', 'auth_password': 'password',
+                    'linked': linked, 'propagated': 'no', 'latency': 0.00001}}))
+
+
+def _posted_records(post):
+    zone_file = post.call_args[1]['data']['zonefile']
+    if isinstance(zone_file, bytes):
+        zone_file = zone_file.decode('UTF-8')
+    zone = DNS_ZONE.from_text(zone_file, origin='rimek.info', relativize=False)
+    return sorted((name.to_text(), rdata.to_text()) for name, _, rdata in zone.iterate_rdatas()
+                  if rdata.rdtype in (DNS_RDATATYPE.A, DNS_RDATATYPE.TXT))
+
+
+def test_changes_are_posted_in_one_zone_update(hetzner_post):
+    """Every change is applied on the zone, which is then posted once"""
+    results = _provider().apply_changes(
+        [{'action': 'create', 'type': 'TXT', 'name': '_acme-challenge',
+          'content': 'token{0}'.format(index)} for index in range(3)]
+        + [{'action': 'delete', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'old'},
+           {'action': 'update', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'},
+           {'action': 'create', 'type': 'A', 'name': 'broken', 'content': 'not an ip'}])
+
+    assert [result['success'] for result in results] == [True] * 5 + [False]
+    hetzner_post.assert_called_once_with('/dns/update', data=mock.ANY)
+    assert hetzner_post.call_args[1]['data']['id'] == '1234'
+    assert _posted_records(hetzner_post) == [
+        ('_acme-challenge.rimek.info.', '"token0"'),
+        ('_acme-challenge.rimek.info.', '"token1"'),
+        ('_acme-challenge.rimek.info.', '"token2"'),
+        ('www.rimek.info.', '127.0.0.2')]
+
+
+def test_changes_fail_if_zone_update_fails(hetzner_post):
+    """A zone rejected by Hetzner fails every change"""
+    with mock.patch.object(hetzner.Provider, '_post_zone', return_value=False) as post_zone:
+        results = _provider().apply_changes([
+            {'action': 'create', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'token'}])
+
+    post_zone.assert_called_once()
+    assert not hetzner_post.called
+    assert results == [{'success': False, 'error': 'Hetzner => Unable to update zone'}]
+
+
+def test_linked_change_is_applied_on_its_own_to_the_cname_target(hetzner_post):
+    """A change of a record with linked CNAME is posted on its own, in order with the batch"""
+    changes = [{'action': 'update', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'},
+               {'action': 'create', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'token'},
+               {'action': 'create', 'type': 'A', 'name': 'mail', 'content': '127.0.0.3'}]
+    with mock.patch.dict(CNAMES, {'_acme-challenge.rimek.info.': '_acme.rimek.info.'}):
+        results = _provider().apply_changes(changes)
+
+    assert [result['success'] for result in results] == [True] * 3
+    assert [call[1]['linked'] for call in hetzner_post.session.call_args_list] == [
+        False, changes[1], False]
+    assert hetzner_post.call_count == 3
+    assert _posted_records(hetzner_post) == [
+        ('_acme-challenge.rimek.info.', '"old"'),
+        ('_acme.rimek.info.', '"token"'),
+        ('mail.rimek.info.', '127.0.0.3'),
+        ('www.rimek.info.', '127.0.0.2')]
+
+
+def test_linked_cname_is_ignored_without_linked_option(hetzner_post):
+    """With --linked=no, a change of a record with linked CNAME stays in the batch"""
+    with mock.patch.dict(CNAMES, {'_acme-challenge.rimek.info.': '_acme.rimek.info.'}):
+        results = _provider(linked='no').apply_changes([
+            {'action': 'create', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'token'}])
+
+    assert results == [{'success': True, 'output': True}]
+    hetzner_post.assert_called_once()
+    assert ('_acme-challenge.rimek.info.', '"token"') in _posted_records(hetzner_post)
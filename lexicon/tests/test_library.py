@@ -192,3 +192,17 @@ def test_delete_action_is_correctly_handled_by_provider(capsys, lexicon_client):
     assert results['type'] == 'TXT'
     assert results['name'] == 'fake'
     assert results['content'] == 'fake-content'
+
+
+def test_apply_changes_applies_changes_one_by_one():
+    provider = Provider({'provider_name': 'fakeprovider', 'domain': 'example.com'})
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'TXT', 'name': 'fake', 'content': 'fake-content'},
+        {'action': 'delete', 'identifier': 'fake-id'},
+        {'action': 'invalid'},
+    ])
+
+    assert [result['success'] for result in results] == [True, True, False]
+    assert results[0]['output']['action'] == 'create'
+    assert results[1]['output']['identifier'] == 'fake-id'
+    assert results[2]['error'] == 'ValueError: Invalid action statement: invalid'
@@ -0,0 +1,90 @@
+"""Unit tests for the zone file handling of the Localzone provider"""
+from __future__ import absolute_import
+
+import os
+from time import localtime, strftime, time
+
+import mock
+import pytest
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import localzone as localzone_provider
+
+LOCALZONE = pytest.importorskip('localzone')
+
+ZONE = """$ORIGIN example.com.
+$TTL 3600
+@ IN SOA ns username 2007120710 86400 7200 2419200 3600
+@ IN NS ns
+ns IN A 192.0.2.1
+www IN A 192.0.2.2
+"""
+
+
+@pytest.fixture(name='zone_file')
+def fixture_zone_file(tmpdir, monkeypatch):
+    """Provide a zone master file, with an empty cache of parsed zones"""
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir.join('cache')))
+    monkeypatch.setattr(localzone_provider, '_ZONES', {})
+    path = tmpdir.join('db.example.com')
+    path.write(ZONE)
+    return path
+
+
+def _provider(path):
+    return localzone_provider.Provider(ConfigResolver().with_dict({
+        'provider_name': 'localzone', 'domain': 'example.com',
+        'localzone': {'filename': str(path)}}))
+
+
+def _serial(path):
+    return int(path.read().split('SOA')[1].split()[2])
+
+
+def test_reads_reuse_the_parsed_zone_and_never_write(zone_file):
+    """The zone file is parsed once for every reader, and left untouched by reads"""
+    mtime = zone_file.mtime()
+    with mock.patch.object(LOCALZONE, 'load', wraps=LOCALZONE.load) as load:
+        assert [record['content'] for record in _provider(zone_file).list_records('A', 'www')] \
+            == ['192.0.2.2']
+        assert len(_provider(zone_file).list_records()) == 4
+
+    load.assert_called_once_with(str(zone_file), 'example.com.')
+    assert zone_file.read() == ZONE and zone_file.mtime() == mtime
+
+
+def test_modified_zone_file_is_parsed_again(zone_file):
+    """A zone file modified since it was parsed is parsed again"""
+    provider = _provider(zone_file)
+    provider.list_records()
+    zone_file.write(ZONE + 'api IN A 192.0.2.3\n')
+    os.utime(str(zone_file), (time() + 10, time() + 10))
+
+    assert [record['content'] for record in provider.list_records('A', 'api')] == ['192.0.2.3']
+
+
+def test_changes_are_saved_once_atomically(zone_file, monkeypatch):
+    """Changes are written once, by replacing the zone file with a new one of the same mode"""
+    zone_file.chmod(0o640)
+    inode = os.stat(str(zone_file)).st_ino
+    provider = _provider(zone_file)
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'token'},
+        {'action': 'delete', 'type': 'A', 'name': 'www'},
+        {'action': 'update', 'identifier': 'missing', 'content': '192.0.2.4'},
+        {'action': 'create', 'type': 'A', 'name': 'api', 'content': '192.0.2.3'}])
+
+    assert [result['success'] for result in results] == [True, True, False, True]
+    # The serial is incremented on each save.
+    assert _serial(zone_file) == int(strftime("%Y%m%d00", localtime(time())))
+    assert os.stat(str(zone_file)).st_ino != inode
+    assert zone_file.stat().mode & 0o777 == 0o640
+    assert [path.basename for path in zone_file.dirpath().listdir()
+            if path.basename.startswith('.')] == []
+
+    monkeypatch.setattr(localzone_provider, '_ZONES', {})
+    assert sorted((record['type'], record['name']) for record in provider.list_records()
+                  if record['type'] in ('A', 'TXT')) \
+        == [('A', 'api.example.com'), ('A', 'ns.example.com'),
+            ('TXT', '_acme-challenge.example.com')]
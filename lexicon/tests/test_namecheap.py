@@ -0,0 +1,130 @@
+"""Unit tests for the host list replacements of the Namecheap provider"""
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import namecheap as namecheap_provider
+
+NAMECHEAP = pytest.importorskip('namecheap')
+
+RESPONSE = ('<ApiResponse Status="{status}" xmlns="http://api.namecheap.com/xml.response">'
+            '{content}</ApiResponse>')
+
+
+def _hosts_response(hosts):
+    result = ''.join('<host HostId="{0}" Type="{1}" Name="{2}" Address="{3}" MXPref="10" '
+                     'TTL="1800" IsActive="true" />'.format(*host) for host in hosts)
+    return mock.Mock(status_code=200, text=RESPONSE.format(status='OK', content=(
+        '<CommandResponse><DomainDNSGetHostsResult Domain="example.com">{0}'
+        '</DomainDNSGetHostsResult></CommandResponse>'.format(result))))
+
+
+def _set_hosts_response(error=None):
+    if error:
+        return mock.Mock(status_code=200, text=RESPONSE.format(status='ERROR', content=(
+            '<Errors><Error Number="2050900">{0}</Error></Errors>'.format(error))))
+    return mock.Mock(status_code=200, text=RESPONSE.format(status='OK', content=(
+        '<CommandResponse><DomainDNSSetHostsResult Domain="example.com" IsSuccess="true" />'
+        '</CommandResponse>')))
+
+
+@pytest.fixture(name='post')
+def fixture_post():
+    """Mock the HTTP POST requests sent by the PyNamecheap client"""
+    with mock.patch.object(NAMECHEAP.requests, 'post') as post:
+        yield post
+
+
+def _provider():
+    return namecheap_provider.Provider(ConfigResolver().with_dict({
+        'provider_name': 'namecheap', 'domain': 'example.com', 'ttl': 1800,
+        'namecheap': {'auth_token': 'token', 'auth_username': 'user'}}))
+
+
+def _sent_commands(post):
+    sent = []
+    for call in post.call_args_list:
+        payload = dict(call[1]['params'], **(call[1].get('data') or {}))
+        sent.append((payload.pop('Command'),
+                     {key: value for key, value in payload.items()
+                      if key not in ('ApiUser', 'ApiKey', 'UserName', 'ClientIP')}))
+    return sent
+
+
+def test_changes_are_set_in_one_replacement(post):
+    """Hosts are read once, modified in memory, and set back with one setHosts command"""
+    post.side_effect = [
+        _hosts_response([('1', 'A', '@', '127.0.0.1'), ('2', 'TXT', 'old', 'token'),
+                         ('3', 'CNAME', 'www', 'example.com')]),
+        _set_hosts_response()]
+
+    results = _provider().apply_changes(
+        [{'action': 'create', 'type': 'TXT', 'name': '_acme-challenge.example.com',
+          'content': 'token{0}'.format(index)} for index in range(2)]
+        + [{'action': 'delete', 'type': 'TXT', 'name': 'old', 'content': 'token'},
+           {'action': 'update', 'identifier': '1', 'content': '127.0.0.2'},
+           {'action': 'update', 'identifier': '42', 'content': '127.0.0.3'}])
+
+    assert [result['success'] for result in results] == [True, True, True, True, False]
+    assert _sent_commands(post) == [
+        ('namecheap.domains.dns.getHosts', {'SLD': 'example', 'TLD': 'com'}),
+        ('namecheap.domains.dns.setHosts', {
+            'SLD': 'example', 'TLD': 'com',
+            'HostName1': '@', 'RecordType1': 'A', 'Address1': '127.0.0.2',
+            'MXPref1': '10', 'TTL1': 1800,
+            'HostName2': 'www', 'RecordType2': 'CNAME', 'Address2': 'example.com',
+            'MXPref2': '10', 'TTL2': '1800',
+            'HostName3': '_acme-challenge', 'RecordType3': 'TXT', 'Address3': 'token0',
+            'TTL3': 1800,
+            'HostName4': '_acme-challenge', 'RecordType4': 'TXT', 'Address4': 'token1',
+            'TTL4': 1800})]
+
+
+def test_mx_hosts_are_set_with_a_preference(post):
+    """MX hosts created by a batch are set with the default preference of Namecheap"""
+    post.side_effect = [_hosts_response([]), _set_hosts_response()]
+
+    results = _provider().apply_changes([
+        {'action': 'create', 'type': 'MX', 'name': '@', 'content': 'mx1.example.com'},
+        {'action': 'update', 'type': 'MX', 'name': 'mail', 'content': 'mx2.example.com'}])
+
+    assert all(result['success'] for result in results)
+    assert _sent_commands(post)[1] == ('namecheap.domains.dns.setHosts', {
+        'SLD': 'example', 'TLD': 'com',
+        'HostName1': '@', 'RecordType1': 'MX', 'Address1': 'mx1.example.com',
+        'MXPref1': 10, 'TTL1': 1800,
+        'HostName2': 'mail', 'RecordType2': 'MX', 'Address2': 'mx2.example.com',
+        'MXPref2': 10, 'TTL2': 1800})
+
+
+def test_noop_changes_are_not_set(post):
+    """Changes leaving the hosts as they were do not send a setHosts command"""
+    post.side_effect = [_hosts_response([('1', 'A', 'www', '127.0.0.1')])]
+
+    results = _provider().apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www.example.com', 'content': '127.0.0.1'},
+        {'action': 'update', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'delete', 'type': 'A', 'name': 'ww', 'content': '127.0.0.1'},
+        {'action': 'delete', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'}])
+
+    assert all(result['success'] for result in results)
+    assert [command for command, _ in _sent_commands(post)] == [
+        'namecheap.domains.dns.getHosts']
+
+
+def test_failed_replacement_fails_every_change(post):
+    """A rejected setHosts command fails every change, keeping the errors of invalid ones"""
+    post.side_effect = [_hosts_response([]), _set_hosts_response('Invalid hosts')]
+
+    results = _provider().apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'rename', 'type': 'A', 'name': 'www'}])
+
+    assert [command for command, _ in _sent_commands(post)] == [
+        'namecheap.domains.dns.getHosts', 'namecheap.domains.dns.setHosts']
+    assert results[0]['success'] is False
+    assert 'Invalid hosts' in results[0]['error']
+    assert results[1] == {'success': False,
+                          'error': 'ValueError: Invalid action statement: rename'}
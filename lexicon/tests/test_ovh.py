@@ -0,0 +1,61 @@
+"""Unit tests for the cache of records details of the OVH provider"""
+from __future__ import absolute_import
+
+import mock
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import ovh
+
+
+def _fake_api(sent_requests):
+    """Return a function serving the records endpoints of the OVH API from memory"""
+    records = {12: {'id': 12, 'fieldType': 'TXT', 'subDomain': 'fake', 'ttl': 3600,
+                    'target': 'old'}}
+
+    def _request(action, url, data=None, query_params=None):
+        del query_params
+        sent_requests.append((action, url))
+        parts = url.strip('/').split('/')
+        if parts[-1] == 'record':
+            return list(records)
+        if len(parts) == 5 and parts[3] == 'record':
+            if action == 'PUT':
+                records[int(parts[4])]['target'] = data['target']
+            return records[int(parts[4])]
+        return {}
+
+    return _request
+
+
+def _provider():
+    config = ConfigResolver().with_dict({
+        'provider_name': 'ovh', 'domain': 'example.com', 'http_pool_maxsize': 1,
+        'ovh': {'auth_entrypoint': 'ovh-eu', 'auth_application_key': 'KEY',
+                'auth_application_secret': 'SECRET', 'auth_consumer_key': 'CONSUMER'},
+    })
+    return ovh.Provider(config)
+
+
+def test_update_with_a_string_identifier_refreshes_the_record_details():
+    """Listed records reflect an update done with the identifier given on the command line"""
+    sent_requests = []
+    provider = _provider()
+    with mock.patch.object(ovh.Provider, '_request', side_effect=_fake_api(sent_requests)):
+        assert provider.list_records('TXT')[0]['content'] == 'old'
+        provider.update_record('12', 'TXT', 'fake', 'new')
+        records = provider.list_records('TXT')
+
+    assert records[0]['content'] == 'new'
+    assert sent_requests.count(('GET', '/domain/zone/example.com/record/12')) == 2
+
+
+def test_details_of_known_records_are_fetched_once():
+    """Records details are only fetched once while they are not modified"""
+    sent_requests = []
+    provider = _provider()
+    with mock.patch.object(ovh.Provider, '_request', side_effect=_fake_api(sent_requests)):
+        provider.list_records('TXT')
+        provider.list_records('TXT')
+
+    assert sent_requests.count(('GET', '/domain/zone/example.com/record/12')) == 1
+    assert sent_requests.count(('GET', '/domain/zone/example.com/record')) == 2
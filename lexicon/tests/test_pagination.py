@@ -0,0 +1,62 @@
+"""Unit tests for the pagination engine, and the iter_records API of providers"""
+# pylint: disable=missing-docstring
+from __future__ import absolute_import
+
+import mock
+
+from lexicon import pagination
+from lexicon.config import ConfigResolver
+from lexicon.tests.test_library import Provider
+
+
+def test_cursor_pages_are_fetched_lazily():
+    pages = {None: {'items': [1, 2], 'next': 'b'},
+             'b': {'items': [3], 'next': 'c'},
+             'c': {'items': [4]}}
+    fetched = []
+
+    def _fetch(cursor):
+        fetched.append(cursor)
+        return pages[cursor]
+
+    generator = pagination.iter_cursor_pages(_fetch, lambda payload: payload.get('next'))
+
+    assert next(generator)['items'] == [1, 2]
+    assert fetched == [None]
+    assert [payload['items'] for payload in generator] == [[3], [4]]
+    assert fetched == [None, 'b', 'c']
+
+
+def test_numbered_pages_are_fetched_by_window():
+    calls = []
+
+    def _map_pages(function, pages):
+        calls.append(list(pages))
+        return [function(page) for page in pages]
+
+    payloads = list(pagination.iter_numbered_pages(
+        lambda page: {'page': page, 'total': 5}, lambda payload: payload['total'],
+        map_pages=_map_pages, window=3))
+
+    assert [payload['page'] for payload in payloads] == [1, 2, 3, 4, 5]
+    assert calls == [[2, 3, 4], [5]]
+
+
+def test_numbered_pages_with_single_page():
+    fetch = mock.Mock(return_value={'total': 0})
+
+    assert len(list(pagination.iter_numbered_pages(fetch, lambda payload: payload['total'],
+                                                   first_page=0))) == 1
+    fetch.assert_called_once_with(0)
+
+
+def test_iter_records_defaults_to_list_records():
+    provider = Provider(ConfigResolver().with_dict({
+        'provider_name': 'fakeprovider', 'domain': 'example.com'}))
+    records = [{'type': 'A', 'name': 'www.example.com', 'content': '127.0.0.1'}]
+
+    with mock.patch.object(Provider, '_list_records', create=True,
+                           return_value=records) as mock_list_records:
+        assert list(provider.iter_records(rtype='A', name='www')) == records
+
+    mock_list_records.assert_called_once_with(rtype='A', name='www', content=None)
@@ -1,7 +1,9 @@
 """Unit tests for the Lexicon CLI parser"""
 # pylint: disable=missing-docstring
 from __future__ import absolute_import
+import importlib
 
+import mock
 import pytest
 from lexicon.parser import (
     generate_base_provider_parser,
@@ -42,7 +44,53 @@ def test_cli_main_parser():
     assert parsed.output == 'TABLE'
 
 
+def test_cli_main_parser_imports_only_selected_provider():
+    with mock.patch('lexicon.parser.importlib.import_module',
+                    side_effect=importlib.import_module) as mock_import:
+        baseparser = generate_cli_main_parser()
+        parsed = baseparser.parse_args(
+            ['cloudflare', 'list', 'capsulecd.com', 'TXT', '--auth-token', 'TOKEN'])
+
+    assert parsed.auth_token == 'TOKEN'
+    assert [call[0][0] for call in mock_import.call_args_list] \
+        == ['lexicon.providers.cloudflare']
+
+
+def test_cli_main_parser_auto_provider_options():
+    baseparser = generate_cli_main_parser()
+    parsed = baseparser.parse_args(
+        ['auto', 'list', 'capsulecd.com', 'TXT', '--cloudflare-auth-token', 'TOKEN'])
+    assert parsed.auto_cloudflare_auth_token == 'TOKEN'
+
+
 def test_cli_main_parser_without_args():
     baseparser = generate_cli_main_parser()
     with pytest.raises(SystemExit):
         baseparser.parse_args([])
+
+
+def test_cli_main_parser_batch():
+    baseparser = generate_cli_main_parser()
+    parsed = baseparser.parse_args(
+        ['batch', '--workers', '4', '--concurrency', 'route53:2,ovh:1',
+         '--rate-limit', 'route53:5'])
+    assert parsed.provider_name == 'batch'
+    assert parsed.file == '-'
+    assert parsed.workers == 4
+    assert parsed.concurrency == {'route53': 2, 'ovh': 1}
+    assert parsed.rate_limit == {'route53': 5.0}
+
+
+def test_cli_main_parser_batch_with_invalid_mapping():
+    baseparser = generate_cli_main_parser()
+    with pytest.raises(SystemExit):
+        baseparser.parse_args(['batch', '--concurrency', 'route53'])
+
+
+def test_cli_main_parser_serve():
+    baseparser = generate_cli_main_parser()
+    parsed = baseparser.parse_args(['--server', '/tmp/other.sock', 'serve',
+                                    '--address', 'localhost:8053'])
+    assert parsed.provider_name == 'serve'
+    assert parsed.address == 'localhost:8053'
+    assert parsed.server_address == '/tmp/other.sock'
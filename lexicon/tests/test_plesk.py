@@ -0,0 +1,108 @@
+"""Unit tests for the packets of DNS operations sent to the Plesk XML API"""
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import plesk
+
+XMLTODICT = pytest.importorskip('xmltodict')
+
+SITE = """<packet><site><get><result><status>ok</status><id>71</id></result></get></site>
+</packet>"""
+
+SITE_RECORDS = """<packet><dns><get_rec>
+<result><status>ok</status><id>1</id><data><site-id>71</site-id><type>A</type>
+<host>www.example.com.</host><value>127.0.0.1</value><opt/></data></result>
+<result><status>ok</status><id>2</id><data><site-id>71</site-id><type>TXT</type>
+<host>_acme-challenge.example.com.</host><value>token</value><opt/></data></result>
+</get_rec></dns></packet>"""
+
+
+def _authenticated_provider(http_session, *responses):
+    http_session.post.side_effect = [mock.Mock(text=response)
+                                     for response in (SITE,) + responses]
+    provider = plesk.Provider(ConfigResolver().with_dict({
+        'provider_name': 'plesk', 'domain': 'example.com',
+        'plesk': {'auth_username': 'user', 'auth_password': 'secret',
+                  'plesk_server': 'https://plesk.example.com:8443'}}))
+    provider.authenticate()
+    return provider
+
+
+def _result(operation, status='ok', identifier=None):
+    if status == 'error':
+        content = '<errcode>1007</errcode><errtext>Invalid record</errtext>'
+    else:
+        content = '<id>{0}</id>'.format(identifier) if identifier else ''
+    return '<dns><{0}><result><status>{1}</status>{2}</result></{0}></dns>'.format(
+        operation, status, content)
+
+
+def _sent_operations(http_session, index):
+    packet = XMLTODICT.parse(http_session.post.call_args_list[index][1]['data'])['packet']
+    items = packet['dns'] if isinstance(packet['dns'], list) else [packet['dns']]
+    return [(list(item.keys())[0], dict(list(item.values())[0])) for item in items]
+
+
+def test_changes_are_sent_in_one_packet(http_session):
+    """Operations of every change are sent in one packet, after one lookup of the records"""
+    provider = _authenticated_provider(
+        http_session, SITE_RECORDS,
+        '<packet>{0}{1}{2}</packet>'.format(_result('add_rec', identifier=3),
+                                            _result('del_rec', identifier=2),
+                                            _result('add_rec', identifier=4)),
+        '<packet>{0}</packet>'.format(_result('del_rec', identifier=3)))
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'api', 'content': '127.0.0.2'},
+        {'action': 'update', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'new'}])
+
+    assert results == [{'success': True, 'output': True}] * 2
+    assert _sent_operations(http_session, 1) == [
+        ('get_rec', {'filter': {'site-id': '71'}})]
+    assert [(operation, request.get('host'), request.get('value'), request.get('filter'))
+            for operation, request in _sent_operations(http_session, 2)] == [
+                ('add_rec', 'api', '127.0.0.2', None),
+                ('del_rec', None, None, {'id': '2'}),
+                ('add_rec', '_acme-challenge', 'new', None)]
+
+    # Records of the site are kept, with the ids of the added records.
+    assert provider.apply_changes([{'action': 'delete', 'type': 'A', 'name': 'api'}]) \
+        == [{'success': True, 'output': True}]
+    assert http_session.post.call_count == 4
+    assert _sent_operations(http_session, 3) == [('del_rec', {'filter': {'id': '3'}})]
+
+
+def test_noop_changes_are_not_sent(http_session):
+    """Changes leaving the records as they were do not send any operation"""
+    provider = _authenticated_provider(http_session, SITE_RECORDS)
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'create', 'type': 'A', 'name': 'api', 'content': '127.0.0.2'},
+        {'action': 'delete', 'type': 'A', 'name': 'api'}])
+
+    assert results == [{'success': True, 'output': True}] * 3
+    assert http_session.post.call_count == 2
+
+
+def test_failed_operations_fail_their_change_only(http_session):
+    """A failed operation fails the change owning it, other changes succeed"""
+    provider = _authenticated_provider(
+        http_session, SITE_RECORDS,
+        '<packet>{0}{1}</packet>'.format(_result('add_rec', status='error'),
+                                         _result('del_rec', identifier=1)))
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'api', 'content': 'invalid'},
+        {'action': 'delete', 'identifier': '1'},
+        {'action': 'update', 'identifier': '42', 'content': '127.0.0.1'}])
+
+    assert [operation for operation, _ in _sent_operations(http_session, 2)] == [
+        'add_rec', 'del_rec']
+    assert results == [
+        {'success': False, 'error': 'Exception: API returned error: 1007 (Invalid record)'},
+        {'success': True, 'output': True},
+        {'success': False, 'error': 'Exception: No entry found for updating'}]
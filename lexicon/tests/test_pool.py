@@ -0,0 +1,147 @@
+"""Unit tests for the HTTP connection pool shared by providers"""
+# pylint: disable=missing-docstring
+from __future__ import absolute_import
+import threading
+
+import mock
+import pytest
+import requests
+
+from lexicon import pool, ratelimit
+from lexicon.config import ConfigResolver
+from lexicon.providers import cloudflare
+from lexicon.tests.test_library import Provider
+
+
+@pytest.fixture(autouse=True)
+def clear_pool():
+    pool.clear()
+    yield
+    pool.clear()
+
+
+def _provider(**options):
+    options.update({'provider_name': 'fakeprovider', 'domain': 'example.com'})
+    return Provider(ConfigResolver().with_dict(options))
+
+
+def test_session_is_owned_by_provider():
+    provider = _provider()
+    http_session = provider.http_session
+
+    assert provider.http_session is http_session
+
+
+def test_providers_share_the_same_pool():
+    session1 = _provider().http_session
+    session2 = _provider().http_session
+
+    assert session1 is not session2
+    assert session1.get_adapter('https://example.com') \
+        is session2.get_adapter('https://example.com')
+
+
+def test_pool_is_configurable():
+    session = _provider(http_pool_maxsize=3, http_timeout='5',
+                        http_max_retries='2').http_session
+    adapter = session.get_adapter('https://example.com')
+
+    assert adapter.timeout == 5.0
+    assert adapter.max_retries.total == 2
+    assert adapter._pool_maxsize == 3  # pylint: disable=protected-access
+    assert adapter is not _provider().http_session.get_adapter('https://example.com')
+
+
+def test_build_session_overrides_take_precedence():
+    session = pool.build_session(ConfigResolver().with_dict({'http_max_retries': 2}),
+                                 max_retries=10)
+
+    assert session.get_adapter('https://example.com').max_retries.total == 10
+
+
+def test_build_session_with_retried_statuses_and_methods():
+    session = pool.build_session(ConfigResolver(), max_retries=10, status_forcelist=[409],
+                                 allowed_methods=['GET', 'PUT', 'PATCH'])
+    retry = session.get_adapter('https://example.com').max_retries
+
+    assert retry.is_retry('PATCH', 409)
+    assert not retry.is_retry('PATCH', 503)
+    assert not retry.is_retry('POST', 409)
+    assert session.get_adapter('https://example.com') \
+        is not pool.build_session(ConfigResolver(), max_retries=10).get_adapter(
+            'https://example.com')
+
+
+def test_provider_session_is_rate_limited():
+    session = _provider(rate_limit_storage='memory').http_session
+
+    assert isinstance(session, pool.RateLimitedSession)
+    assert session.rate_limiter is _provider(rate_limit_storage='memory').http_session.rate_limiter
+
+
+def test_provider_rate_limiter_is_kept_in_memory_per_account():
+    def _rate_limiter(token):
+        return cloudflare.Provider(ConfigResolver().with_dict({
+            'provider_name': 'cloudflare', 'domain': 'example.com',
+            'cloudflare': {'auth_username': 'user', 'auth_token': token},
+        })).http_session.rate_limiter
+
+    assert _rate_limiter('FIRST') is _rate_limiter('FIRST')
+    assert _rate_limiter('FIRST') is not _rate_limiter('SECOND')
+    assert _rate_limiter('FIRST').storage == 'memory'
+
+
+def test_rate_limited_session_retries_after_429():
+    limiter = ratelimit.RateLimiter('fakeprovider')
+    session = pool.RateLimitedSession(limiter, retries=2)
+    responses = [_response(429, {'Retry-After': '0'}), _response(200)]
+    adapter = mock.Mock(send=mock.Mock(side_effect=responses))
+    session.mount('https://', adapter)
+
+    response = session.get('https://example.com')
+
+    assert response.status_code == 200
+    assert adapter.send.call_count == 2
+
+
+def test_rate_limited_session_returns_429_once_retries_are_exhausted():
+    limiter = ratelimit.RateLimiter('fakeprovider')
+    session = pool.RateLimitedSession(limiter, retries=1)
+    adapter = mock.Mock(send=mock.Mock(
+        side_effect=lambda *args, **kwargs: _response(429, {'Retry-After': '0'})))
+    session.mount('https://', adapter)
+
+    assert session.get('https://example.com').status_code == 429
+    assert adapter.send.call_count == 2
+
+
+def _response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.url = 'https://example.com'
+    return response
+
+
+def test_parallel_map_uses_threads_of_the_pool():
+    provider = _provider(http_pool_maxsize=4)
+    thread_names = []
+    lock = threading.Lock()
+
+    def _record(item):
+        with lock:
+            thread_names.append(threading.current_thread().name)
+        return item * 2
+
+    # pylint: disable=protected-access
+    assert provider._parallel_map(_record, range(6)) == [0, 2, 4, 6, 8, 10]
+    assert threading.current_thread().name not in thread_names
+    assert len(set(thread_names)) <= 4
+
+
+def test_parallel_map_is_sequential_with_one_connection():
+    provider = _provider(http_pool_maxsize=1)
+
+    # pylint: disable=protected-access
+    assert provider._parallel_map(lambda _: threading.current_thread().name, range(3)) \
+        == [threading.current_thread().name] * 3
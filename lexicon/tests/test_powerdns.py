@@ -0,0 +1,95 @@
+"""Unit tests for the RRSets PATCH and the NOTIFY of slaves sent by the PowerDNS provider"""
+from __future__ import absolute_import
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import powerdns
+from lexicon.tests import fake_http
+
+ZONE_URL = 'http://127.0.0.1:8081/api/v1/servers/localhost/zones/example.com'
+
+
+def _rrset(rtype, name, *contents):
+    return {'type': rtype, 'name': name, 'ttl': 3600, 'comments': [],
+            'records': [{'content': content, 'disabled': False} for content in contents]}
+
+
+def _authenticated_provider(http_session, rrsets, kind='Master'):
+    http_session.request.side_effect = [
+        fake_http.response({'kind': kind, 'serial': 1, 'rrsets': rrsets})]
+    provider = powerdns.Provider(ConfigResolver().with_dict({
+        'provider_name': 'powerdns', 'domain': 'example.com', 'ttl': 600,
+        'powerdns': {'auth_token': 'token', 'pdns_server': 'http://127.0.0.1:8081'}}))
+    provider.authenticate()
+    http_session.request.reset_mock()
+    return provider
+
+
+def test_changes_are_patched_at_once_and_notified_once(http_session):
+    """Every change is sent in one PATCH of the modified RRSets, then slaves are notified"""
+    provider = _authenticated_provider(http_session, [
+        _rrset('A', 'www.example.com.', '127.0.0.1'), _rrset('TXT', 'old.example.com.', '"old"')])
+    http_session.request.side_effect = [fake_http.response(status_code=204), fake_http.response()]
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'},
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.3'},
+        {'action': 'delete', 'type': 'TXT', 'name': 'old'},
+        {'action': 'update', 'identifier': 'A/www.example.com.=127.0.0.1',
+         'type': 'A', 'name': 'api', 'content': '127.0.0.4'}])
+
+    assert [result['success'] for result in results] == [True] * 4
+    sent_requests = fake_http.sent_requests(http_session)
+    assert [(method, url) for method, url, _ in sent_requests] == [
+        ('PATCH', ZONE_URL), ('PUT', ZONE_URL + '/notify')]
+    rrsets = dict(((rrset['name'], rrset['type']), rrset)
+                  for rrset in sent_requests[0][2]['rrsets'])
+    assert sorted(record['content'] for record in rrsets[('www.example.com.', 'A')]['records']) \
+        == ['127.0.0.2', '127.0.0.3']
+    assert rrsets[('old.example.com.', 'TXT')]['changetype'] == 'DELETE'
+    assert rrsets[('api.example.com.', 'A')]['records'] \
+        == [{'content': '127.0.0.4', 'disabled': False}]
+
+
+def test_zone_data_is_updated_from_the_patch(http_session):
+    """Records listed after the changes are read from the patched zone data, without request"""
+    provider = _authenticated_provider(http_session, [
+        _rrset('A', 'www.example.com.', '127.0.0.1'), _rrset('TXT', 'old.example.com.', '"old"')])
+    http_session.request.side_effect = [fake_http.response(status_code=204), fake_http.response()]
+
+    provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'api', 'content': '127.0.0.2'},
+        {'action': 'delete', 'type': 'TXT', 'name': 'old'}])
+    http_session.request.reset_mock()
+
+    assert sorted((record['type'], record['name'], record['content'])
+                  for record in provider.list_records()) \
+        == [('A', 'api.example.com', '127.0.0.2'), ('A', 'www.example.com', '127.0.0.1')]
+    assert not http_session.request.called
+
+
+def test_noop_changes_are_not_patched(http_session):
+    """Changes leaving the zone as it was do not send any PATCH"""
+    provider = _authenticated_provider(
+        http_session, [_rrset('A', 'www.example.com.', '127.0.0.1')], kind='Native')
+
+    results = provider.apply_changes([{'action': 'delete', 'type': 'TXT', 'name': 'missing'}])
+
+    assert results == [{'success': True, 'output': True}]
+    assert not http_session.request.called
+
+
+def test_failed_patch_fails_every_change(http_session):
+    """A rejected PATCH fails every change, and leaves the zone data unchanged"""
+    provider = _authenticated_provider(http_session, [])
+    http_session.request.side_effect = [
+        fake_http.response(status_code=422, reason='Unprocessable Entity')]
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'update', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'}])
+
+    assert [result['success'] for result in results] == [False, False]
+    assert results[0]['error'] == 'HTTPError: 422 Client Error: Unprocessable Entity'
+    assert 'rtype and name' in results[1]['error']
+    assert [method for method, _, _ in fake_http.sent_requests(http_session)] == ['PATCH']
+    assert provider.zone_data()['rrsets'] == []
@@ -0,0 +1,148 @@
+"""Unit tests for the DNS propagation checker, against local DNS servers"""
+# pylint: disable=missing-docstring,protected-access
+from __future__ import absolute_import
+import socket
+import threading
+
+import mock
+import pytest
+
+from lexicon import propagation
+from lexicon.config import ConfigResolver
+from lexicon.client import Client, PropagationTimeoutError
+from lexicon.tests.test_library import Provider, mock_fake_provider
+
+dns = pytest.importorskip('dns')
+# pylint: disable=wrong-import-position,wrong-import-order
+import dns.message
+import dns.rrset
+
+
+class LocalDNSServer(object):  # pylint: disable=useless-object-inheritance
+    """DNS server on localhost, answering queries from a dict {(name, rtype): [contents]}"""
+    def __init__(self, records=None):
+        self.records = records or {}
+        self.queries = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.settimeout(0.1)
+        self.port = self._socket.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._serve)
+
+    def start(self):
+        self._thread.start()
+
+    def _serve(self):
+        while self._running:
+            try:
+                data, address = self._socket.recvfrom(4096)
+            except socket.timeout:
+                continue
+            self.queries += 1
+            query = dns.message.from_wire(data)
+            response = dns.message.make_response(query)
+            question = query.question[0]
+            contents = self.records.get((question.name.to_text(),
+                                         dns.rdatatype.to_text(question.rdtype)))
+            if contents:
+                response.answer.append(dns.rrset.from_text_list(
+                    question.name, 300, 'IN', question.rdtype, contents))
+            self._socket.sendto(response.to_wire(), address)
+
+    def stop(self):
+        self._running = False
+        self._thread.join()
+        self._socket.close()
+
+
+@pytest.fixture(name='local_dns')
+def fixture_local_dns():
+    server = LocalDNSServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+def _checker(port, **kwargs):
+    checker = propagation.PropagationChecker(initial_delay=0.01, max_delay=0.05,
+                                             query_timeout=0.5, **kwargs)
+    checker.port = port
+    return checker
+
+
+def test_record_already_served(local_dns):
+    local_dns.records[('_acme-challenge.example.com.', 'TXT')] = ['"challenge"']
+
+    assert _checker(local_dns.port).wait('_acme-challenge.example.com', 'TXT', 'challenge',
+                                         ['127.0.0.1'])
+    assert local_dns.queries == 1
+
+
+def test_record_served_after_some_time(local_dns):
+    checker = _checker(local_dns.port, timeout=5)
+    original = checker.is_served
+
+    def _is_served(*args):
+        if local_dns.queries == 3:
+            local_dns.records[('www.example.com.', 'CNAME')] = ['example.com.']
+        return original(*args)
+
+    with mock.patch.object(checker, 'is_served', side_effect=_is_served):
+        assert checker.wait('www.example.com.', 'CNAME', 'example.com', ['127.0.0.1'])
+    assert local_dns.queries == 4
+
+
+def test_record_never_served(local_dns):
+    local_dns.records[('test.example.com.', 'A')] = ['127.0.0.2']
+
+    assert not _checker(local_dns.port, timeout=0.1).wait('test.example.com', 'A', '127.0.0.1',
+                                                          ['127.0.0.1'])
+    assert local_dns.queries > 1
+
+
+def test_unreachable_nameserver_is_not_propagated():
+    checker = propagation.PropagationChecker(query_timeout=0.1, timeout=0)
+    checker.port = 9
+
+    assert not checker.is_served('127.0.0.1', 'example.com', 'A', '127.0.0.1')
+
+
+def test_checker_requires_dnspython(monkeypatch):
+    monkeypatch.setattr(propagation, 'HAS_DNSPYTHON', False)
+
+    with pytest.raises(ImportError, match='requires dnspython'):
+        propagation.PropagationChecker()
+
+
+def test_client_waits_for_propagation(local_dns):
+    local_dns.records[('_acme-challenge.example.com.', 'TXT')] = ['"challenge"']
+    config = ConfigResolver().with_dict({
+        'provider_name': 'fakeprovider', 'action': 'create', 'domain': 'example.com',
+        'type': 'TXT', 'name': '_acme-challenge', 'content': 'challenge',
+        'propagation_timeout': 1})
+
+    with mock_fake_provider(), \
+            mock.patch.object(Provider, '_propagation_checker',
+                              return_value=_checker(local_dns.port)), \
+            mock.patch.object(propagation.PropagationChecker, 'find_nameservers',
+                              return_value=['127.0.0.1']) as mock_find_nameservers:
+        Client(config).execute()
+
+    mock_find_nameservers.assert_called_once_with('example.com')
+    assert local_dns.queries == 1
+
+
+def test_client_fails_when_record_is_not_propagated(local_dns):
+    config = ConfigResolver().with_dict({
+        'provider_name': 'fakeprovider', 'action': 'create', 'domain': 'example.com',
+        'type': 'TXT', 'name': '_acme-challenge', 'content': 'challenge',
+        'propagation_timeout': 1})
+
+    with mock_fake_provider(), \
+            mock.patch.object(Provider, '_propagation_checker',
+                              return_value=_checker(local_dns.port, timeout=0.1)), \
+            mock.patch.object(propagation.PropagationChecker, 'find_nameservers',
+                              return_value=['127.0.0.1']):
+        with pytest.raises(PropagationTimeoutError):
+            Client(config).execute()
@@ -0,0 +1,104 @@
+"""Unit tests for the rate limiting primitives"""
+# pylint: disable=missing-docstring
+from __future__ import absolute_import
+import time
+
+import mock
+import pytest
+
+from lexicon import ratelimit
+from lexicon.ratelimit import RateLimiter, RateLimitExceeded, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def clear_limiters(tmpdir, monkeypatch):
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+    ratelimit.clear()
+    yield
+    ratelimit.clear()
+
+
+def _response(status_code, headers=None):
+    return mock.Mock(status_code=status_code, headers=headers or {})
+
+
+def test_token_bucket_allows_bursts_up_to_capacity():
+    bucket = TokenBucket(1, capacity=3)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() > 0
+
+
+def test_token_bucket_returns_time_to_wait():
+    bucket = TokenBucket(10)
+
+    for _ in range(10):
+        bucket.acquire()
+
+    assert 0 < bucket.try_acquire() <= 0.1
+
+
+def test_token_bucket_refuses_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_rate_limiter_enforces_every_quota():
+    limiter = RateLimiter('fakeprovider', quotas=[(2, 0.1), (3, 3600)], max_wait=1)
+
+    start = time.time()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.time() - start >= 0.04
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()
+
+
+def test_rate_limiter_state_is_shared_on_disk():
+    RateLimiter('fakeprovider', quotas=[(1, 3600)], storage='disk').acquire()
+
+    with pytest.raises(RateLimitExceeded):
+        RateLimiter('fakeprovider', quotas=[(1, 3600)], storage='disk', max_wait=10).acquire()
+    RateLimiter('fakeprovider', quotas=[(1, 3600)], storage='memory').acquire()
+
+
+def test_rate_limiter_honors_retry_after_on_429():
+    limiter = RateLimiter('fakeprovider', max_wait=10)
+
+    assert limiter.observe(_response(429, {'Retry-After': '30'})) == 30
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()
+
+
+def test_rate_limiter_backs_off_exponentially_without_retry_after():
+    limiter = RateLimiter('fakeprovider')
+
+    assert limiter.observe(_response(429), attempt=2) == 4 * ratelimit.DEFAULT_BACKOFF
+
+
+def test_rate_limiter_waits_for_the_reset_of_an_exhausted_quota():
+    limiter = RateLimiter('fakeprovider', max_wait=10)
+
+    assert limiter.observe(_response(200, {'X-RateLimit-Remaining': '5',
+                                           'X-RateLimit-Reset': '60'})) is None
+    limiter.acquire()
+
+    limiter.observe(_response(200, {'X-RateLimit-Remaining': '0',
+                                    'X-RateLimit-Reset': str(int(time.time()) + 60)}))
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()
+
+
+def test_rate_limiters_are_shared_by_name_and_configuration():
+    assert ratelimit.get_rate_limiter('fakeprovider', [(1, 1)]) \
+        is ratelimit.get_rate_limiter('fakeprovider', [(1, 1)])
+    assert ratelimit.get_rate_limiter('fakeprovider', [(1, 1)]) \
+        is not ratelimit.get_rate_limiter('otherprovider', [(1, 1)])
+
+
+def test_quotas_are_parsed():
+    assert ratelimit.parse_quotas('60/60, 1000/86400') == [(60, 60.0), (1000, 86400.0)]
+    assert not ratelimit.parse_quotas('none')
+    with pytest.raises(ValueError):
+        ratelimit.parse_quotas('60 per minute')
@@ -0,0 +1,112 @@
+"""Unit tests for the change batches sent by the Route 53 provider"""
+from __future__ import absolute_import
+
+import botocore.exceptions
+import mock
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import route53
+
+
+def _route53_provider():
+    with mock.patch('boto3.client'):
+        provider = route53.Provider(ConfigResolver().with_dict({
+            'provider_name': 'route53', 'domain': 'example.com', 'ttl': 300}))
+    provider.domain_id = 'ZONEID'
+    return provider
+
+
+def _client_error():
+    return botocore.exceptions.ClientError(
+        {'Error': {'Code': 'InvalidChangeBatch', 'Message': 'Invalid'}},
+        'ChangeResourceRecordSets')
+
+
+def _sent_changes(provider):
+    return [call[1]['ChangeBatch']['Changes']
+            for call in provider.r53_client.change_resource_record_sets.call_args_list]
+
+
+def test_apply_changes_merges_record_sets_in_one_batch():
+    """Changes on a same record set are sent as one change, in one ChangeBatch"""
+    provider = _route53_provider()
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'token1'},
+        {'action': 'create', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'token2'},
+        {'action': 'delete', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'invalid', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+    ])
+
+    assert [result['success'] for result in results] == [True, True, True, False]
+    sent_changes = _sent_changes(provider)
+    assert len(sent_changes) == 1
+    assert [change['Action'] for change in sent_changes[0]] == ['CREATE', 'DELETE']
+    assert sent_changes[0][0]['ResourceRecordSet'] == {
+        'Name': '_acme-challenge.example.com.', 'Type': 'TXT', 'TTL': 300,
+        'ResourceRecords': [{'Value': '"token1"'}, {'Value': '"token2"'}]}
+
+
+def test_apply_changes_keeps_order_on_a_record_set():
+    """Successive changes of distinct actions on a record set are sent in order"""
+    provider = _route53_provider()
+    provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'delete', 'type': 'A', 'name': 'www.example.com.', 'content': '127.0.0.1'},
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'},
+    ])
+
+    assert [[change['Action'] for change in changes]
+            for changes in _sent_changes(provider)] == [['CREATE', 'DELETE', 'CREATE']]
+
+
+def test_apply_changes_sends_the_last_of_successive_updates():
+    """Successive updates of a record set leave the record set of the last update"""
+    changes = [{'action': 'update', 'type': 'A', 'name': 'www', 'content': content}
+               for content in ('127.0.0.1', '127.0.0.2')]
+    sequential_provider = _route53_provider()
+    for change in changes:
+        sequential_provider.update_record(None, change['type'], change['name'], change['content'])
+    provider = _route53_provider()
+
+    results = provider.apply_changes(changes)
+
+    assert [result['success'] for result in results] == [True, True]
+    sent_changes = _sent_changes(provider)
+    assert [[change['Action'] for change in changes] for changes in sent_changes] \
+        == [['UPSERT']]
+    assert sent_changes[0][0]['ResourceRecordSet'] \
+        == _sent_changes(sequential_provider)[-1][0]['ResourceRecordSet'] == {
+            'Name': 'www.example.com.', 'Type': 'A', 'TTL': 300,
+            'ResourceRecords': [{'Value': '127.0.0.2'}]}
+
+
+def test_apply_changes_splits_batches_at_api_limits():
+    """A ChangeBatch holds at most 1000 records"""
+    provider = _route53_provider()
+    provider.apply_changes([{'action': 'update', 'type': 'A', 'name': 'host{0}'.format(index),
+                             'content': '127.0.0.1'} for index in range(1200)])
+
+    # UPSERT changes count twice in the limit of 1000 records per batch.
+    assert [len(changes) for changes in _sent_changes(provider)] == [500, 500, 200]
+
+
+def test_apply_changes_bisects_a_rejected_batch():
+    """A rejected ChangeBatch is split in halves until the invalid change is isolated"""
+    provider = _route53_provider()
+    provider.r53_client.change_resource_record_sets.side_effect = [
+        _client_error(), None, _client_error(), _client_error(), None]
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'host{0}'.format(index),
+         'content': '127.0.0.1'} for index in range(4)])
+
+    assert [result['success'] for result in results] == [True, True, False, True]
+    assert 'InvalidChangeBatch' in results[2]['error']
+    assert [[change['ResourceRecordSet']['Name'] for change in changes]
+            for changes in _sent_changes(provider)] == [
+                ['host0.example.com.', 'host1.example.com.', 'host2.example.com.',
+                 'host3.example.com.'],
+                ['host0.example.com.', 'host1.example.com.'],
+                ['host2.example.com.', 'host3.example.com.'],
+                ['host2.example.com.'],
+                ['host3.example.com.']]
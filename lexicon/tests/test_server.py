@@ -0,0 +1,190 @@
+"""Unit tests for the Lexicon server and the CLI thin client mode"""
+# pylint: disable=missing-docstring
+from __future__ import absolute_import
+import contextlib
+import os
+import stat
+import socket
+import threading
+import time
+
+import mock
+import pytest
+
+from lexicon import cli, server
+from lexicon.config import ConfigResolver
+from lexicon.parser import generate_cli_main_parser
+from lexicon.tests.test_library import Provider, mock_fake_provider
+
+UNIX_SOCKETS = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                                  reason='Unix sockets are not supported')
+
+
+@pytest.fixture(autouse=True)
+def fake_provider():
+    """Activate the fake_provider mock"""
+    with mock_fake_provider():
+        yield
+
+
+@contextlib.contextmanager
+def _running(instance):
+    thread = threading.Thread(target=instance.serve_forever)
+    thread.start()
+    for _ in range(100):
+        if os.path.exists(instance.address):
+            break
+        time.sleep(0.01)
+    try:
+        yield instance
+    finally:
+        instance.shutdown()
+        thread.join()
+
+
+@pytest.fixture(name='lexicon_server')
+def fixture_lexicon_server(tmpdir, monkeypatch):
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+    with _running(server.LexiconServer(server.default_address(), ConfigResolver())) as instance:
+        yield instance
+
+
+def _operation(**kwargs):
+    operation = {'provider_name': 'fakeprovider', 'action': 'create',
+                 'domain': 'example.com', 'type': 'TXT', 'name': 'fake', 'content': 'fake'}
+    operation.update(kwargs)
+    return operation
+
+
+@UNIX_SOCKETS
+def test_server_keeps_providers_authenticated(lexicon_server):
+    with mock.patch.object(Provider, '_authenticate') as mock_authenticate:
+        first = server.execute(lexicon_server.address, _operation())
+        second = server.execute(lexicon_server.address, _operation(action='list'))
+
+    assert first['success'] and second['success']
+    assert second['output']['action'] == 'list'
+    assert mock_authenticate.call_count == 1
+
+
+@UNIX_SOCKETS
+def test_server_authenticates_again_after_a_failure(lexicon_server):
+    with mock.patch.object(Provider, '_authenticate') as mock_authenticate, \
+            mock.patch.object(Provider, '_create_record', side_effect=ValueError('expired')):
+        result = server.execute(lexicon_server.address, _operation())
+        server.execute(lexicon_server.address, _operation())
+
+    assert not result['success']
+    assert result['error'] == 'ValueError: expired'
+    assert mock_authenticate.call_count == 2
+
+
+@UNIX_SOCKETS
+def test_server_socket_is_private(tmpdir, monkeypatch):
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir.join('missing')))
+    with _running(server.LexiconServer(server.default_address(), ConfigResolver())) as instance:
+        socket_mode = stat.S_IMODE(os.stat(instance.address).st_mode)
+        directory_mode = stat.S_IMODE(os.stat(str(tmpdir.join('missing'))).st_mode)
+
+    assert socket_mode == 0o600
+    assert directory_mode & 0o077 == 0
+
+
+def test_tcp_server_requires_a_token():
+    with pytest.raises(server.ServerError):
+        server.LexiconServer('localhost:8053', ConfigResolver()).serve_forever()
+
+
+@UNIX_SOCKETS
+def test_server_checks_the_token(tmpdir, monkeypatch):
+    address = str(tmpdir.join('server.sock'))
+    with _running(server.LexiconServer(address, ConfigResolver(), token='TOKEN')):
+        with pytest.raises(server.ServerError) as error:
+            server.execute(address, _operation())
+        monkeypatch.setenv('LEXICON_SERVER_TOKEN', 'TOKEN')
+        result = server.execute(address, _operation())
+
+    assert '401' in str(error.value)
+    assert result['success']
+
+
+@UNIX_SOCKETS
+def test_server_refuses_operations_of_another_context(tmpdir, monkeypatch):
+    address = str(tmpdir.join('server.sock'))
+    context = server.context_fingerprint(str(tmpdir))
+    with _running(server.LexiconServer(address, ConfigResolver(), context)):
+        same_context = server.execute(address, _operation(), context=context)
+        monkeypatch.setenv('LEXICON_FAKEPROVIDER_AUTH_TOKEN', 'OTHER')
+        with pytest.raises(server.ServerContextMismatch):
+            server.execute(address, _operation(),
+                           context=server.context_fingerprint(str(tmpdir)))
+
+    assert same_context['success']
+
+
+def test_context_fingerprint_ignores_server_variables(tmpdir, monkeypatch):
+    context = server.context_fingerprint(str(tmpdir))
+    monkeypatch.setenv('LEXICON_SERVER', 'localhost:8053')
+    monkeypatch.setenv('LEXICON_SERVER_TOKEN', 'TOKEN')
+
+    assert server.context_fingerprint(str(tmpdir)) == context
+    assert server.context_fingerprint(str(tmpdir.join('other'))) != context
+
+
+def test_find_server(tmpdir, monkeypatch):
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+
+    assert server.find_server('localhost:8053') == 'localhost:8053'
+    assert server.find_server() is None
+
+
+def test_execute_raises_when_server_is_unavailable(tmpdir):
+    with pytest.raises(server.ServerUnavailable):
+        server.execute(str(tmpdir.join('missing.sock')), _operation())
+
+
+def test_operation_from_args_scopes_provider_options():
+    parsed_args = generate_cli_main_parser().parse_args(
+        ['cloudflare', 'create', 'example.com', 'TXT', '--name', 'fake', '--content', 'fake',
+         '--auth-token', 'TOKEN'])
+
+    operation = server.operation_from_args(parsed_args)
+
+    assert operation['action'] == 'create'
+    assert operation['domain'] == 'example.com'
+    assert operation['cloudflare'] == {'auth_token': 'TOKEN'}
+    assert 'output' not in operation
+
+
+@UNIX_SOCKETS
+def test_cli_sends_operation_to_the_server(lexicon_server, capsys):
+    result = {'success': True, 'output': [{'id': 'fake-id', 'type': 'TXT'}]}
+    with mock.patch('sys.argv', ['lexicon', 'cloudflare', 'list', 'example.com', 'TXT',
+                                 '--auth-token', 'TOKEN', '--output', 'JSON']), \
+            mock.patch.object(lexicon_server, 'execute', return_value=result) as mock_execute:
+        cli.main()
+
+    assert mock_execute.call_args[0][0]['cloudflare'] == {'auth_token': 'TOKEN'}
+    assert '"id": "fake-id"' in capsys.readouterr().out
+
+
+@UNIX_SOCKETS
+def test_cli_raises_failures_of_the_server(lexicon_server):
+    result = {'success': False, 'error': 'ValueError: expired'}
+    with mock.patch('sys.argv', ['lexicon', 'cloudflare', 'list', 'example.com', 'TXT']), \
+            mock.patch.object(lexicon_server, 'execute', return_value=result):
+        with pytest.raises(server.ServerError):
+            cli.main()
+
+
+@UNIX_SOCKETS
+def test_cli_executes_locally_operations_of_another_context(lexicon_server, tmpdir):
+    lexicon_server.context = 'OTHER'
+    with mock.patch('sys.argv', ['lexicon', '--config-dir', str(tmpdir), 'cloudflare', 'list',
+                                 'example.com', 'TXT']), \
+            mock.patch.object(lexicon_server, 'execute') as mock_execute, \
+            mock.patch('lexicon.cli.Client') as mock_client:
+        cli.main()
+
+    assert not mock_execute.called
+    assert mock_client.return_value.execute.called
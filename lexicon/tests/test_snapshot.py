@@ -0,0 +1,132 @@
+"""Unit tests for the zone snapshot cache of providers"""
+# pylint: disable=missing-docstring,protected-access
+from __future__ import absolute_import
+
+import mock
+import pytest
+
+from lexicon import snapshot
+from lexicon.config import ConfigResolver
+from lexicon.providers import cloudflare
+from lexicon.tests.test_library import Provider
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshots(tmpdir, monkeypatch):
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+    snapshot.clear()
+    yield
+    snapshot.clear()
+
+
+class ZoneProvider(Provider):
+    """Fake provider reading the records of its zone through the zone snapshot cache"""
+    def __init__(self, config, records):
+        super(ZoneProvider, self).__init__(config)
+        self.records = records
+
+    def _create_record(self, rtype, name, content):
+        self.records.append({'type': rtype, 'name': name, 'content': content})
+        return True
+
+    def _list_records(self, rtype=None, name=None, content=None):
+        return [record for record in self._zone_snapshot(lambda: list(self.records))
+                if record['name'] == name]
+
+    def _delete_record(self, identifier=None, rtype=None, name=None, content=None):
+        for record in self._list_records(rtype, name, content):
+            self.records.remove(record)
+        return True
+
+
+def _provider(**options):
+    options.update({'provider_name': 'fakeprovider', 'domain': 'example.com'})
+    return Provider(ConfigResolver().with_dict(options))
+
+
+def test_zone_is_downloaded_each_time_by_default():
+    provider = _provider()
+    fetch = mock.Mock(return_value={'records': []})
+
+    provider._zone_snapshot(fetch)
+    provider._zone_snapshot(fetch)
+
+    assert fetch.call_count == 2
+
+
+def test_snapshot_is_reused_while_fresh():
+    provider = _provider(zone_cache='memory')
+    fetch = mock.Mock(return_value={'records': ['A']})
+
+    first = provider._zone_snapshot(fetch)
+    first['records'].append('B')
+
+    assert _provider(zone_cache='memory')._zone_snapshot(fetch) == {'records': ['A']}
+    assert fetch.call_count == 1
+
+
+def test_snapshot_is_invalidated_on_write():
+    provider = _provider(zone_cache='memory')
+    fetch = mock.Mock(return_value={'records': []})
+
+    provider._zone_snapshot(fetch)
+    provider.create_record('TXT', 'test', 'content')
+    provider._zone_snapshot(fetch)
+
+    assert fetch.call_count == 2
+
+
+def test_batched_changes_see_the_previous_changes_of_the_batch():
+    records = [{'type': 'A', 'name': 'a', 'content': '127.0.0.1'}]
+    config = ConfigResolver().with_dict({
+        'provider_name': 'fakeprovider', 'domain': 'example.com', 'zone_cache': 'memory'})
+    provider = ZoneProvider(config, records)
+
+    results = provider.apply_changes([
+        {'action': 'delete', 'type': 'A', 'name': 'a'},
+        {'action': 'create', 'type': 'A', 'name': 'b', 'content': '127.0.0.2'},
+        {'action': 'delete', 'type': 'A', 'name': 'b'}])
+
+    assert [result['success'] for result in results] == [True, True, True]
+    assert not records
+
+
+def test_expired_snapshot_is_revalidated_with_serial():
+    provider = _provider(zone_cache='memory', zone_cache_ttl='0')
+    fetch = mock.Mock(return_value={'records': []})
+    serial = mock.Mock(return_value=1)
+
+    provider._zone_snapshot(fetch, serial=serial)
+    provider._zone_snapshot(fetch, serial=serial)
+    assert fetch.call_count == 1
+
+    serial.return_value = 2
+    provider._zone_snapshot(fetch, serial=serial)
+    assert fetch.call_count == 2
+
+
+def test_snapshots_are_not_shared_across_accounts():
+    fetch = mock.Mock(return_value={'records': []})
+
+    for token in ('FIRST', 'SECOND', 'FIRST'):
+        cloudflare.Provider(ConfigResolver().with_dict({
+            'provider_name': 'cloudflare', 'domain': 'example.com', 'zone_cache': 'memory',
+            'cloudflare': {'auth_username': 'user', 'auth_token': token},
+        }))._zone_snapshot(fetch)
+
+    assert fetch.call_count == 2
+
+
+def test_disk_snapshot_is_shared_across_processes():
+    fetch = mock.Mock(return_value={'records': []})
+
+    _provider(zone_cache='disk')._zone_snapshot(fetch)
+    snapshot.clear()
+    _provider(zone_cache='disk')._zone_snapshot(fetch)
+
+    assert fetch.call_count == 1
+
+
+def test_invalid_storage_is_rejected():
+    with pytest.raises(ValueError):
+        _provider(zone_cache='invalid')._zone_snapshot(mock.Mock())
@@ -0,0 +1,98 @@
+"""Unit tests for the shared SOAP client and domains lookup of the Subreg provider"""
+from __future__ import absolute_import
+
+import mock
+import pytest
+import requests
+
+from lexicon import websession
+from lexicon.config import ConfigResolver
+from lexicon.providers import subreg
+
+ZEEP = pytest.importorskip('zeep')
+
+
+@pytest.fixture(name='zeep_client')
+def fixture_zeep_client(monkeypatch, tmpdir):
+    """Mock the SOAP client class, serving a Subreg account owning example.com"""
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(subreg, '_CLIENT', None)
+    zeep_client = mock.Mock()
+    service = zeep_client.return_value.service
+    service.Login.return_value = {'status': 'ok', 'data': {'ssid': 'ssid'}}
+    service.Domains_List.return_value = {'status': 'ok',
+                                         'data': {'domains': [{'name': 'example.com'}]}}
+    monkeypatch.setattr(ZEEP, 'Client', zeep_client)
+    websession.clear()
+    yield zeep_client
+    websession.clear()
+
+
+def _provider(domain='example.com', **options):
+    options.update({'provider_name': 'subreg', 'domain': domain,
+                    'subreg': {'auth_username': 'user', 'auth_password': 'secret'}})
+    return subreg.Provider(ConfigResolver().with_dict(options))
+
+
+def test_client_is_shared_and_its_wsdl_cached_on_disk(zeep_client, tmpdir):
+    """The SOAP client is built once per process, with its WSDL cached on disk"""
+    first, second = _provider(), _provider()
+
+    assert first.api is second.api
+    zeep_client.assert_called_once_with(subreg.WSDL_URL, transport=mock.ANY)
+    transport = zeep_client.call_args[1]['transport']
+    assert isinstance(transport.cache, ZEEP.cache.SqliteCache)
+    assert tmpdir.join('subreg_wsdl.db').check()
+
+
+def test_bundled_wsdl_is_used_when_wsdl_cannot_be_retrieved(zeep_client):
+    """The WSDL shipped with Lexicon is used if the one of Subreg cannot be downloaded"""
+    zeep_client.side_effect = [requests.exceptions.ConnectionError('offline'), mock.Mock()]
+
+    _provider()
+
+    assert zeep_client.call_args[0] == (subreg.BUNDLED_WSDL,)
+
+
+def test_bundled_wsdl_describes_the_api():
+    """The bundled WSDL declares every operation used by the provider"""
+    client = ZEEP.Client(subreg.BUNDLED_WSDL)
+
+    for operation in ('Login', 'Domains_List', 'Get_DNS_Zone', 'Add_DNS_Record',
+                      'Modify_DNS_Record', 'Delete_DNS_Record'):
+        assert getattr(client.service, operation)
+
+
+def test_domains_of_the_account_are_kept_with_the_session_cache(zeep_client):
+    """With the session cache, the domains of the account are listed once"""
+    service = zeep_client.return_value.service
+    _provider(session_cache='memory').authenticate()
+    provider = _provider(session_cache='memory')
+    provider.authenticate()
+
+    assert provider.domain_id == 'example.com'
+    assert service.Login.call_args_list == [
+        mock.call(login='user', password='secret')] * 2
+    service.Domains_List.assert_called_once_with(ssid='ssid')
+
+
+def test_domains_of_the_account_are_listed_again_for_an_unknown_domain(zeep_client):
+    """A domain missing from the cached domains of the account is looked up again"""
+    service = zeep_client.return_value.service
+    _provider(session_cache='memory').authenticate()
+    service.Domains_List.return_value = {
+        'status': 'ok', 'data': {'domains': [{'name': 'example.com'}, {'name': 'other.com'}]}}
+    provider = _provider('other.com', session_cache='memory')
+    provider.authenticate()
+
+    assert provider.domain_id == 'other.com'
+    assert service.Domains_List.call_args_list == [mock.call(ssid='ssid')] * 2
+
+
+def test_domains_of_the_account_are_listed_without_session_cache(zeep_client):
+    """Without the session cache, the domains of the account are listed at each login"""
+    service = zeep_client.return_value.service
+    _provider().authenticate()
+    _provider().authenticate()
+
+    assert service.Domains_List.call_count == 2
@@ -0,0 +1,79 @@
+"""Unit tests for the working copy of DNS entries kept by the Transip provider"""
+from __future__ import absolute_import
+
+import collections
+
+import mock
+import pytest
+
+from lexicon.config import ConfigResolver
+from lexicon.providers import transip
+
+DnsEntry = collections.namedtuple('DnsEntry', ['name', 'expire', 'type', 'content'])
+
+
+@pytest.fixture(name='provider')
+def fixture_provider():
+    """Provide a Transip provider authenticated against a mocked DomainService"""
+    with mock.patch.object(transip, 'DomainService', create=True), \
+            mock.patch.object(transip, 'DnsEntry', DnsEntry, create=True):
+        provider = transip.Provider(ConfigResolver().with_dict({
+            'provider_name': 'transip', 'domain': 'example.com', 'ttl': 600,
+            'transip': {'auth_username': 'user', 'auth_api_key': 'key.pem'}}))
+        provider.client.get_info.return_value = mock.Mock(dnsEntries=[
+            DnsEntry('@', 3600, 'A', '127.0.0.1'), DnsEntry('www', 3600, 'A', '127.0.0.1')])
+        provider.authenticate()
+        yield provider
+
+
+def _set_entries(provider):
+    provider.client.set_dns_entries.assert_called_with('example.com', mock.ANY)
+    return sorted(provider.client.set_dns_entries.call_args[0][1])
+
+
+def test_changes_are_set_at_once_on_the_working_copy(provider):
+    """Changes are applied on the DNS entries fetched at authentication, then set at once"""
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'TXT', 'name': '_acme-challenge', 'content': 'token'},
+        {'action': 'update', 'type': 'A', 'name': 'www', 'content': '127.0.0.2'},
+        {'action': 'delete', 'type': 'A', 'name': '@'}])
+
+    assert [result['success'] for result in results] == [True] * 3
+    provider.client.get_info.assert_called_once_with('example.com')
+    assert provider.client.set_dns_entries.call_count == 1
+    assert _set_entries(provider) == [DnsEntry('_acme-challenge', 600, 'TXT', 'token'),
+                                      DnsEntry('www', 600, 'A', '127.0.0.2')]
+
+    provider.apply_changes([{'action': 'delete', 'type': 'TXT', 'name': '_acme-challenge'}])
+
+    provider.client.get_info.assert_called_once_with('example.com')
+    assert _set_entries(provider) == [DnsEntry('www', 600, 'A', '127.0.0.2')]
+
+
+def test_noop_changes_are_not_set(provider):
+    """Changes leaving the DNS entries as they were do not set them"""
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'www', 'content': '127.0.0.1'},
+        {'action': 'delete', 'type': 'TXT', 'name': 'missing'},
+        {'action': 'create', 'type': 'A', 'name': 'api', 'content': '127.0.0.1'},
+        {'action': 'delete', 'type': 'A', 'name': 'api'}])
+
+    assert [result['success'] for result in results] == [True] * 4
+    assert not provider.client.set_dns_entries.called
+
+
+def test_failed_replacement_fails_every_change(provider):
+    """A rejected replacement fails every change, keeping the errors of invalid ones"""
+    provider.client.set_dns_entries.side_effect = Exception('Invalid DNS entries')
+
+    results = provider.apply_changes([
+        {'action': 'create', 'type': 'A', 'name': 'api', 'content': '127.0.0.1'},
+        {'action': 'delete'}])
+
+    assert _set_entries(provider) == [DnsEntry('@', 3600, 'A', '127.0.0.1'),
+                                      DnsEntry('api', 600, 'A', '127.0.0.1'),
+                                      DnsEntry('www', 3600, 'A', '127.0.0.1')]
+    assert results == [
+        {'success': False, 'error': 'Exception: Invalid DNS entries'},
+        {'success': False,
+         'error': 'Exception: At least one of rtype, name or content must be specified.'}]
@@ -0,0 +1,120 @@
+"""Unit tests for the web session cache of providers"""
+# pylint: disable=missing-docstring,protected-access
+from __future__ import absolute_import
+import json
+import os
+
+import mock
+import pytest
+import requests
+
+from lexicon import cache, websession
+from lexicon.config import ConfigResolver
+from lexicon.tests.test_library import Provider
+
+
+@pytest.fixture(autouse=True)
+def clear_web_sessions(tmpdir, monkeypatch):
+    monkeypatch.setenv('LEXICON_CACHE_DIR', str(tmpdir))
+    websession.clear()
+    yield
+    websession.clear()
+
+
+def _provider(password='secret', **options):
+    options.update({'provider_name': 'fakeprovider', 'domain': 'example.com',
+                    'fakeprovider': {'auth_username': 'user', 'auth_password': password}})
+    return Provider(ConfigResolver().with_dict(options))
+
+
+def _logged_in_session():
+    session = requests.Session()
+    session.cookies.set('PHPSESSID', 'abc', domain='dns.example.com', path='/')
+    return session
+
+
+def test_web_session_is_not_restored_by_default():
+    provider = _provider()
+    provider._store_web_session(_logged_in_session(), {'domain_id': '42'})
+    probe = mock.Mock(return_value=True)
+
+    assert provider._restore_web_session(requests.Session(), probe) is None
+    assert not probe.called
+
+
+def test_web_session_is_restored_with_its_data():
+    _provider(session_cache='memory')._store_web_session(_logged_in_session(),
+                                                         {'domain_id': '42'})
+    session = requests.Session()
+    probe = mock.Mock(return_value=True)
+
+    assert _provider(session_cache='memory')._restore_web_session(session, probe) \
+        == {'domain_id': '42'}
+    assert session.cookies.get('PHPSESSID', domain='dns.example.com') == 'abc'
+    probe.assert_called_once_with({'domain_id': '42'})
+
+
+def test_rejected_web_session_is_dropped():
+    provider = _provider(session_cache='memory')
+    provider._store_web_session(_logged_in_session(), {'domain_id': '42'})
+    session = requests.Session()
+
+    assert provider._restore_web_session(session, mock.Mock(return_value=False)) is None
+    assert not session.cookies
+    assert provider._restore_web_session(session, mock.Mock(return_value=True)) is None
+
+
+def test_web_session_data_is_stored_without_cookies():
+    _provider(session_cache='memory')._store_web_session_data({'domains': ['example.com']})
+    probe = mock.Mock(return_value=True)
+
+    assert _provider(session_cache='memory')._restore_web_session_data(probe) \
+        == {'domains': ['example.com']}
+    probe.assert_called_once_with({'domains': ['example.com']})
+    assert _provider(session_cache='memory')._restore_web_session_data(
+        mock.Mock(return_value=False)) is None
+
+
+def test_expired_web_session_is_not_restored():
+    provider = _provider(session_cache='memory', session_cache_ttl='0')
+    provider._store_web_session(_logged_in_session())
+
+    assert provider._restore_web_session(requests.Session(), mock.Mock()) is None
+
+
+def test_disk_web_session_is_encrypted_and_shared_across_processes(tmpdir):
+    _provider(session_cache='disk')._store_web_session(_logged_in_session(),
+                                                       {'domain_id': '42'})
+    websession.clear()
+
+    files = os.listdir(str(tmpdir))
+    assert len(files) == 1
+    content = json.dumps(cache.load(files[0]))
+    assert 'PHPSESSID' not in content and 'domain_id' not in content
+
+    assert _provider(session_cache='disk')._restore_web_session(
+        requests.Session(), mock.Mock(return_value=True)) == {'domain_id': '42'}
+
+
+def test_disk_web_session_requires_the_same_credentials():
+    _provider(session_cache='disk')._store_web_session(_logged_in_session())
+    websession.clear()
+
+    assert _provider(password='other', session_cache='disk')._restore_web_session(
+        requests.Session(), mock.Mock(return_value=True)) is None
+
+
+def test_memory_web_session_requires_the_same_credentials():
+    websession.save(('fakeprovider', 'alice'), 'alice:right', websession.WebSession([]))
+
+    assert websession.load(('fakeprovider', 'alice'), 'alice:WRONG') is None
+    assert websession.load(('fakeprovider', 'alice'), 'alice:right') is not None
+    for storage in ('memory', 'disk'):
+        _provider(session_cache=storage)._store_web_session(_logged_in_session())
+        assert _provider(password='other', session_cache=storage)._restore_web_session(
+            requests.Session(), mock.Mock(return_value=True)) is None
+
+
+def test_invalid_storage_is_rejected():
+    with pytest.raises(ValueError):
+        _provider(session_cache='invalid')._restore_web_session(requests.Session(), mock.Mock())
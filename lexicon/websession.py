@@ -0,0 +1,166 @@
+"""
+Web sessions: authenticated sessions of the providers that log into a web interface (instead
+of an API), kept to skip the login and the lookup of the domain ids on subsequent operations.
+
+A web session holds the cookies of the authenticated requests.Session, and any data resolved
+after the login (typically the ids of the domains of the account). Web sessions are always kept
+in memory for the lifetime of the process. With the 'disk' storage, they are also stored in the
+Lexicon cache (see lexicon.cache), so they are shared across Lexicon invocations. As cookies grant
+access to the account, they are stored encrypted with a key derived from the account credentials,
+and a session held in memory is only returned to a caller giving the same credentials.
+A web session expires after a time-to-live, and the provider must check that it is still accepted
+by the web interface before using it (see lexicon.providers.base.Provider._restore_web_session).
+"""
+from __future__ import absolute_import
+import base64
+import copy
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+
+from requests.cookies import create_cookie
+
+from lexicon import cache
+
+
+LOGGER = logging.getLogger(__name__)
+
+STORAGES = ('memory', 'disk')
+DEFAULT_TTL = 1800
+KDF_ITERATIONS = 100000
+
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+class WebSession(object):  # pylint: disable=useless-object-inheritance
+    """
+    Authenticated session to a web interface.
+
+    :param cookies: list of the cookies of the session, as returned by dump_cookies
+    :param data: JSON serializable data resolved with the session (eg. domain ids)
+    :param expires_at: time after which the session must not be used, in seconds since epoch
+    """
+    def __init__(self, cookies, data=None, expires_at=None):
+        self.cookies = cookies
+        self.data = data if data is not None else {}
+        self.expires_at = expires_at
+
+    def is_expired(self):
+        """Check if the session has reached its expiration time."""
+        return self.expires_at is not None and time.time() >= self.expires_at
+
+    def to_dict(self):
+        """Serialize the session."""
+        return {'cookies': self.cookies, 'data': self.data, 'expires_at': self.expires_at}
+
+    @classmethod
+    def from_dict(cls, value):
+        """Deserialize a session."""
+        return cls(value['cookies'], value.get('data'), value.get('expires_at'))
+
+
+def dump_cookies(cookie_jar):
+    """Return the cookies of the given cookie jar as a JSON serializable list."""
+    return [{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+             'path': cookie.path, 'secure': cookie.secure, 'expires': cookie.expires,
+             'rest': dict(getattr(cookie, '_rest', {}))}
+            for cookie in cookie_jar]
+
+
+def load_cookies(cookie_jar, cookies):
+    """Add the cookies returned by dump_cookies to the given cookie jar."""
+    for cookie in cookies:
+        cookie_jar.set_cookie(create_cookie(**cookie))
+
+
+def load(key, secret, storage='memory'):
+    """
+    Return a copy of the web session stored for the given key, or None if there is none, if it
+    is expired, or if it cannot be decrypted with the given secret.
+    """
+    fingerprint = _fingerprint(secret)
+    with _SESSIONS_LOCK:
+        entry = _SESSIONS.get(key)
+    session = entry[1] if entry and hmac.compare_digest(entry[0], fingerprint) else None
+
+    if not session and storage == 'disk':
+        session = _decrypt(cache.load(_cache_name(key)), secret)
+        if session:
+            with _SESSIONS_LOCK:
+                _SESSIONS[key] = (fingerprint, session)
+
+    if session and session.is_expired():
+        LOGGER.debug('Web session %s expired.', key)
+        invalidate(key, storage)
+        return None
+
+    return copy.deepcopy(session)
+
+
+def save(key, secret, session, storage='memory'):
+    """Store a copy of the given web session for the given key."""
+    session = copy.deepcopy(session)
+    with _SESSIONS_LOCK:
+        _SESSIONS[key] = (_fingerprint(secret), session)
+    if storage == 'disk':
+        cache.save(_cache_name(key), _encrypt(session, secret))
+
+
+def invalidate(key, storage='memory'):
+    """Drop the web session stored for the given key, if any."""
+    with _SESSIONS_LOCK:
+        _SESSIONS.pop(key, None)
+    if storage == 'disk':
+        cache.delete(_cache_name(key))
+
+
+def clear():
+    """Drop every web session held in memory. Web sessions stored on disk are not affected."""
+    with _SESSIONS_LOCK:
+        _SESSIONS.clear()
+
+
+def _fingerprint(secret):
+    return hashlib.sha256(secret.encode('utf-8')).hexdigest()
+
+
+def _encrypt(session, secret):
+    salt = os.urandom(16)
+    token = _fernet(secret, salt).encrypt(json.dumps(session.to_dict()).encode('utf-8'))
+    return {'salt': base64.b64encode(salt).decode('ascii'), 'token': token.decode('ascii')}
+
+
+def _decrypt(value, secret):
+    from cryptography.fernet import InvalidToken
+    if not value:
+        return None
+    try:
+        salt = base64.b64decode(value['salt'].encode('ascii'))
+        content = _fernet(secret, salt).decrypt(value['token'].encode('ascii'))
+        return WebSession.from_dict(json.loads(content.decode('utf-8')))
+    except (InvalidToken, KeyError, TypeError, ValueError):
+        # Either the credentials changed, or the cache file is corrupted.
+        LOGGER.debug('Invalid web session in cache, ignoring it.')
+        return None
+
+
+def _fernet(secret, salt):
+    # Imported here, to not slow down the startup of providers not using web sessions.
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt,
+                     iterations=KDF_ITERATIONS, backend=default_backend())
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(secret.encode('utf-8'))))
+
+
+def _cache_name(key):
+    return 'web_session_{0}.json'.format(
+        hashlib.sha1('/'.join(key).encode('utf-8')).hexdigest())
@@ -105,6 +105,9 @@ setup(
 
     packages=find_packages(exclude=['contrib', 'docs', 'tests']),
 
+    # Data files bundled with the providers, like the WSDL of the Subreg API.
+    package_data={'lexicon': ['data/*']},
+
     # List run-time dependencies here.  These will be installed by pip when
     # your project is installed. For an analysis of "install_requires" vs pip's
     # requirements files see:
@@ -115,6 +118,7 @@ setup(
         'future',
         'cryptography',
         'pyyaml',
+        'futures; python_version < "3.0"',
     ],
 
     extras_require=extras_require,